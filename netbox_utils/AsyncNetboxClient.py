@@ -0,0 +1,617 @@
+import asyncio
+import ipaddress
+from collections import deque
+from itertools import islice
+from os import getenv
+from typing import AsyncIterator
+
+import httpx
+from loguru import logger
+
+from . import cache_events
+from .connection import DEFAULT_POOL_SIZE, DEFAULT_TIMEOUT
+from .netboxlib import batch_filter_values
+from .resolver_cache import MISSING, ResolverCache
+from .singleflight import AsyncSingleFlight
+
+
+class AsyncNetboxClient:
+    """An asyncio client for the Netbox API, mirroring NetboxClient.
+
+    Every request goes through a semaphore so fan-out workloads run with at
+    most ``concurrency`` requests in flight. Lookups share a ResolverCache.
+    Identical GETs and lookups issued concurrently share one request.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        token: str,
+        concurrency: int = DEFAULT_POOL_SIZE,
+        resolver: ResolverCache | None = None,
+        ssl_verify: bool = False,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.url = url.rstrip("/")
+        self.token = token
+        self.resolver = resolver if resolver is not None else ResolverCache()
+        # creates, updates and deletes made anywhere in netbox_utils keep it current
+        cache_events.bus.subscribe(self.resolver.apply)
+        self.concurrency = concurrency
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._flights = AsyncSingleFlight()
+        # NetBox v2 tokens (nbt_<id>.<secret>) use the Bearer scheme
+        scheme = "Bearer" if token.startswith("nbt_") else "Token"
+        self.http = httpx.AsyncClient(
+            base_url=f"{self.url}/api",
+            headers={
+                "Authorization": f"{scheme} {token}",
+                "Accept": "application/json",
+            },
+            verify=ssl_verify,
+            timeout=httpx.Timeout(DEFAULT_TIMEOUT[1], connect=DEFAULT_TIMEOUT[0]),
+            limits=httpx.Limits(
+                max_connections=concurrency, max_keepalive_connections=concurrency
+            ),
+            transport=transport,
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Close the underlying HTTP connection pool."""
+        await self.http.aclose()
+
+    async def _send(self, method: str, path: str, params=None, json=None):
+        async with self._semaphore:
+            return await self.http.request(method, path, params=params, json=json)
+
+    async def _request(self, method: str, path: str, params=None, json=None):
+        """Issue one request under the concurrency semaphore."""
+        if method == "GET":
+            # each caller decodes the shared response into its own objects
+            key = ("GET", path, str(httpx.QueryParams(params)))
+            response = await self._flights.do(
+                key, lambda: self._send(method, path, params=params)
+            )
+        else:
+            response = await self._send(method, path, params=params, json=json)
+        response.raise_for_status()
+        return response.json() if response.content else None
+
+    async def _get_one(self, path: str, **filters) -> dict | None:
+        """Return the single object matching filters, like pynetbox get()."""
+        data = await self._request("GET", path, params={**filters, "limit": 2})
+        results = data["results"]
+        if len(results) > 1:
+            raise ValueError(
+                "get() returned more than one result. "
+                "Check that the kwarg(s) passed are valid for this endpoint."
+            )
+        return results[0] if results else None
+
+    async def _get_id(self, path: str, **filters) -> int | None:
+        obj = await self._get_one(path, **filters)
+        return obj["id"] if obj else None
+
+    async def _resolve(self, kind: str, key, loader) -> int | None:
+        """Async counterpart of ResolverCache.resolve."""
+        value = self.resolver.get(kind, key)
+        if value is not MISSING:
+            return value
+
+        async def load():
+            value = await loader()
+            self.resolver.set(kind, key, value)
+            return value
+
+        return await self._flights.do(("resolve", kind, key), load)
+
+    async def paginate(
+        self, path: str, page_size: int = 1000, **filters
+    ) -> AsyncIterator[dict]:
+        """
+        Iterate every object of a list endpoint.
+
+        The first page gives the total count; the following pages are fetched
+        concurrently, at most ``concurrency`` pages ahead of the consumer, and
+        yielded in order.
+        """
+        params = {**filters, "limit": page_size, "offset": 0}
+        first = await self._request("GET", path, params=params)
+        for item in first["results"]:
+            yield item
+        if not first["results"]:
+            return
+
+        # NetBox may cap the page size (MAX_PAGE_SIZE) below what we asked for
+        page_size = len(first["results"])
+        params["limit"] = page_size
+        offsets = iter(range(page_size, first["count"], page_size))
+        pending: deque = deque()
+
+        def schedule() -> None:
+            for offset in islice(offsets, self.concurrency - len(pending)):
+                page_params = {**params, "offset": offset}
+                pending.append(
+                    asyncio.ensure_future(
+                        self._request("GET", path, params=page_params)
+                    )
+                )
+
+        try:
+            schedule()
+            while pending:
+                page = await pending.popleft()
+                schedule()
+                for item in page["results"]:
+                    yield item
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def get_netbox_version(self) -> str:
+        """get the netbox version"""
+        status = await self._request("GET", "/status/")
+        return str(status["netbox-version"])
+
+    async def check_if_cidr_exists(self, cidr: str) -> bool:
+        """given a CIDR, check to see if that CIDR is in netbox"""
+        return cidr in await self.check_cidrs_exist_many([cidr])
+
+    async def check_cidrs_exist_many(self, cidrs: list[str]) -> set[str]:
+        """Given many CIDRs, return the set of those already in netbox."""
+        wanted: dict = {}
+        for cidr in cidrs:
+            try:
+                wanted.setdefault(ipaddress.ip_interface(cidr), []).append(cidr)
+            except ValueError as e:
+                logger.error(f"invalid CIDR {cidr}: {e}")
+
+        chunks = batch_filter_values([str(ifc) for ifc in wanted], "address")
+        found: set[str] = set()
+        for chunk in chunks:
+            async for record in self.paginate("/ipam/ip-addresses/", address=chunk):
+                ifc = ipaddress.ip_interface(record["address"])
+                found.update(wanted.get(ifc, []))
+        return found
+
+    async def get_cidr_from_ip(self, ip: str) -> str | None:
+        """given an IP, return the most specific CIDR if it exists in netbox"""
+        cidrs = (await self.get_cidrs_from_ips([ip]))[ip]
+        return cidrs[0] if cidrs else None
+
+    async def get_cidrs_from_ips(self, ips: list[str]) -> dict[str, list[str]]:
+        """Given many bare IPs, return the CIDRs netbox has for each one."""
+        wanted: dict = {}
+        for ip in ips:
+            wanted.setdefault(ipaddress.ip_address(ip), []).append(ip)
+
+        found: dict[str, list[str]] = {ip: [] for ip in ips}
+        hosts = [str(host) for host in wanted]
+        for chunk in batch_filter_values(hosts, "address"):
+            async for record in self.paginate("/ipam/ip-addresses/", address=chunk):
+                ifc = ipaddress.ip_interface(record["address"])
+                for ip in wanted.get(ifc.ip, []):
+                    found[ip].append(f"{ip}/{ifc.network.prefixlen}")
+
+        # most specific first, like netboxlib.get_cidrs_from_ips
+        for cidrs in found.values():
+            cidrs.sort(key=lambda cidr: int(cidr.split("/")[1]), reverse=True)
+        return found
+
+    async def check_if_device_name_exists(self, device_name: str) -> bool:
+        """check if a device name exists in netbox"""
+        try:
+            return await self._get_one("/dcim/devices/", name=device_name) is not None
+        except Exception as e:
+            print(f"Exception: check_if_device_name_exists : {e}")
+            return False
+
+    async def get_site_id(self, site_name: str) -> int | None:
+        """Get the site id for a given site."""
+        try:
+            return await self._resolve(
+                "site", site_name, lambda: self._get_id("/dcim/sites/", name=site_name)
+            )
+        except Exception as e:
+            print(f"Exception: get_site_id : {e}")
+            return None
+
+    async def get_device_id(self, device_name: str) -> int | None:
+        """Get the device id for a given device"""
+        try:
+            return await self._resolve(
+                "device",
+                device_name,
+                lambda: self._get_id("/dcim/devices/", name=device_name),
+            )
+        except Exception as e:
+            print(f"Exception: get_device_id : {e}")
+            return None
+
+    async def get_role_id(self, role_name: str) -> int | None:
+        """Get the role id for a given role"""
+        try:
+            return await self._resolve(
+                "role",
+                role_name,
+                lambda: self._get_id("/dcim/device-roles/", name=role_name),
+            )
+        except Exception as e:
+            print(f"Exception: get_role_id : {e}")
+            return None
+
+    async def get_device_type_id(self, device_type_name: str) -> int | None:
+        """Get the device_type id for a given device type."""
+        try:
+            return await self._resolve(
+                "device_type",
+                device_type_name,
+                lambda: self._get_id("/dcim/device-types/", model=device_type_name),
+            )
+        except Exception as e:
+            print(f"Exception: get_device_type_id : {e}")
+            return None
+
+    async def add_device(
+        self,
+        device_site: str,
+        device_name: str,
+        device_role: str,
+        device_type_name: str,
+    ) -> dict:
+        """Add a device into netbox"""
+        device_type, role, site = await asyncio.gather(
+            self.get_device_type_id(device_type_name),
+            self.get_role_id(device_role),
+            self.get_site_id(device_site),
+        )
+        device_data = {
+            "name": device_name,
+            "device_type": device_type,
+            "role": role,
+            "site": site,
+        }
+        try:
+            device = await self._request("POST", "/dcim/devices/", json=device_data)
+            cache_events.publish_created("device", device_name, device)
+            return device
+        except httpx.HTTPStatusError as e:
+            raise Exception(f"Failed to add device: {str(device_name)} : {e}")
+
+    async def add_interface_to_device(
+        self,
+        interface_name: str,
+        device_name: str,
+        interface_type: str,
+        interface_desc: str,
+    ) -> bool:
+        """Add an interface to a device"""
+        try:
+            interface_data = {
+                "device": await self.get_device_id(device_name),
+                "name": interface_name,
+                "type": interface_type,
+                "enabled": True,
+                "description": interface_desc,
+            }
+            new_interface = await self._request(
+                "POST", "/dcim/interfaces/", json=interface_data
+            )
+            cache_events.publish_created(
+                "interface", (device_name, interface_name), new_interface
+            )
+            return True
+        except Exception as e:
+            print(f"Exception : add_interface_to_device : {e}")
+            return False
+
+    async def get_interface_id(
+        self, device_name: str, interface_name: str
+    ) -> int | None:
+        """Get the interface id for an interface."""
+
+        async def load() -> int | None:
+            return await self._get_id(
+                "/dcim/interfaces/",
+                device_id=await self.get_device_id(device_name),
+                name=interface_name,
+            )
+
+        try:
+            return await self._resolve("interface", (device_name, interface_name), load)
+        except Exception as e:
+            print(f"Exception: get_interface_id : {e}")
+            return None
+
+    async def add_ip_to_interface(
+        self,
+        device_name: str,
+        interface_name: str,
+        ip_addr: str,
+        status: str,
+        description: str,
+    ) -> bool:
+        """Add an IP to an interface."""
+        try:
+            ip_data = {
+                "address": ip_addr,
+                "interface": await self.get_interface_id(device_name, interface_name),
+                "status": status.lower(),
+                "description": description,
+            }
+            new_ip = await self._request("POST", "/ipam/ip-addresses/", json=ip_data)
+            cache_events.publish_created("ip_address", ip_addr, new_ip)
+            return True
+        except Exception as e:
+            print(f"Exception: add_ip_to_interface : {e}")
+            return False
+
+    async def get_ipaddress_id(self, ip_addr: str) -> int | None:
+        """Get the ipaddress id for a given IP."""
+        try:
+            return await self._resolve(
+                "ip_address",
+                ip_addr,
+                lambda: self._get_id("/ipam/ip-addresses/", address=ip_addr),
+            )
+        except Exception as e:
+            print(f"Exception: get_ipaddress_id: {e}")
+            return None
+
+    async def get_as_id(self, asn: int) -> int | None:
+        """Get the AS id for a given ASN."""
+        try:
+            return await self._resolve(
+                "asn", asn, lambda: self._get_id("/ipam/asns/", asn=asn)
+            )
+        except Exception as e:
+            print(f"Exception: get_as_id : {e}")
+            return None
+
+    async def add_bgp_session(
+        self,
+        site: str,
+        remote_as: int,
+        remote_ip: str,
+        local_as: int,
+        local_ip: str,
+        device: str,
+        bgp_name: str,
+        status: str,
+    ) -> dict | None:
+        """Add a BGP Session, resolving its references concurrently."""
+        try:
+            ids = await asyncio.gather(
+                self.get_as_id(local_as),
+                self.get_ipaddress_id(local_ip),
+                self.get_as_id(remote_as),
+                self.get_ipaddress_id(remote_ip),
+                self.get_device_id(device),
+                self.get_site_id(site),
+            )
+            session_info = {
+                "name": bgp_name,
+                "description": bgp_name,
+                "local_as": ids[0],
+                "local_address": ids[1],
+                "remote_as": ids[2],
+                "remote_address": ids[3],
+                "device": ids[4],
+                "status": status.lower(),
+                "site": ids[5],
+            }
+            bgp_session = await self._request(
+                "POST", "/plugins/bgp/session/", json=session_info
+            )
+            cache_events.publish_created(
+                "bgp_session", (device, remote_ip), bgp_session
+            )
+            return bgp_session
+        except Exception as e:
+            print(f"Exception add_bgp_session: {e}")
+            return None
+
+    def iter_bgp_sessions(self, **filters) -> AsyncIterator[dict]:
+        """Iterate all the BGP Sessions."""
+        return self.paginate("/plugins/bgp/session/", **filters)
+
+    async def get_bgp_sessions_all(self) -> list | None:
+        """Get all the BGP Sessions."""
+        try:
+            return [session async for session in self.iter_bgp_sessions()]
+        except Exception as e:
+            print(f"Exception: get_bgp_sessions_all : {e}")
+            return None
+
+    async def get_bgp_session_by_device_and_address(
+        self, device_name: str, remote_addr: str
+    ) -> dict | None:
+        """Get a BGP Session by device and remote address."""
+        try:
+            data = await self._request(
+                "GET",
+                "/plugins/bgp/session/",
+                params={"device": device_name, "remote_address": remote_addr},
+            )
+            return next(iter(data["results"]), None)
+        except Exception as e:
+            print(f"Exception: get_bgp_session_by_device : {e}")
+            return None
+
+    async def add_ip_to_netbox(
+        self,
+        cidr_string: str,
+        description: str,
+        status: str,
+        existing: set[str] | None = None,
+    ) -> dict | None:
+        """Add an IP address into Netbox after validation.
+
+        Pass existing (from check_cidrs_exist_many) to skip the per-IP lookup.
+        """
+        try:
+            validated_cidr = str(ipaddress.ip_interface(cidr_string))
+            if existing is not None:
+                exists = cidr_string in existing
+            else:
+                exists = await self.check_if_cidr_exists(cidr_string)
+            if exists:
+                print(f"CIDR {cidr_string} already exists in Netbox")
+                return None
+
+            ip_data = {
+                "address": validated_cidr,
+                "status": status.lower(),
+                "description": description,
+            }
+            new_ip = await self._request("POST", "/ipam/ip-addresses/", json=ip_data)
+            cache_events.publish_created("ip_address", validated_cidr, new_ip)
+            print(f"Successfully added {validated_cidr} to NetBox")
+            return new_ip
+        except ValueError as e:
+            print(f"Validation error: {str(e)}")
+            return None
+        except Exception as e:
+            print(f"Error adding IP to NetBox: {str(e)}")
+            return None
+
+    async def add_ips_to_netbox(
+        self, cidr_strings: list[str], description: str, status: str
+    ) -> list:
+        """Add many IP addresses, checking for existing ones in bulk first."""
+        existing = await self.check_cidrs_exist_many(cidr_strings)
+        added = []
+        for cidr_string in cidr_strings:
+            new_ip = await self.add_ip_to_netbox(
+                cidr_string, description, status, existing
+            )
+            if new_ip is not None:
+                added.append(new_ip)
+                existing.add(cidr_string)
+        return added
+
+    async def get_circuit_id(
+        self, device_name: str, interface_name: str
+    ) -> int | None:
+        """Get circuit ID from interface link_peers."""
+        try:
+            interface = await self._get_one(
+                "/dcim/interfaces/",
+                device_id=await self.get_device_id(device_name),
+                name=interface_name,
+            )
+            if interface and interface.get("link_peers"):
+                for peer in interface["link_peers"]:
+                    if peer.get("circuit"):
+                        return peer["circuit"]["id"]
+            return None
+        except Exception as e:
+            print(f"Exception: get_circuit_id : {e}")
+            return None
+
+    async def get_circuit(self, device_name: str, interface_name: str) -> dict | None:
+        """Get full circuit details."""
+        try:
+            circuit_id = await self.get_circuit_id(device_name, interface_name)
+            if circuit_id:
+                return await self._request("GET", f"/circuits/circuits/{circuit_id}/")
+            return None
+        except Exception as e:
+            print(f"Exception: get_circuit : {e}")
+            return None
+
+    async def get_vlan_group_id(self, name: str) -> int | None:
+        """Get the ID of a VLAN Group."""
+
+        async def load() -> int | None:
+            data = await self._request(
+                "GET", "/ipam/vlan-groups/", params={"name": name}
+            )
+            group = next(iter(data["results"]), None)
+            return group["id"] if group else None
+
+        try:
+            return await self._resolve("vlan_group", name, load)
+        except Exception as e:
+            print(f"Exception: get_vlan_group_id : {e}")
+            return None
+
+    async def add_vlan_group(
+        self, name: str, slug: str, site_name: str = None, description: str = ""
+    ) -> dict | None:
+        """Add a VLAN Group."""
+        try:
+            data = {"name": name, "slug": slug, "description": description}
+            if site_name:
+                data["scope_type"] = "dcim.site"
+                data["scope_id"] = await self.get_site_id(site_name)
+            group = await self._request("POST", "/ipam/vlan-groups/", json=data)
+            cache_events.publish_created("vlan_group", name, group)
+            return group
+        except Exception as e:
+            print(f"Exception: add_vlan_group : {e}")
+            return None
+
+    async def get_vlan(self, vid: int, site_name: str = None) -> int | None:
+        """Get a VLAN object ID by VID and optional Site."""
+
+        async def load() -> int | None:
+            params = {"vid": vid}
+            if site_name:
+                params["site_id"] = await self.get_site_id(site_name)
+            data = await self._request("GET", "/ipam/vlans/", params=params)
+            vlan = next(iter(data["results"]), None)
+            return vlan["id"] if vlan else None
+
+        try:
+            return await self._resolve("vlan", (vid, site_name), load)
+        except Exception as e:
+            print(f"Exception: get_vlan : {e}")
+            return None
+
+    async def add_vlan(
+        self,
+        vid: int,
+        name: str,
+        site_name: str = None,
+        group_name: str = None,
+        description: str = "",
+        status: str = "active",
+    ) -> dict | None:
+        """Add a VLAN."""
+        try:
+            data = {
+                "vid": vid,
+                "name": name,
+                "status": status,
+                "description": description,
+            }
+            if site_name:
+                data["site"] = await self.get_site_id(site_name)
+            if group_name:
+                data["group"] = await self.get_vlan_group_id(group_name)
+            vlan = await self._request("POST", "/ipam/vlans/", json=data)
+            cache_events.publish_created("vlan", (vid, site_name), vlan)
+            return vlan
+        except Exception as e:
+            print(f"Exception: add_vlan : {e}")
+            return None
+
+
+if __name__ == "__main__":
+
+    async def main() -> None:
+        async with AsyncNetboxClient(
+            getenv("NETBOX_URL"), getenv("NETBOX_TOKEN")
+        ) as client:
+            print(await client.get_netbox_version())
+            sessions = await client.get_bgp_sessions_all()
+            print(f"{len(sessions or [])} BGP sessions")
+
+    asyncio.run(main())
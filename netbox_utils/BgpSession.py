@@ -15,6 +15,8 @@ class BgpSession:
     comments: str
     status: str
     id: int = None
+    # primary IPv4 of the device, filled by the GraphQL reader
+    device_ip: str = None
 
 
 if __name__ == "__main__":
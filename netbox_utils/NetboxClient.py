@@ -2,10 +2,14 @@ import pynetbox
 from loguru import logger
 import urllib3
 import ipaddress
-from ipaddress import ip_address, IPv4Address
 from pynetbox.core.response import RecordSet
 from pprint import pprint
 from os import getenv
+from . import cache_events
+from .connection import get_api
+from .prefetch import PROFILES, prefetch
+from .resolver_cache import ResolverCache
+from .netboxlib import check_cidrs_exist_many, get_cidrs_from_ips
 
 urllib3.disable_warnings()
 
@@ -13,15 +17,17 @@ urllib3.disable_warnings()
 class NetboxClient:
     """A client for using the Netbox API"""
 
-    def __init__(self, url, token):
+    def __init__(self, url, token, resolver: ResolverCache | None = None):
         self.url = url
         self.token = token
+        self.resolver = resolver if resolver is not None else ResolverCache()
+        # creates, updates and deletes made anywhere in netbox_utils keep it current
+        cache_events.bus.subscribe(self.resolver.apply)
         self.nb = self.connect()
 
     def connect(self):
         """Get the connection handle for Netbox."""
-        self.nb = pynetbox.api(url=self.url, token=self.token)
-        self.nb.http_session.verify = False
+        self.nb = get_api(self.url, self.token)
         return self.nb
 
     @staticmethod
@@ -31,36 +37,45 @@ class NetboxClient:
         logger.add("./netbox.log")
         logger.info("Logging configured...")
 
+    @staticmethod
+    def _lookup_id(endpoint, **filters) -> int | None:
+        """Return the id of the single object matching filters, or None."""
+        obj = endpoint.get(**filters)
+        return obj.id if obj else None
+
+    def prefetch(self, profile: str = "provisioning", *tables: str) -> dict[str, int]:
+        """
+        Seed the resolver with whole reference tables before a batch job.
+
+        Args:
+            profile (str): A name from prefetch.PROFILES.
+            *tables (str): Extra resolver kinds to load with the profile.
+
+        Returns:
+            dict: kind -> number of entries seeded.
+        """
+        return prefetch(self.nb, self.resolver, (*PROFILES[profile], *tables))
+
     def get_pynetbox_version(self) -> str:
         """get the netbox version"""
         return str(self.nb.status()["netbox-version"])
 
     def check_if_cidr_exists(self, cidr: str) -> bool:
         """given a CIDR, check to see if that CIDR is in netbox"""
-        result = False
-        try:
-            result = self.nb.ipam.ip_addresses.get(address=cidr)
-        except pynetbox.RequestError as e:
-            print(e.error)
+        return cidr in self.check_cidrs_exist_many([cidr])
 
-        if result:
-            return True
-        else:
-            return False
+    def check_cidrs_exist_many(self, cidrs: list[str]) -> set[str]:
+        """Given many CIDRs, return the set of those already in netbox."""
+        return check_cidrs_exist_many(self.nb, cidrs)
 
     def get_cidr_from_ip(self, ip: str) -> str:
         """ "given an IP, return the CIDR if it exists in netbox"""
-        max_bitrange: int = 128
-        ip_type = ip_address(ip)
-        if isinstance(ip_type, IPv4Address):
-            max_bitrange: int = 32
-
-        for slash in range(max_bitrange, 0, -1):
-            cidr = f"{ip}/{slash}"
-            result = self.nb.ipam.ip_addresses.get(address=cidr)
+        cidrs = get_cidrs_from_ips(self.nb, [ip])[ip]
+        return cidrs[0] if cidrs else None
 
-            if result:
-                return cidr
+    def get_cidrs_from_ips(self, ips: list[str]) -> dict[str, list[str]]:
+        """Given many bare IPs, return the CIDRs netbox has for each one."""
+        return get_cidrs_from_ips(self.nb, ips)
 
     def check_if_device_name_exists(self, device_name: str) -> bool:
         """check if a device name exists in netbox"""
@@ -78,8 +93,11 @@ class NetboxClient:
     def get_site_id(self, site_name: str) -> int | None:
         """Get the site id for a given site."""
         try:
-            site = self.nb.dcim.sites.get(name=site_name)
-            return site.id
+            return self.resolver.resolve(
+                "site",
+                site_name,
+                lambda: self._lookup_id(self.nb.dcim.sites, name=site_name),
+            )
         except Exception as e:
             print(f"Exception: get_site_id : {e}")
             return None
@@ -87,8 +105,11 @@ class NetboxClient:
     def get_device_id(self, device_name: str) -> int | None:
         """Get the device id for a given device"""
         try:
-            device = self.nb.dcim.devices.get(name=device_name)
-            return device.id
+            return self.resolver.resolve(
+                "device",
+                device_name,
+                lambda: self._lookup_id(self.nb.dcim.devices, name=device_name),
+            )
         except Exception as e:
             print(f"Exception: get_device_id : {e}")
             return None
@@ -96,8 +117,11 @@ class NetboxClient:
     def get_role_id(self, role_name: str) -> int | None:
         """Get the role id for a given role"""
         try:
-            role = self.nb.dcim.device_roles.get(name=role_name)
-            return role.id
+            return self.resolver.resolve(
+                "role",
+                role_name,
+                lambda: self._lookup_id(self.nb.dcim.device_roles, name=role_name),
+            )
         except Exception as e:
             print(f"Exception: get_role_id : {e}")
             return None
@@ -105,12 +129,43 @@ class NetboxClient:
     def get_device_type_id(self, device_type_name: str) -> int | None:
         """Get the device_type id for a given device type."""
         try:
-            device_type = self.nb.dcim.device_types.get(model=device_type_name)
-            return device_type.id
+            return self.resolver.resolve(
+                "device_type",
+                device_type_name,
+                lambda: self._lookup_id(
+                    self.nb.dcim.device_types, model=device_type_name
+                ),
+            )
         except Exception as e:
             print(f"Exception: get_device_type_id : {e}")
             return None
 
+    def get_manufacturer_id(self, manufacturer_name: str) -> int | None:
+        """Get the manufacturer id for a given manufacturer."""
+        try:
+            return self.resolver.resolve(
+                "manufacturer",
+                manufacturer_name,
+                lambda: self._lookup_id(
+                    self.nb.dcim.manufacturers, name=manufacturer_name
+                ),
+            )
+        except Exception as e:
+            print(f"Exception: get_manufacturer_id : {e}")
+            return None
+
+    def get_rir_id(self, rir_name: str) -> int | None:
+        """Get the RIR id for a given RIR."""
+        try:
+            return self.resolver.resolve(
+                "rir",
+                rir_name,
+                lambda: self._lookup_id(self.nb.ipam.rirs, name=rir_name),
+            )
+        except Exception as e:
+            print(f"Exception: get_rir_id : {e}")
+            return None
+
     def add_device(
         self,
         device_site: str,
@@ -127,6 +182,7 @@ class NetboxClient:
                 "site": self.get_site_id(device_site),
             }
             device = self.nb.dcim.devices.create(device_data)
+            cache_events.publish_created("device", device_name, device)
             return dict(device)
         except pynetbox.core.query.RequestError as e:
             raise Exception(f"Failed to add device: {str(device_name)} : {e}")
@@ -148,6 +204,9 @@ class NetboxClient:
                 "description": interface_desc,
             }
             new_interface = self.nb.dcim.interfaces.create(**interface_data)
+            cache_events.publish_created(
+                "interface", (device_name, interface_name), new_interface
+            )
             return True
         except Exception as e:
             print(f"Exception : add_interface_to_device : {e}")
@@ -156,10 +215,15 @@ class NetboxClient:
     def get_interface_id(self, device_name: str, interface_name: str) -> int | None:
         """Get the interface id for an interface."""
         try:
-            interface = self.nb.dcim.interfaces.get(
-                device_id=self.get_device_id(device_name), name=interface_name
+            return self.resolver.resolve(
+                "interface",
+                (device_name, interface_name),
+                lambda: self._lookup_id(
+                    self.nb.dcim.interfaces,
+                    device_id=self.get_device_id(device_name),
+                    name=interface_name,
+                ),
             )
-            return interface.id
         except Exception as e:
             print(f"Exception: get_interface_id : {e}")
             return None
@@ -181,6 +245,7 @@ class NetboxClient:
                 "description": description,
             }
             new_ip = self.nb.ipam.ip_addresses.create(**ip_data)
+            cache_events.publish_created("ip_address", ip_addr, new_ip)
             return True
         except Exception as e:
             print(f"Exception: add_ip_to_interface : {e}")
@@ -189,8 +254,11 @@ class NetboxClient:
     def get_ipaddress_id(self, ip_addr: str) -> int | None:
         """Get the ipaddress id for a given IP."""
         try:
-            ipaddress = self.nb.ipam.ip_addresses.get(address=ip_addr)
-            return ipaddress.id
+            return self.resolver.resolve(
+                "ip_address",
+                ip_addr,
+                lambda: self._lookup_id(self.nb.ipam.ip_addresses, address=ip_addr),
+            )
         except Exception as e:
             print(f"Exception: get_ipaddress_id: {e}")
             return None
@@ -198,8 +266,9 @@ class NetboxClient:
     def get_as_id(self, asn: int) -> int | None:
         """Get the AS id for a given ASN."""
         try:
-            asn_entry = self.nb.ipam.asns.get(asn=asn)
-            return asn_entry.id
+            return self.resolver.resolve(
+                "asn", asn, lambda: self._lookup_id(self.nb.ipam.asns, asn=asn)
+            )
         except Exception as e:
             print(f"Exception: get_as_id : {e}")
             return None
@@ -229,6 +298,9 @@ class NetboxClient:
                 "site": self.get_site_id(site),
             }
             bgp_session = self.nb.plugins.bgp.session.create(session_info)
+            cache_events.publish_created(
+                "bgp_session", (device, remote_ip), bgp_session
+            )
             return bgp_session
         except Exception as e:
             print(f"Exception add_bgp_session: {e}")
@@ -290,15 +362,26 @@ class NetboxClient:
             raise ValueError(f"Invalid CIDR address: {cidr_string} - {str(e)}")
 
     def add_ip_to_netbox(
-        self, cidr_string: str, description: str, status: str
+        self,
+        cidr_string: str,
+        description: str,
+        status: str,
+        existing: set[str] | None = None,
     ) -> str | None:
-        """Add an IP address into Netbox after validation."""
+        """Add an IP address into Netbox after validation.
+
+        Pass existing (from check_cidrs_exist_many) to skip the per-IP lookup.
+        """
         try:
             # Validate CIDR address
             validated_cidr = self.validate_ip_cidr(cidr_string)
 
             # Check if the IP/CIDR already exists in Netbox
-            if self.check_if_cidr_exists(cidr_string):
+            if existing is not None:
+                exists = cidr_string in existing
+            else:
+                exists = self.check_if_cidr_exists(cidr_string)
+            if exists:
                 print(f"CIDR {cidr_string} already exists in Netbox")
                 return None
 
@@ -312,6 +395,7 @@ class NetboxClient:
             # Add IP to NetBox
             ipam = self.nb.ipam.ip_addresses
             new_ip = ipam.create(**ip_data)
+            cache_events.publish_created("ip_address", validated_cidr, new_ip)
 
             print(f"Successfully added {validated_cidr} to NetBox")
             return new_ip
@@ -322,6 +406,19 @@ class NetboxClient:
             print(f"Error adding IP to NetBox: {str(e)}")
             return None
 
+    def add_ips_to_netbox(
+        self, cidr_strings: list[str], description: str, status: str
+    ) -> list:
+        """Add many IP addresses, checking for existing ones in bulk first."""
+        existing = self.check_cidrs_exist_many(cidr_strings)
+        added = []
+        for cidr_string in cidr_strings:
+            new_ip = self.add_ip_to_netbox(cidr_string, description, status, existing)
+            if new_ip is not None:
+                added.append(new_ip)
+                existing.add(cidr_string)
+        return added
+
     def get_circuit_id(self, device_name: str, interface_name: str) -> int | None:
         """Get circuit ID from interface link_peers."""
         try:
@@ -354,9 +451,12 @@ class NetboxClient:
         try:
             # VLAN groups are unique by name per site, or global.
             # For simplicity here we just search by name.
-            groups = self.nb.ipam.vlan_groups.filter(name=name)
-            group = next(iter(groups), None)
-            return group.id if group else None
+            def load() -> int | None:
+                groups = self.nb.ipam.vlan_groups.filter(name=name)
+                group = next(iter(groups), None)
+                return group.id if group else None
+
+            return self.resolver.resolve("vlan_group", name, load)
         except Exception as e:
             print(f"Exception: get_vlan_group_id : {e}")
             return None
@@ -372,6 +472,7 @@ class NetboxClient:
                 data["scope_id"] = self.get_site_id(site_name)
 
             group = self.nb.ipam.vlan_groups.create(**data)
+            cache_events.publish_created("vlan_group", name, group)
             return dict(group)
         except Exception as e:
             print(f"Exception: add_vlan_group : {e}")
@@ -380,13 +481,17 @@ class NetboxClient:
     def get_vlan(self, vid: int, site_name: str = None) -> int | None:
         """Get a VLAN object ID by VID and optional Site."""
         try:
-            kwargs = {"vid": vid}
-            if site_name:
-                kwargs["site_id"] = self.get_site_id(site_name)
 
-            vlans = self.nb.ipam.vlans.filter(**kwargs)
-            vlan = next(iter(vlans), None)
-            return vlan.id if vlan else None
+            def load() -> int | None:
+                kwargs = {"vid": vid}
+                if site_name:
+                    kwargs["site_id"] = self.get_site_id(site_name)
+
+                vlans = self.nb.ipam.vlans.filter(**kwargs)
+                vlan = next(iter(vlans), None)
+                return vlan.id if vlan else None
+
+            return self.resolver.resolve("vlan", (vid, site_name), load)
         except Exception as e:
             print(f"Exception: get_vlan : {e}")
             return None
@@ -414,6 +519,7 @@ class NetboxClient:
                 data["group"] = self.get_vlan_group_id(group_name)
 
             vlan = self.nb.ipam.vlans.create(**data)
+            cache_events.publish_created("vlan", (vid, site_name), vlan)
             return dict(vlan)
         except Exception as e:
             print(f"Exception: add_vlan : {e}")
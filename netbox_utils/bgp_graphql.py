@@ -0,0 +1,139 @@
+"""Bulk BGP session reader backed by the NetBox GraphQL API."""
+
+from typing import Iterator
+
+from loguru import logger
+
+from .BgpSession import BgpSession
+
+DEFAULT_PAGE_SIZE: int = 500
+
+# one query returns sessions with the nested objects the BGP tooling needs,
+# so no per-session device lookups are required; pages are an id cursor in id
+# order (NetBox 4.3+ filter and ordering syntax), so sessions created or
+# deleted between pages are never skipped or returned twice
+BGP_SESSIONS_QUERY = """
+query BgpSessions($after: ID!, $limit: Int!) {
+  bgp_session_list(
+    filters: {id: {gt: $after}}
+    ordering: {id: ASC}
+    pagination: {limit: $limit}
+  ) {
+    id
+    name
+    description
+    comments
+    status
+    site { name }
+    device { name primary_ip4 { address } }
+    local_address { address }
+    remote_address { address }
+    local_as { asn }
+    remote_as { asn }
+  }
+}
+"""
+
+
+def graphql_url(nb) -> str:
+    """the GraphQL endpoint lives next to, not under, the REST api root"""
+    base = nb.base_url.rstrip("/")
+    if base.endswith("/api"):
+        base = base[: -len("/api")]
+    return f"{base}/graphql/"
+
+
+def graphql_query(nb, query: str, variables: dict | None = None) -> dict:
+    """
+    POST a GraphQL query using the api handle's pooled session.
+
+    Returns:
+        dict: The ``data`` member of the response.
+    """
+    # NetBox v2 tokens (nbt_<id>.<secret>) use the Bearer scheme
+    scheme = "Bearer" if nb.token.startswith("nbt_") else "Token"
+    response = nb.http_session.post(
+        graphql_url(nb),
+        json={"query": query, "variables": variables or {}},
+        headers={
+            "Authorization": f"{scheme} {nb.token}",
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+        },
+    )
+    response.raise_for_status()
+    payload = response.json()
+    if payload.get("errors"):
+        messages = "; ".join(e.get("message", str(e)) for e in payload["errors"])
+        raise Exception(f"GraphQL query failed: {messages}")
+    return payload["data"]
+
+
+def _nested(obj: dict | None, *path: str):
+    """walk nested GraphQL objects, returning None at the first missing level"""
+    for key in path:
+        if not obj:
+            return None
+        obj = obj.get(key)
+    return obj
+
+
+def session_from_graphql(row: dict) -> BgpSession:
+    """map one bgp_session_list row onto a BgpSession"""
+    return BgpSession(
+        id=int(row["id"]),
+        name=row.get("name") or "",
+        description=row.get("description") or "",
+        comments=row.get("comments") or "",
+        status=str(row.get("status") or ""),
+        site=_nested(row, "site", "name") or "",
+        device=_nested(row, "device", "name") or "",
+        device_ip=_nested(row, "device", "primary_ip4", "address"),
+        local_addr=_nested(row, "local_address", "address") or "",
+        remote_addr=_nested(row, "remote_address", "address") or "",
+        local_as=_nested(row, "local_as", "asn") or 0,
+        remote_as=_nested(row, "remote_as", "asn") or 0,
+    )
+
+
+def iter_bgp_sessions(nb, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[BgpSession]:
+    """
+    Yield every BGP session in id order, one GraphQL request per page.
+
+    Each page starts after the last id of the previous one rather than at an
+    offset, so concurrent creates and deletes cannot shift rows between pages.
+
+    Args:
+        nb: A pynetbox api handle (see connection.get_api).
+        page_size (int): Sessions per GraphQL page.
+
+    Returns:
+        Iterator[BgpSession]: Sessions with device_ip filled from primary_ip4.
+    """
+    after = "0"
+    while True:
+        data = graphql_query(
+            nb, BGP_SESSIONS_QUERY, {"after": after, "limit": page_size}
+        )
+        rows = data.get("bgp_session_list") or []
+        logger.debug(f"graphql bgp_session_list after id {after}: {len(rows)} rows")
+        for row in rows:
+            yield session_from_graphql(row)
+        if len(rows) < page_size:
+            return
+        after = str(rows[-1]["id"])
+
+
+def bgp_session_key(session: BgpSession) -> str:
+    """the remote_local address key used by the BGP sync tooling"""
+    remote_ip = session.remote_addr or "0.0.0.0/0"
+    local_ip = session.local_addr or "0.0.0.0/0"
+    return f"{remote_ip.split('/')[0]}_{local_ip.split('/')[0]}"
+
+
+def get_bgp_sessions(nb, page_size: int = DEFAULT_PAGE_SIZE) -> dict:
+    """get all BGP sessions as a dict of BgpSession objects keyed by address pair"""
+    return {
+        bgp_session_key(session): session
+        for session in iter_bgp_sessions(nb, page_size)
+    }
@@ -0,0 +1,120 @@
+"""Write-through events published by mutating helpers to keep caches current."""
+
+import inspect
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable
+
+from loguru import logger
+
+CREATED = "created"
+UPDATED = "updated"
+DELETED = "deleted"
+# the object changed but caches should drop, not store, it (bulk bursts)
+INVALIDATED = "invalidated"
+# writes of more objects than this publish one invalidation, not one event each,
+# so a bulk create does not flood (and evict) the resolvers' working set
+BULK_THRESHOLD: int = 256
+
+
+@dataclass(frozen=True)
+class CacheEvent:
+    """One change made through netbox_utils.
+
+    ``kind`` and ``key`` match the ResolverCache lookup that would find the
+    object (e.g. kind "device", key the device name). A ``key`` of None on a
+    deleted event means every cached entry of that kind may be stale.
+    """
+
+    action: str
+    kind: str
+    key: Hashable
+    id: int | None = None
+    data: dict | None = None
+
+
+class CacheEventBus:
+    """A synchronous publish/subscribe hub for CacheEvents.
+
+    Bound methods are held weakly, so a NetboxClient's resolver stops
+    receiving events once the client is garbage collected.
+    """
+
+    def __init__(self):
+        self._handlers: list[Callable[[], Callable | None]] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, handler: Callable[[CacheEvent], Any]) -> None:
+        if inspect.ismethod(handler):
+            ref = weakref.WeakMethod(handler)
+        else:
+            ref = lambda: handler  # noqa: E731 - plain functions are held strongly
+        with self._lock:
+            self._handlers.append(ref)
+
+    def unsubscribe(self, handler: Callable[[CacheEvent], Any]) -> None:
+        with self._lock:
+            self._handlers = [ref for ref in self._handlers if ref() != handler]
+
+    def publish(self, event: CacheEvent) -> None:
+        """Deliver an event to every live subscriber; handler errors are logged."""
+        with self._lock:
+            live = [(ref, ref()) for ref in self._handlers]
+            self._handlers = [ref for ref, handler in live if handler is not None]
+        for _, handler in live:
+            if handler is None:
+                continue
+            try:
+                handler(event)
+            except Exception as e:
+                logger.error(f"cache event handler failed for {event}: {e}")
+
+
+# process-wide bus every helper publishes to
+bus = CacheEventBus()
+
+
+def publish(
+    action: str,
+    kind: str,
+    key: Hashable,
+    id: int | None = None,
+    data: dict | None = None,
+) -> None:
+    """Publish a CacheEvent on the process-wide bus."""
+    bus.publish(CacheEvent(action, kind, key, id, data))
+
+
+def _record_id(record) -> int | None:
+    if isinstance(record, dict):
+        return record.get("id")
+    return getattr(record, "id", None)
+
+
+def _record_data(record) -> dict | None:
+    """a plain dict of a pynetbox Record (or dict) for event consumers"""
+    try:
+        return dict(record)
+    except (TypeError, ValueError):
+        return None
+
+
+def publish_created(kind: str, key: Hashable, record) -> None:
+    """Publish a created event for the Record (or dict) a create returned."""
+    publish(CREATED, kind, key, _record_id(record), _record_data(record))
+
+
+def publish_updated(kind: str, key: Hashable, record) -> None:
+    """Publish an updated event for a Record (or dict) just saved."""
+    publish(UPDATED, kind, key, _record_id(record), _record_data(record))
+
+
+def publish_deleted(kind: str, key: Hashable, id: int | None = None) -> None:
+    """Publish a deleted event; key None invalidates the whole kind."""
+    publish(DELETED, kind, key, id)
+
+
+def publish_invalidated(kind: str, key: Hashable = None) -> None:
+    """Publish an invalidated event; key None (a bulk write) drops the whole kind."""
+    publish(INVALIDATED, kind, key)
@@ -0,0 +1,222 @@
+"""Shared, pooled HTTP session factory used by every NetBox entry point."""
+
+import copy
+import threading
+from os import getenv
+
+import pynetbox
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.util.retry import Retry
+
+from .response_cache import ResponseCache
+from .singleflight import SingleFlight
+
+# Size the connection pool to the number of concurrent workers we run
+DEFAULT_POOL_SIZE: int = int(getenv("NETBOX_POOL_SIZE", "16"))
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT: tuple[float, float] = (5.0, 60.0)
+DEFAULT_RETRIES: int = 3
+DEFAULT_BACKOFF: float = 0.5
+RETRY_STATUSES: tuple[int, ...] = (429, 502, 503)
+
+_sessions: dict = {}
+_sessions_lock = threading.Lock()
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """An HTTPAdapter that applies a default timeout to every request.
+
+    With ``single_flight`` set, identical GETs sent concurrently by several
+    threads share one request: the first goes to the server and the others
+    receive a copy of its response.
+    """
+
+    def __init__(
+        self, *args, timeout=DEFAULT_TIMEOUT, single_flight: bool = False, **kwargs
+    ):
+        self.timeout = timeout
+        self.flights = SingleFlight() if single_flight else None
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        if self.flights is None or request.method != "GET" or kwargs.get("stream"):
+            return super().send(request, **kwargs)
+
+        def fetch():
+            response = super(TimeoutHTTPAdapter, self).send(request, **kwargs)
+            # read the body now so every waiter can share it
+            response.content
+            return response
+
+        key = (
+            request.url,
+            request.headers.get("Authorization"),
+            request.headers.get("Accept"),
+        )
+        response = self.flights.do(key, fetch)
+        if response.request is request:
+            return response
+        shared = copy.copy(response)
+        shared.request = request
+        return shared
+
+
+class CachingHTTPAdapter(TimeoutHTTPAdapter):
+    """A TimeoutHTTPAdapter that answers repeated GETs from a ResponseCache.
+
+    With ``refresh`` set, cached entries are never read but fresh responses
+    are still stored. Any other method invalidates cached responses of the
+    endpoint it touched.
+    """
+
+    def __init__(self, *args, cache: ResponseCache, refresh: bool = False, **kwargs):
+        self.cache = cache
+        self.refresh = refresh
+        super().__init__(*args, **kwargs)
+
+    @staticmethod
+    def _list_url(url: str) -> str:
+        """the list endpoint of an object URL: .../dcim/devices/12/ -> .../dcim/devices/"""
+        path = url.split("?", 1)[0].rstrip("/")
+        head, _, tail = path.rpartition("/")
+        return f"{head}/" if tail.isdigit() else f"{path}/"
+
+    def _cached_response(self, request, status: int, headers: dict, body: bytes):
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = body
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.reason = "OK"
+        response.connection = self
+        return response
+
+    def send(self, request, **kwargs):
+        if request.method != "GET":
+            self.cache.invalidate(self._list_url(request.url))
+            return super().send(request, **kwargs)
+
+        key = self.cache.key("GET", request.url, request.headers.get("Authorization"))
+        if not self.refresh:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return self._cached_response(request, *cached)
+
+        response = super().send(request, **kwargs)
+        if response.status_code == 200:
+            # the body is stored decoded, so drop the transfer headers
+            headers = {
+                k: v
+                for k, v in response.headers.items()
+                if k.lower() not in ("content-encoding", "content-length")
+            }
+            self.cache.set(
+                key, request.url, response.status_code, headers, response.content
+            )
+        return response
+
+
+def build_session(
+    ssl_verify: bool = False,
+    pool_size: int = DEFAULT_POOL_SIZE,
+    timeout: tuple[float, float] = DEFAULT_TIMEOUT,
+    retries: int = DEFAULT_RETRIES,
+    backoff_factor: float = DEFAULT_BACKOFF,
+    cache: ResponseCache | None = None,
+    refresh: bool = False,
+    single_flight: bool = True,
+) -> requests.Session:
+    """
+    Build a requests Session tuned for NetBox.
+
+    Args:
+        ssl_verify (bool): Whether to verify SSL certificates (default: False).
+        pool_size (int): Connections kept alive per host; match the worker count.
+        timeout (tuple): (connect, read) timeout in seconds.
+        retries (int): Transport retries for connection errors and 429/502/503.
+        backoff_factor (float): Exponential backoff factor between retries.
+        cache (ResponseCache): Serve repeated GETs from this on-disk cache.
+        refresh (bool): Re-download instead of reading the cache (still stores).
+        single_flight (bool): Share one request between identical concurrent GETs.
+
+    Returns:
+        requests.Session: A session with a pooled, retrying adapter mounted.
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        respect_retry_after_header=True,
+        # hand the final error response back so pynetbox can raise RequestError
+        raise_on_status=False,
+    )
+    adapter_kwargs = dict(
+        timeout=timeout,
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retry,
+        single_flight=single_flight,
+    )
+    if cache is not None:
+        adapter = CachingHTTPAdapter(cache=cache, refresh=refresh, **adapter_kwargs)
+    else:
+        adapter = TimeoutHTTPAdapter(**adapter_kwargs)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.verify = ssl_verify
+    session.headers.update(
+        {"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"}
+    )
+    return session
+
+
+def get_session(ssl_verify: bool = False, **kwargs) -> requests.Session:
+    """
+    Return the process-wide session for these settings, building it once.
+
+    Every module that connects with the same settings shares one session, so
+    TLS handshakes and pooled connections are reused across the process.
+    """
+    key = (ssl_verify, tuple(sorted(kwargs.items())))
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = build_session(ssl_verify=ssl_verify, **kwargs)
+            _sessions[key] = session
+        return session
+
+
+def get_api(
+    url: str,
+    token: str,
+    ssl_verify: bool = False,
+    session: requests.Session | None = None,
+    **session_kwargs,
+) -> pynetbox.api:
+    """
+    Create a pynetbox API handle that uses the shared pooled session.
+
+    Args:
+        url (str): NetBox URL.
+        token (str): NetBox API token.
+        ssl_verify (bool): Whether to verify SSL certificates (default: False).
+        session (requests.Session): Explicit session to use instead of the shared one.
+        **session_kwargs: Passed to build_session (pool_size, timeout, cache, ...).
+
+    Returns:
+        pynetbox.api: The API handle.
+    """
+    nb = pynetbox.api(url, token=token)
+    nb.http_session = session or get_session(ssl_verify=ssl_verify, **session_kwargs)
+    return nb
@@ -0,0 +1,134 @@
+"""Streaming, VRF-aware duplicate IP detection keyed on integer host addresses."""
+
+import socket
+from array import array
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+
+import numpy as np
+
+_LOW_MASK = (1 << 64) - 1
+
+
+@dataclass(frozen=True)
+class DuplicateIp:
+    """One host registered more than once in a VRF.
+
+    ``entries`` holds (id, prefix length) per registration, in input order.
+    """
+
+    vrf: str | None
+    host: str
+    entries: tuple[tuple[int, int], ...]
+
+    @property
+    def exact(self) -> bool:
+        """the same host/mask appears more than once"""
+        lengths = [length for _, length in self.entries]
+        return len(set(lengths)) < len(lengths)
+
+    @property
+    def mask_conflict(self) -> bool:
+        """the host is registered with different masks (10.0.0.1/24 and /32)"""
+        return len({length for _, length in self.entries}) > 1
+
+    @property
+    def addresses(self) -> list[str]:
+        return [f"{self.host}/{length}" for _, length in self.entries]
+
+    def __str__(self) -> str:
+        kinds = [
+            k for k, hit in (("exact", self.exact), ("mask", self.mask_conflict)) if hit
+        ]
+        ids = ", ".join(
+            f"{id} ({address})"
+            for (id, _), address in zip(self.entries, self.addresses)
+        )
+        return f"{self.vrf or 'global'} {self.host} [{'+'.join(kinds)}]: {ids}"
+
+
+def _field(record, name: str):
+    if isinstance(record, dict):
+        return record.get(name)
+    return getattr(record, name, None)
+
+
+def _vrf_name(vrf) -> str | None:
+    if vrf is None or isinstance(vrf, str):
+        return vrf or None
+    return _field(vrf, "name")
+
+
+def _parse(address: str) -> tuple[bool, int, int]:
+    """(is_v6, host integer, prefix length) without building ipaddress objects"""
+    host, _, length = address.partition("/")
+    try:
+        packed = socket.inet_pton(socket.AF_INET, host)
+        v6 = False
+    except OSError:
+        packed = socket.inet_pton(socket.AF_INET6, host)
+        v6 = True
+    return v6, int.from_bytes(packed, "big"), int(length or (128 if v6 else 32))
+
+
+def _host_text(v6: bool, value: int) -> str:
+    family, size = (socket.AF_INET6, 16) if v6 else (socket.AF_INET, 4)
+    return socket.inet_ntop(family, value.to_bytes(size, "big"))
+
+
+def find_duplicate_ips(records: Iterable) -> Iterator[DuplicateIp]:
+    """
+    Find hosts registered more than once per VRF.
+
+    Records (pynetbox records, API dicts or mirror rows with id, address and
+    vrf) are consumed one at a time and never kept. Each one adds four
+    unsigned 64-bit words to flat buffers: VRF and family, the host's high
+    and low halves, and the packed (id, prefix length). Once the input ends
+    the buffers are sorted together and equal neighbours are duplicates, so
+    there is no per-host dict and memory stays at a few dozen bytes per
+    address. Duplicates are yielded sorted by VRF and address.
+    """
+    vrfs: dict[str | None, int] = {}
+    groups, highs, lows, entries = (array("Q") for _ in range(4))
+    for record in records:
+        address = _field(record, "address")
+        if not address:
+            continue
+        v6, host, length = _parse(str(address))
+        vrf = vrfs.setdefault(_vrf_name(_field(record, "vrf")), len(vrfs))
+        groups.append(vrf << 1 | v6)
+        highs.append(host >> 64)
+        lows.append(host & _LOW_MASK)
+        entries.append(((_field(record, "id") or 0) << 8) | length)
+    if not groups:
+        return
+
+    # renumber VRFs by name so the output is in VRF order, global first
+    names = sorted(vrfs, key=lambda name: name or "")
+    rank = np.empty(len(names), dtype=np.uint64)
+    rank[[vrfs[name] for name in names]] = np.arange(len(names), dtype=np.uint64)
+    group = np.frombuffer(groups, dtype=np.uint64)
+    group = rank[group >> 1] << 1 | (group & 1)
+    del groups
+    high = np.frombuffer(highs, dtype=np.uint64)
+    low = np.frombuffer(lows, dtype=np.uint64)
+    # stable, so repeated hosts keep their input order
+    order = np.lexsort((low, high, group))
+    group, high, low = group[order], high[order], low[order]
+    del highs, lows
+
+    new = np.ones(len(order), dtype=bool)
+    new[1:] = (group[1:] != group[:-1]) | (high[1:] != high[:-1])
+    new[1:] |= low[1:] != low[:-1]
+    starts = np.flatnonzero(new)
+    ends = np.append(starts[1:], len(order))
+    repeated = ends - starts > 1
+    for start, end in zip(starts[repeated].tolist(), ends[repeated].tolist()):
+        v6 = bool(group[start] & 1)
+        host = int(high[start]) << 64 | int(low[start])
+        rows = order[start:end].tolist()
+        yield DuplicateIp(
+            names[int(group[start] >> 1)],
+            _host_text(v6, host),
+            tuple((entries[i] >> 8, entries[i] & 0xFF) for i in rows),
+        )
@@ -0,0 +1,684 @@
+"""A local, indexed SQLite mirror of NetBox inventory for read-heavy scripts."""
+
+import json
+import sqlite3
+import time
+from dataclasses import dataclass
+from ipaddress import ip_interface
+from os import getenv
+from typing import Callable, Iterable, Iterator
+
+from loguru import logger
+from pynetbox import RequestError
+
+from .BgpSession import BgpSession
+from .netboxlib import batch_filter_values
+from .pagination import iter_all
+
+DEFAULT_MIRROR_PATH: str = getenv("NETBOX_MIRROR_PATH", "netbox_mirror.db")
+# NetBox prunes the change log after CHANGELOG_RETENTION days (default 90);
+# an older watermark may have missed changes, so refresh() resyncs instead
+DEFAULT_MAX_AGE: float = float(getenv("NETBOX_CHANGELOG_RETENTION", "90")) * 86400
+# object-changes moved from extras to core in NetBox 4.1
+CHANGELOG_ENDPOINTS: tuple[str, ...] = ("core.object_changes", "extras.object_changes")
+
+
+def _name(obj) -> str:
+    """name of a nested object (site, role, device...), or '' when unset"""
+    if not obj:
+        return ""
+    return obj.get("name") or obj.get("display") or ""
+
+
+def _value(obj) -> str:
+    """value of a choice field such as status or type"""
+    if isinstance(obj, dict):
+        return obj.get("value") or ""
+    return obj or ""
+
+
+def _address(obj) -> str:
+    return obj.get("address", "") if obj else ""
+
+
+def _asn(obj) -> int:
+    return obj.get("asn", 0) if obj else 0
+
+
+def _host(address: str) -> str:
+    return str(ip_interface(address).ip) if address else ""
+
+
+def _json(obj) -> str:
+    return json.dumps(obj or {}, sort_keys=True)
+
+
+@dataclass
+class MirrorTable:
+    """How one NetBox endpoint is mirrored into a SQLite table."""
+
+    name: str
+    endpoint: str
+    columns: dict[str, str]
+    fields: tuple[str, ...]
+    row: Callable[[dict], tuple]
+    indexes: tuple[tuple[str, ...], ...] = ()
+    # app_label.model as recorded in the NetBox change log
+    object_type: str = ""
+
+    def endpoint_for(self, nb):
+        """resolve the dotted endpoint path against a pynetbox api handle"""
+        return _endpoint(nb, self.endpoint)
+
+
+def _endpoint(nb, path: str):
+    obj = nb
+    for part in path.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+TABLES: dict[str, MirrorTable] = {
+    t.name: t
+    for t in (
+        MirrorTable(
+            name="devices",
+            endpoint="dcim.devices",
+            object_type="dcim.device",
+            columns={
+                "name": "TEXT",
+                "role": "TEXT",
+                "site": "TEXT",
+                "manufacturer": "TEXT",
+                "status": "TEXT",
+                "primary_ip4": "TEXT",
+                "primary_ip6": "TEXT",
+                "custom_fields": "TEXT",
+            },
+            fields=(
+                "name",
+                "role",
+                "site",
+                "device_type",
+                "status",
+                "primary_ip4",
+                "primary_ip6",
+                "custom_fields",
+            ),
+            row=lambda d: (
+                d.get("name") or "",
+                _name(d.get("role") or d.get("device_role")),
+                _name(d.get("site")),
+                ((d.get("device_type") or {}).get("manufacturer") or {}).get(
+                    "slug", ""
+                ),
+                _value(d.get("status")),
+                _address(d.get("primary_ip4")),
+                _address(d.get("primary_ip6")),
+                _json(d.get("custom_fields")),
+            ),
+            indexes=(("name",), ("manufacturer",), ("site",)),
+        ),
+        MirrorTable(
+            name="interfaces",
+            endpoint="dcim.interfaces",
+            object_type="dcim.interface",
+            columns={
+                "device_id": "INTEGER",
+                "device": "TEXT",
+                "name": "TEXT",
+                "type": "TEXT",
+                "enabled": "INTEGER",
+                "description": "TEXT",
+                "custom_fields": "TEXT",
+            },
+            fields=(
+                "device",
+                "name",
+                "type",
+                "enabled",
+                "description",
+                "custom_fields",
+            ),
+            row=lambda d: (
+                (d.get("device") or {}).get("id"),
+                _name(d.get("device")),
+                d.get("name") or "",
+                _value(d.get("type")),
+                int(bool(d.get("enabled"))),
+                d.get("description") or "",
+                _json(d.get("custom_fields")),
+            ),
+            indexes=(("device_id",), ("device", "name")),
+        ),
+        MirrorTable(
+            name="ip_addresses",
+            endpoint="ipam.ip_addresses",
+            object_type="ipam.ipaddress",
+            columns={
+                "address": "TEXT",
+                "host": "TEXT",
+                "vrf": "TEXT",
+                "status": "TEXT",
+                "dns_name": "TEXT",
+                "description": "TEXT",
+                "assigned_object_type": "TEXT",
+                "assigned_object_id": "INTEGER",
+            },
+            fields=(
+                "address",
+                "vrf",
+                "status",
+                "dns_name",
+                "description",
+                "assigned_object_type",
+                "assigned_object_id",
+            ),
+            row=lambda d: (
+                d.get("address") or "",
+                _host(d.get("address")),
+                _name(d.get("vrf")),
+                _value(d.get("status")),
+                d.get("dns_name") or "",
+                d.get("description") or "",
+                d.get("assigned_object_type") or "",
+                d.get("assigned_object_id"),
+            ),
+            indexes=(("vrf", "host"), ("address",)),
+        ),
+        MirrorTable(
+            name="prefixes",
+            endpoint="ipam.prefixes",
+            object_type="ipam.prefix",
+            columns={
+                "prefix": "TEXT",
+                "vrf": "TEXT",
+                "status": "TEXT",
+                "site": "TEXT",
+                "description": "TEXT",
+                "is_pool": "INTEGER",
+            },
+            fields=(
+                "prefix",
+                "vrf",
+                "status",
+                "site",
+                "scope",
+                "description",
+                "is_pool",
+            ),
+            row=lambda d: (
+                d.get("prefix") or "",
+                _name(d.get("vrf")),
+                _value(d.get("status")),
+                # netbox 4.2 replaced prefix.site with a generic scope
+                _name(d.get("site") or d.get("scope")),
+                d.get("description") or "",
+                int(bool(d.get("is_pool"))),
+            ),
+            indexes=(("vrf", "prefix"),),
+        ),
+        MirrorTable(
+            name="vlans",
+            endpoint="ipam.vlans",
+            object_type="ipam.vlan",
+            columns={
+                "vid": "INTEGER",
+                "name": "TEXT",
+                "vlan_group": "TEXT",
+                "site": "TEXT",
+                "status": "TEXT",
+            },
+            fields=("vid", "name", "group", "site", "status"),
+            row=lambda d: (
+                d.get("vid"),
+                d.get("name") or "",
+                _name(d.get("group")),
+                _name(d.get("site")),
+                _value(d.get("status")),
+            ),
+            indexes=(("vid",), ("vlan_group",)),
+        ),
+        MirrorTable(
+            name="circuits",
+            endpoint="circuits.circuits",
+            object_type="circuits.circuit",
+            columns={
+                "cid": "TEXT",
+                "provider": "TEXT",
+                "status": "TEXT",
+                "custom_fields": "TEXT",
+            },
+            fields=("cid", "provider", "status", "custom_fields"),
+            row=lambda d: (
+                d.get("cid") or "",
+                _name(d.get("provider")),
+                _value(d.get("status")),
+                _json(d.get("custom_fields")),
+            ),
+            indexes=(("cid",),),
+        ),
+        MirrorTable(
+            name="bgp_sessions",
+            endpoint="plugins.bgp.session",
+            object_type="netbox_bgp.bgpsession",
+            columns={
+                "name": "TEXT",
+                "device": "TEXT",
+                "site": "TEXT",
+                "status": "TEXT",
+                "local_address": "TEXT",
+                "remote_address": "TEXT",
+                "local_as": "INTEGER",
+                "remote_as": "INTEGER",
+                "description": "TEXT",
+                "comments": "TEXT",
+            },
+            fields=(
+                "name",
+                "device",
+                "site",
+                "status",
+                "local_address",
+                "remote_address",
+                "local_as",
+                "remote_as",
+                "description",
+                "comments",
+            ),
+            row=lambda d: (
+                d.get("name") or "",
+                _name(d.get("device")),
+                _name(d.get("site")),
+                _value(d.get("status")),
+                _address(d.get("local_address")),
+                _address(d.get("remote_address")),
+                _asn(d.get("local_as")),
+                _asn(d.get("remote_as")),
+                d.get("description") or "",
+                d.get("comments") or "",
+            ),
+            indexes=(("device",), ("remote_address",)),
+        ),
+    )
+}
+
+
+class InventoryMirror:
+    """A SQLite file holding a read-only copy of selected NetBox tables.
+
+    ``sync`` downloads each table with projected, parallel paging and swaps it
+    in within a single transaction; the read methods never touch NetBox.
+    """
+
+    def __init__(self, path: str = DEFAULT_MIRROR_PATH):
+        """
+        Open (and create if needed) the mirror database.
+
+        Args:
+            path (str): SQLite file path, ":memory:" for a throwaway mirror.
+        """
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            # readers keep working while a sync rewrites a table
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self._create_schema()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def _create_schema(self) -> None:
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS sync_state "
+                "(tbl TEXT PRIMARY KEY, synced_at REAL, row_count INTEGER)"
+            )
+            # watermark columns, added to mirrors created before refresh()
+            existing = {
+                row["name"]
+                for row in self.conn.execute("PRAGMA table_info(sync_state)")
+            }
+            for column, kind in (("changelog_id", "INTEGER"), ("watermark", "TEXT")):
+                if column not in existing:
+                    self.conn.execute(
+                        f"ALTER TABLE sync_state ADD COLUMN {column} {kind}"
+                    )
+            for table in TABLES.values():
+                cols = ", ".join(f"{c} {t}" for c, t in table.columns.items())
+                self.conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table.name} "
+                    f"(id INTEGER PRIMARY KEY, {cols}, last_updated TEXT)"
+                )
+                # columns added since the mirror was created; the stored rows
+                # lack them, so the next refresh() resyncs the table in full
+                present = {
+                    row["name"]
+                    for row in self.conn.execute(f"PRAGMA table_info({table.name})")
+                }
+                missing = [c for c in table.columns if c not in present]
+                for column in missing:
+                    self.conn.execute(
+                        f"ALTER TABLE {table.name} ADD COLUMN "
+                        f"{column} {table.columns[column]}"
+                    )
+                if missing:
+                    self.conn.execute(
+                        "DELETE FROM sync_state WHERE tbl = ?", (table.name,)
+                    )
+                for index in table.indexes:
+                    self.conn.execute(
+                        f"CREATE INDEX IF NOT EXISTS idx_{table.name}_{'_'.join(index)} "
+                        f"ON {table.name} ({', '.join(index)})"
+                    )
+
+    @staticmethod
+    def _table(name: str) -> MirrorTable:
+        try:
+            return TABLES[name]
+        except KeyError:
+            raise ValueError(f"Unknown mirror table: {name}") from None
+
+    def _row(self, table: MirrorTable, record: dict) -> tuple:
+        return (record["id"], *table.row(record), record.get("last_updated"))
+
+    def _insert_sql(self, table: MirrorTable) -> str:
+        columns = ["id", *table.columns, "last_updated"]
+        return (
+            f"INSERT OR REPLACE INTO {table.name} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)})"
+        )
+
+    def _mark_synced(self, name: str, changelog_id: int | None) -> int:
+        """record a completed sync; the watermark is the newest server timestamp"""
+        table = self._table(name)
+        count, watermark = self.conn.execute(
+            f"SELECT COUNT(*), MAX(last_updated) FROM {table.name}"
+        ).fetchone()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO sync_state "
+            "(tbl, synced_at, row_count, changelog_id, watermark) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (name, time.time(), count, changelog_id, watermark),
+        )
+        return count
+
+    def load(
+        self, name: str, records: Iterable[dict], changelog_id: int | None = None
+    ) -> int:
+        """
+        Replace a mirror table with the given records (dicts shaped like the API).
+
+        Returns:
+            int: The number of rows stored.
+        """
+        table = self._table(name)
+        with self.conn:
+            self.conn.execute(f"DELETE FROM {table.name}")
+            self.conn.executemany(
+                self._insert_sql(table), (self._row(table, r) for r in records)
+            )
+            return self._mark_synced(name, changelog_id)
+
+    def apply(
+        self,
+        name: str,
+        upserts: Iterable[dict] = (),
+        deletes: Iterable[int] = (),
+        changelog_id: int | None = None,
+        mark_synced: bool = True,
+    ) -> tuple[int, int]:
+        """
+        Apply created/updated records and deleted ids to a mirror table.
+
+        Pass mark_synced=False for pushed changes (webhooks) so the refresh
+        watermark still covers anything that was not pushed.
+
+        Returns:
+            tuple: (rows upserted, rows deleted)
+        """
+        table = self._table(name)
+        rows = [self._row(table, r) for r in upserts]
+        deletes = [(i,) for i in deletes]
+        with self.conn:
+            self.conn.executemany(self._insert_sql(table), rows)
+            deleted = self.conn.executemany(
+                f"DELETE FROM {table.name} WHERE id = ?", deletes
+            ).rowcount
+            if mark_synced:
+                self._mark_synced(name, changelog_id)
+        return len(rows), max(deleted, 0)
+
+    def _fetch(self, nb, table: MirrorTable, **filters):
+        fields = (*table.fields, "last_updated")
+        return (
+            dict(r) for r in iter_all(table.endpoint_for(nb), fields=fields, **filters)
+        )
+
+    def _fetch_ids(self, nb, table: MirrorTable, ids: list[int]):
+        for chunk in batch_filter_values(sorted(ids), "id"):
+            yield from self._fetch(nb, table, id=chunk)
+
+    @staticmethod
+    def _changelog(nb):
+        """the object-changes endpoint this server has, or None"""
+        for path in CHANGELOG_ENDPOINTS:
+            try:
+                # pynetbox releases before the core app have no nb.core
+                endpoint = _endpoint(nb, path)
+            except AttributeError:
+                continue
+            try:
+                # filter() is lazy: list() sends the probe, offset keeps it one page
+                list(endpoint.filter(limit=1, offset=0, brief=1))
+            except RequestError as e:
+                if e.req.status_code in (403, 404):
+                    continue
+                raise
+            return endpoint
+        return None
+
+    @staticmethod
+    def _latest_change_id(changelog) -> int | None:
+        if changelog is None:
+            return None
+        latest = list(changelog.filter(limit=1, offset=0, ordering="-id", brief=1))
+        return latest[0].id if latest else 0
+
+    def sync(self, nb, tables: Iterable[str] | None = None) -> dict[str, int]:
+        """
+        Download tables from NetBox into the mirror.
+
+        Args:
+            nb: A pynetbox api handle (see connection.get_api).
+            tables (list): Table names to refresh (default: all of TABLES).
+
+        Returns:
+            dict: Rows stored per table.
+        """
+        # taken before downloading so changes made meanwhile are replayed
+        changelog_id = self._latest_change_id(self._changelog(nb))
+        counts = {}
+        for name in tables or TABLES:
+            table = self._table(name)
+            counts[name] = self.load(name, self._fetch(nb, table), changelog_id)
+            logger.info(f"mirror {name}: {counts[name]} rows")
+        return counts
+
+    def _state(self, name: str):
+        return self.conn.execute(
+            "SELECT * FROM sync_state WHERE tbl = ?", (name,)
+        ).fetchone()
+
+    def synced_at(self, name: str) -> float | None:
+        """unix time a table was last synced, None if it never was"""
+        state = self._state(name)
+        return state["synced_at"] if state else None
+
+    def refresh(
+        self,
+        nb,
+        tables: Iterable[str] | None = None,
+        max_age: float = DEFAULT_MAX_AGE,
+    ) -> dict[str, dict]:
+        """
+        Bring tables up to date with only the changes since the last sync.
+
+        Changed object ids are read from the NetBox change log after the
+        stored change id; deletes are dropped locally and creates/updates are
+        re-fetched by id. Without a change log, records with ``last_updated``
+        at or after the watermark are re-fetched and deletes are found by
+        comparing ids. Tables never synced, or whose watermark is older than
+        ``max_age`` seconds (the change log may have been pruned), get a full
+        sync.
+
+        Returns:
+            dict: Per table, the mode used and rows upserted/deleted/stored.
+        """
+        changelog = self._changelog(nb)
+        latest_id = self._latest_change_id(changelog)
+        results = {}
+        for name in tables or TABLES:
+            table = self._table(name)
+            state = self._state(name)
+            if state is None or time.time() - state["synced_at"] > max_age:
+                count = self.load(name, self._fetch(nb, table), latest_id)
+                results[name] = {"mode": "full", "rows": count}
+            elif changelog is not None and state["changelog_id"] is not None:
+                results[name] = self._refresh_from_changelog(
+                    nb, table, changelog, state["changelog_id"], latest_id
+                )
+            else:
+                results[name] = self._refresh_from_timestamps(
+                    nb, table, state["watermark"], latest_id
+                )
+            logger.info(f"mirror {name}: {results[name]}")
+        return results
+
+    def _refresh_from_changelog(
+        self, nb, table: MirrorTable, changelog, since_id: int, latest_id: int
+    ) -> dict:
+        changes = iter_all(
+            changelog,
+            fields=["action", "changed_object_id"],
+            changed_object_type=table.object_type,
+            id__gt=since_id,
+            id__lte=latest_id,
+        )
+        # replay in change order so the last action on an object wins
+        final: dict[int, str] = {}
+        for change in sorted(changes, key=lambda c: c.id):
+            action = change.action
+            final[change.changed_object_id] = (
+                action.get("value") if isinstance(action, dict) else str(action)
+            )
+        deletes = [i for i, action in final.items() if action == "delete"]
+        changed = [i for i, action in final.items() if action != "delete"]
+        upserts = self._fetch_ids(nb, table, changed) if changed else ()
+        upserted, deleted = self.apply(table.name, upserts, deletes, latest_id)
+        return {"mode": "changelog", "upserted": upserted, "deleted": deleted}
+
+    def _refresh_from_timestamps(
+        self, nb, table: MirrorTable, watermark: str | None, latest_id: int | None
+    ) -> dict:
+        filters = {"last_updated__gte": watermark} if watermark else {}
+        upserts = list(self._fetch(nb, table, **filters))
+        # timestamps cannot show deletes; compare ids, which is cheap with brief
+        remote = {r.id for r in iter_all(table.endpoint_for(nb), brief=True)}
+        local = {row[0] for row in self.conn.execute(f"SELECT id FROM {table.name}")}
+        upserted, deleted = self.apply(table.name, upserts, local - remote, latest_id)
+        return {"mode": "last_updated", "upserted": upserted, "deleted": deleted}
+
+    def count(self, name: str) -> int:
+        table = self._table(name)
+        return self.conn.execute(f"SELECT COUNT(*) FROM {table.name}").fetchone()[0]
+
+    def query(self, name: str, order_by: str = "id", **where) -> list[dict]:
+        """
+        Return rows of a mirror table matching column=value filters.
+
+        Example:
+            mirror.query("interfaces", device_id=12)
+        """
+        return list(self.iter_query(name, order_by, **where))
+
+    def iter_query(self, name: str, order_by: str = "id", **where) -> Iterator[dict]:
+        """query() as a generator, for tables too large to hold as a list"""
+        table = self._table(name)
+        valid = {"id", *table.columns, "last_updated"}
+        for column in (*where, order_by):
+            if column not in valid:
+                raise ValueError(f"Unknown column for {name}: {column}")
+        clause = " AND ".join(f"{c} = ?" for c in where)
+        sql = f"SELECT * FROM {table.name}"
+        if clause:
+            sql += f" WHERE {clause}"
+        sql += f" ORDER BY {order_by}"
+        for row in self.conn.execute(sql, tuple(where.values())):
+            yield dict(row)
+
+    def devices(self, **where) -> list[dict]:
+        return self.query("devices", **where)
+
+    def interfaces(self, **where) -> list[dict]:
+        return self.query("interfaces", **where)
+
+    def ip_addresses(self, **where) -> list[dict]:
+        return self.query("ip_addresses", **where)
+
+    def prefixes(self, **where) -> list[dict]:
+        return self.query("prefixes", **where)
+
+    def vlans(self, **where) -> list[dict]:
+        return self.query("vlans", **where)
+
+    def circuits(self, **where) -> list[dict]:
+        return self.query("circuits", **where)
+
+    def custom_field(self, row: dict, field: str, default=None):
+        """read one custom field from a mirrored row"""
+        return json.loads(row.get("custom_fields") or "{}").get(field, default)
+
+    def duplicate_ips(self) -> dict[str, list[dict]]:
+        """ip addresses stored more than once, keyed by address"""
+        rows = self.conn.execute(
+            "SELECT * FROM ip_addresses WHERE address IN "
+            "(SELECT address FROM ip_addresses GROUP BY address HAVING COUNT(*) > 1) "
+            "ORDER BY address, id"
+        )
+        duplicates: dict[str, list[dict]] = {}
+        for row in rows:
+            duplicates.setdefault(row["address"], []).append(dict(row))
+        return duplicates
+
+    def bgp_sessions(self, **where) -> list[BgpSession]:
+        """mirrored BGP sessions as BgpSession objects, with the device primary IP"""
+        sessions = []
+        for row in self.query("bgp_sessions", **where):
+            device = self.conn.execute(
+                "SELECT primary_ip4 FROM devices WHERE name = ?", (row["device"],)
+            ).fetchone()
+            sessions.append(
+                BgpSession(
+                    id=row["id"],
+                    name=row["name"],
+                    description=row["description"],
+                    comments=row["comments"],
+                    status=row["status"],
+                    site=row["site"],
+                    device=row["device"],
+                    device_ip=(device["primary_ip4"] or None) if device else None,
+                    local_addr=row["local_address"],
+                    remote_addr=row["remote_address"],
+                    local_as=row["local_as"],
+                    remote_as=row["remote_as"],
+                )
+            )
+        return sessions
@@ -0,0 +1,312 @@
+"""Allocate free addresses and aligned sub-prefixes from a NetBox prefix."""
+
+import random
+import time
+from ipaddress import ip_address, ip_network
+
+import numpy as np
+import pynetbox
+from loguru import logger
+
+from . import cache_events
+from .netboxlib import batch_filter_values
+from .pagination import iter_all
+
+# bits per bitmap window (2 MiB); larger prefixes are scanned window by window
+MAX_BITMAP_BITS: int = 1 << 24
+DEFAULT_RETRIES: int = 3
+# upper bound, in seconds, of the random pause before retry n is n times this
+DEFAULT_BACKOFF: float = 0.2
+_FULL = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+def _word_mask(low: int, high: int) -> np.uint64:
+    """bits low..high (inclusive) of one word"""
+    return np.uint64(((1 << (high - low + 1)) - 1) << low)
+
+
+class AddressBitmap:
+    """One bit per address of a range, set when taken, kept as uint64 words."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.words = np.zeros((size + 63) // 64, dtype=np.uint64)
+        if size % 64:
+            # bits past the end are never free
+            self.words[-1] = _word_mask(size % 64, 63)
+
+    def mark(self, offsets) -> None:
+        offsets = np.asarray(offsets, dtype=np.int64)
+        np.bitwise_or.at(
+            self.words,
+            offsets >> 6,
+            np.left_shift(np.uint64(1), (offsets & 63).astype(np.uint64)),
+        )
+
+    def mark_range(self, first: int, last: int) -> None:
+        """mark offsets first..last (inclusive), whole words at a time"""
+        first_word, last_word = first >> 6, last >> 6
+        if first_word == last_word:
+            self.words[first_word] |= _word_mask(first & 63, last & 63)
+            return
+        self.words[first_word] |= _word_mask(first & 63, 63)
+        self.words[first_word + 1 : last_word] = _FULL
+        self.words[last_word] |= _word_mask(0, last & 63)
+
+    @property
+    def free(self) -> int:
+        taken = np.unpackbits(self.words.astype("<u8").view(np.uint8)).sum()
+        return len(self.words) * 64 - int(taken)
+
+    def find(self, count: int) -> list[int]:
+        """
+        Offsets of the first ``count`` clear bits.
+
+        Full words are skipped with one comparison each; only words with a
+        clear bit are unpacked, a few at a time.
+        """
+        free = ~self.words
+        found: list[int] = []
+        candidates = np.flatnonzero(free)
+        step = max(1, count // 64 + 1)
+        for i in range(0, len(candidates), step):
+            chunk = candidates[i : i + step]
+            bits = np.unpackbits(
+                free[chunk].astype("<u8").view(np.uint8), bitorder="little"
+            )
+            word, bit = np.nonzero(bits.reshape(-1, 64))
+            found += (chunk[word] * 64 + bit).tolist()
+            if len(found) >= count:
+                break
+        return found[:count]
+
+
+class PrefixAllocator:
+    """Find and reserve free space in one prefix, safely against other allocators.
+
+    The prefix's addresses and child prefixes are read once per attempt and
+    laid out in a bitmap. Free slots are reserved with one bulk create and
+    read back. A slot that turns out to have any other record is given up:
+    our record is deleted and the slot is retried after a random pause. Two
+    allocators racing for one slot may both give it up, but never both keep
+    it. Ids cannot decide the winner, since they are assigned at insert and
+    a lower id may commit later. With NetBox uniqueness enforcement
+    (ENFORCE_GLOBAL_UNIQUE or a VRF's enforce_unique) duplicate addresses are
+    rejected outright and the read-back is a second line of defence.
+
+    Example:
+        allocator = PrefixAllocator(nb, "10.20.0.0/16")
+        links = allocator.allocate_prefixes(4, 31, status="active")
+    """
+
+    def __init__(
+        self,
+        nb,
+        prefix: str,
+        vrf_id: int | None = None,
+        max_bits: int = MAX_BITMAP_BITS,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+    ):
+        self.nb = nb
+        self.network = ip_network(prefix, strict=False)
+        self.vrf_id = vrf_id
+        self.max_bits = max_bits
+        self.retries = retries
+        self.backoff = backoff
+        self.is_pool = False
+        self._hosts = np.zeros(0, dtype=np.uint64)
+        self._children: list[tuple[int, int]] = []
+
+    @property
+    def _vrf_filter(self):
+        return self.vrf_id if self.vrf_id is not None else "null"
+
+    def _offset(self, address) -> int:
+        return int(ip_address(address)) - int(self.network.network_address)
+
+    def refresh(self) -> None:
+        """Read the prefix, its addresses and its child prefixes from NetBox."""
+        prefix = str(self.network)
+        record = self.nb.ipam.prefixes.get(prefix=prefix, vrf_id=self._vrf_filter)
+        if record is None:
+            raise Exception(f"Prefix {prefix} not found")
+        self.is_pool = bool(getattr(record, "is_pool", False))
+        addresses = iter_all(
+            self.nb.ipam.ip_addresses,
+            fields=["address"],
+            parent=prefix,
+            vrf_id=self._vrf_filter,
+        )
+        # offsets past 64 bits (v6 prefixes shorter than /64) stay Python ints
+        wide = self.network.num_addresses > 1 << 64
+        self._hosts = np.sort(
+            np.array(
+                [self._offset(str(a.address).split("/")[0]) for a in addresses],
+                dtype=object if wide else np.uint64,
+            )
+        )
+        children = iter_all(
+            self.nb.ipam.prefixes,
+            fields=["prefix"],
+            within=prefix,
+            vrf_id=self._vrf_filter,
+        )
+        self._children = []
+        for child in children:
+            network = ip_network(str(child.prefix))
+            first = self._offset(network.network_address)
+            self._children.append((first, first + network.num_addresses - 1))
+
+    def _bitmaps(self, shift: int, with_children: bool, reserved: tuple = ()):
+        """
+        (first slot, bitmap) windows over the prefix, in address order.
+
+        One bit stands for a block of ``1 << shift`` addresses, so a /64 out
+        of a /32 is a scan of 2**32 bits rather than 2**96.
+        """
+        size = self.network.num_addresses >> shift
+        hosts = self._hosts >> shift
+        for first in range(0, size, self.max_bits):
+            bitmap = AddressBitmap(min(self.max_bits, size - first))
+            last = first + bitmap.size - 1
+            low, high = np.searchsorted(hosts, [first, last + 1])
+            bitmap.mark((hosts[low:high] - first).astype(np.int64))
+            bitmap.mark([r - first for r in reserved if first <= r <= last])
+            if with_children:
+                for start, end in self._children:
+                    start, end = start >> shift, end >> shift
+                    if start <= last and end >= first:
+                        bitmap.mark_range(
+                            max(start, first) - first, min(end, last) - first
+                        )
+            yield first, bitmap
+
+    def _find(
+        self, count: int, shift: int, with_children: bool, reserved: tuple = ()
+    ) -> list[int]:
+        """offsets of the first ``count`` free blocks of ``1 << shift`` addresses"""
+        found: list[int] = []
+        for first, bitmap in self._bitmaps(shift, with_children, reserved):
+            found += [(first + o) << shift for o in bitmap.find(count - len(found))]
+            if len(found) == count:
+                break
+        return found
+
+    def free_addresses(self, count: int) -> list[str]:
+        """
+        The first ``count`` unused addresses, as address/prefix-length strings.
+
+        Like NetBox, the network and broadcast addresses of an IPv4 prefix
+        shorter than /31 are not offered unless the prefix is a pool.
+        """
+        net = self.network
+        reserved = ()
+        if net.version == 4 and net.prefixlen < 31 and not self.is_pool:
+            reserved = (0, net.num_addresses - 1)
+        return [
+            f"{net.network_address + o}/{net.prefixlen}"
+            for o in self._find(count, 0, False, reserved)
+        ]
+
+    def free_prefixes(self, count: int, length: int) -> list[str]:
+        """The first ``count`` aligned /length blocks with no addresses or prefixes."""
+        net = self.network
+        if not net.prefixlen < length <= net.max_prefixlen:
+            raise ValueError(f"/{length} does not fit inside {net}")
+        return [
+            f"{net.network_address + o}/{length}"
+            for o in self._find(count, net.max_prefixlen - length, True)
+        ]
+
+    def allocate_addresses(self, count: int, **fields) -> list:
+        """Reserve the next ``count`` free addresses; fields go in every payload."""
+        return self._allocate(
+            self.nb.ipam.ip_addresses,
+            "ip_address",
+            "address",
+            count,
+            fields,
+            self.free_addresses,
+        )
+
+    def allocate_prefixes(self, count: int, length: int, **fields) -> list:
+        """Reserve the next ``count`` free /length child prefixes."""
+        return self._allocate(
+            self.nb.ipam.prefixes,
+            "prefix",
+            "prefix",
+            count,
+            fields,
+            lambda n: self.free_prefixes(n, length),
+        )
+
+    def _allocate(self, endpoint, kind: str, key: str, count, fields, find) -> list:
+        created: list = []
+        # one invalidation for a bulk allocation rather than an event per slot
+        bulk = count > cache_events.BULK_THRESHOLD
+        try:
+            for attempt in range(1, self.retries + 2):
+                if attempt > 1:
+                    # so allocators that gave up the same slots do not collide again
+                    time.sleep(random.uniform(0, self.backoff * (attempt - 1)))
+                self.refresh()
+                wanted = find(count - len(created))
+                if len(wanted) < count - len(created):
+                    raise Exception(
+                        f"{self.network} has {len(wanted)} free, "
+                        f"{count - len(created)} requested"
+                    )
+                rows = [{key: value, "vrf": self.vrf_id, **fields} for value in wanted]
+                try:
+                    records = endpoint.create(rows)
+                except pynetbox.RequestError as e:
+                    # with uniqueness enforced, a slot taken meanwhile fails the batch
+                    if e.req.status_code != 400 or attempt > self.retries:
+                        raise
+                    logger.warning(f"allocation in {self.network} conflicted: {e}")
+                    continue
+                won = self._keep_uncontested(endpoint, key, records)
+                if not bulk:
+                    for record in won:
+                        cache_events.publish_created(
+                            kind, str(getattr(record, key)), record
+                        )
+                created += won
+                if len(created) == count:
+                    return created
+                logger.warning(
+                    f"attempt {attempt}: lost {len(records) - len(won)} of "
+                    f"{len(records)} slots in {self.network} to another allocator"
+                )
+            raise Exception(
+                f"could not allocate {count} from {self.network} "
+                f"after {self.retries + 1} attempts"
+            )
+        finally:
+            # also when a later attempt fails, the records kept so far exist
+            if bulk and created:
+                cache_events.publish_invalidated(kind)
+
+    def _keep_uncontested(self, endpoint, key: str, records: list) -> list:
+        """read the slots back; ours are kept only where no other record exists"""
+
+        def slot(value) -> str:
+            # bare hosts match addresses with any mask
+            return str(value).split("/")[0] if key == "address" else str(value)
+
+        ours = {record.id for record in records}
+        contested: set[str] = set()
+        values = [slot(getattr(r, key)) for r in records]
+        for chunk in batch_filter_values(values, key):
+            for other in iter_all(
+                endpoint, fields=[key], vrf_id=self._vrf_filter, **{key: chunk}
+            ):
+                if other.id not in ours:
+                    contested.add(slot(getattr(other, key)))
+        won, lost = [], []
+        for record, value in zip(records, values):
+            (lost if value in contested else won).append(record)
+        if lost:
+            endpoint.delete(lost)
+        return won
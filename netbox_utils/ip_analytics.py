@@ -0,0 +1,424 @@
+"""Vectorized IPAM analytics: addresses and prefixes as NumPy arrays."""
+
+import socket
+from dataclasses import dataclass
+from typing import Iterable
+
+import numpy as np
+
+# v6 values as paired uint64 halves; the field order makes sorts numeric
+V6 = np.dtype([("hi", "u8"), ("lo", "u8")])
+_V6_BE = np.dtype([("hi", ">u8"), ("lo", ">u8")])
+# VRF-qualified v6 keys; v4 keys pack the VRF above the 32 address bits
+V6_KEY = np.dtype([("vrf", "u8"), ("hi", "u8"), ("lo", "u8")])
+BITS: dict[int, int] = {4: 32, 6: 128}
+_ONES = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+def _field(record, name: str):
+    if isinstance(record, dict):
+        return record.get(name)
+    return getattr(record, name, None)
+
+
+def _text(value, key: str) -> str | None:
+    """a nested object's key (API records) or the plain value (mirror rows)"""
+    if value is None or isinstance(value, str):
+        return value or None
+    return _field(value, key)
+
+
+def pack_addresses(texts: Iterable[str], version: int) -> np.ndarray:
+    """Address strings (no mask) to uint32 (v4) or V6 values in one buffer."""
+    family = socket.AF_INET if version == 4 else socket.AF_INET6
+    blob = b"".join(socket.inet_pton(family, text) for text in texts)
+    if version == 4:
+        return np.frombuffer(blob, dtype=">u4").astype(np.uint32)
+    return np.frombuffer(blob, dtype=_V6_BE).astype(V6)
+
+
+def unpack_addresses(values: np.ndarray, version: int) -> list[str]:
+    """uint32 or V6 values back to address strings"""
+    if version == 4:
+        blob, size, family = values.astype(">u4").tobytes(), 4, socket.AF_INET
+    else:
+        blob, size, family = values.astype(_V6_BE).tobytes(), 16, socket.AF_INET6
+    return [
+        socket.inet_ntop(family, blob[i : i + size]) for i in range(0, len(blob), size)
+    ]
+
+
+def _low_mask(bits: np.ndarray) -> np.ndarray:
+    """uint64 masks of the lowest ``bits`` bits, 0 <= bits <= 64"""
+    bits = bits.astype(np.uint64)
+    shifted = np.left_shift(np.uint64(1), np.minimum(bits, np.uint64(63)))
+    return np.where(bits >= 64, _ONES, shifted - np.uint64(1))
+
+
+def _sorted_distinct(values: np.ndarray) -> np.ndarray:
+    """np.unique for plain arrays, as a sort and a mask (unique hashes uint64)"""
+    values = np.sort(values)
+    keep = np.ones(len(values), dtype=bool)
+    keep[1:] = values[1:] != values[:-1]
+    return values[keep]
+
+
+def _dense_ranks(values: np.ndarray) -> tuple[np.ndarray, int]:
+    """(rank of each value among the distinct values, number of distinct)"""
+    order = np.argsort(values)
+    ordered = values[order]
+    step = np.zeros(len(values), dtype=np.int64)
+    step[1:] = ordered[1:] != ordered[:-1]
+    ranks = np.empty(len(values), dtype=np.int64)
+    ranks[order] = np.cumsum(step)
+    return ranks, int(ranks.max()) + 1 if len(values) else 0
+
+
+def _ranks(*arrays: np.ndarray) -> list[np.ndarray]:
+    """
+    Structured keys to int64 values that order and compare the same way.
+
+    All arrays are ranked together, so the results compare across them.
+    Each field is ranked on its own (one plain uint64 argsort) and the ranks
+    are combined positionally, which is several times faster than sorting
+    the records; a lexsort covers the rare case that overflows int64.
+    """
+    joined = np.concatenate(arrays)
+    names = joined.dtype.names
+    combined = np.zeros(len(joined), dtype=np.int64)
+    span = 1
+    for name in names:
+        ranks, distinct = _dense_ranks(joined[name])
+        span *= max(distinct, 1)
+        if span >= 2**63:
+            order = np.lexsort([joined[field] for field in reversed(names)])
+            ordered = joined[order]
+            change = np.zeros(len(joined), dtype=np.int64)
+            for field in names:
+                change[1:] |= ordered[field][1:] != ordered[field][:-1]
+            combined[order] = np.cumsum(change)
+            break
+        combined = combined * distinct + ranks
+    return np.split(combined, np.cumsum([len(a) for a in arrays])[:-1])
+
+
+def _lex_le(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """a <= b element-wise for structured arrays, field by field"""
+    names = a.dtype.names
+    result = a[names[-1]] <= b[names[-1]]
+    for name in reversed(names[:-1]):
+        result = (a[name] < b[name]) | ((a[name] == b[name]) & result)
+    return result
+
+
+@dataclass
+class IpamArrays:
+    """Addresses and prefixes of one address family, column by column.
+
+    Hosts are uint32 (v4) or paired uint64 ``V6`` values; prefixes carry
+    start, end and length. VRFs are integer codes into ``vrf_names``
+    (0 is the global table). Every analysis is a handful of sorts,
+    ``searchsorted`` calls and element-wise operations over these columns.
+    """
+
+    version: int
+    vrf_names: list
+    hosts: np.ndarray
+    host_lengths: np.ndarray
+    host_vrfs: np.ndarray
+    host_ids: np.ndarray
+    starts: np.ndarray
+    lengths: np.ndarray
+    prefix_vrfs: np.ndarray
+    prefix_ids: np.ndarray
+    containers: np.ndarray
+    pools: np.ndarray
+
+    @classmethod
+    def from_records(
+        cls, addresses: Iterable = (), prefixes: Iterable = ()
+    ) -> dict[int, "IpamArrays"]:
+        """
+        Load IP address and prefix records into one IpamArrays per family.
+
+        Records may be pynetbox records, API dicts or inventory mirror rows.
+
+        Returns:
+            dict: {4: IpamArrays, 6: IpamArrays} sharing one VRF code table.
+        """
+        vrf_names: list = [None]
+        codes: dict = {None: 0}
+
+        def code(record) -> int:
+            name = _text(_field(record, "vrf"), "name")
+            if name not in codes:
+                codes[name] = len(vrf_names)
+                vrf_names.append(name)
+            return codes[name]
+
+        columns = {v: ([], [], [], [], [], [], [], [], [], []) for v in BITS}
+        for record in addresses:
+            host, _, length = str(_field(record, "address")).partition("/")
+            version = 6 if ":" in host else 4
+            col = columns[version]
+            col[0].append(host)
+            col[1].append(int(length or BITS[version]))
+            col[2].append(code(record))
+            col[3].append(_field(record, "id") or 0)
+        for record in prefixes:
+            start, _, length = str(_field(record, "prefix")).partition("/")
+            version = 6 if ":" in start else 4
+            col = columns[version]
+            col[4].append(start)
+            col[5].append(int(length))
+            col[6].append(code(record))
+            col[7].append(_field(record, "id") or 0)
+            col[8].append(_text(_field(record, "status"), "value") == "container")
+            col[9].append(bool(_field(record, "is_pool")))
+
+        return {
+            version: cls(
+                version,
+                vrf_names,
+                pack_addresses(col[0], version),
+                np.array(col[1], dtype=np.uint8),
+                np.array(col[2], dtype=np.uint64),
+                np.array(col[3], dtype=np.int64),
+                pack_addresses(col[4], version),
+                np.array(col[5], dtype=np.uint8),
+                np.array(col[6], dtype=np.uint64),
+                np.array(col[7], dtype=np.int64),
+                np.array(col[8], dtype=bool),
+                np.array(col[9], dtype=bool),
+            )
+            for version, col in columns.items()
+        }
+
+    @property
+    def bits(self) -> int:
+        return BITS[self.version]
+
+    @property
+    def ends(self) -> np.ndarray:
+        """last address of every prefix"""
+        host_bits = self.bits - self.lengths.astype(np.int64)
+        if self.version == 4:
+            return self.starts | _low_mask(host_bits).astype(np.uint32)
+        ends = self.starts.copy()
+        ends["hi"] |= _low_mask(np.clip(host_bits - 64, 0, 64))
+        ends["lo"] |= _low_mask(np.clip(host_bits, 0, 64))
+        return ends
+
+    @property
+    def sizes(self) -> np.ndarray:
+        """addresses per prefix, as float64 so /0 of v6 fits"""
+        return np.exp2((self.bits - self.lengths.astype(np.int64)).astype(np.float64))
+
+    def _keys(self, vrfs: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """sortable VRF-qualified keys"""
+        if self.version == 4:
+            return (vrfs << np.uint64(32)) | values.astype(np.uint64)
+        keys = np.empty(len(values), dtype=V6_KEY)
+        keys["vrf"], keys["hi"], keys["lo"] = vrfs, values["hi"], values["lo"]
+        return keys
+
+    def _comparable(self, *keys: np.ndarray) -> list[np.ndarray]:
+        """keys as plain arrays: v4 keys already are, v6 keys become ranks"""
+        return list(keys) if self.version == 4 else _ranks(*keys)
+
+    def duplicate_rows(self) -> np.ndarray:
+        """rows of hosts registered more than once per VRF, grouped by host"""
+        (keys,) = self._comparable(self._keys(self.host_vrfs, self.hosts))
+        order = np.argsort(keys, kind="stable")
+        ordered = keys[order]
+        same = ordered[1:] == ordered[:-1]
+        repeated = np.zeros(len(keys), dtype=bool)
+        repeated[1:] |= same
+        repeated[:-1] |= same
+        return order[repeated]
+
+    def duplicates(self) -> list[tuple[str | None, str, list[int]]]:
+        """(vrf, host, ids) for each duplicated host, whatever the masks"""
+        rows = self.duplicate_rows()
+        hosts = unpack_addresses(self.hosts[rows], self.version)
+        vrfs = self.host_vrfs[rows].tolist()
+        ids = self.host_ids[rows].tolist()
+        groups: list = []
+        for vrf, host, id in zip(vrfs, hosts, ids):
+            if groups and groups[-1][:2] == (self.vrf_names[vrf], host):
+                groups[-1][2].append(id)
+            else:
+                groups.append((self.vrf_names[vrf], host, [id]))
+        return groups
+
+    def containing(self) -> np.ndarray:
+        """
+        The most specific prefix row containing each host (-1 for none).
+
+        Prefixes of one length never overlap within a VRF, so one
+        ``searchsorted`` per distinct length finds the candidate and longer
+        lengths override shorter ones.
+        """
+        host_keys, start_keys, end_keys = self._comparable(
+            self._keys(self.host_vrfs, self.hosts),
+            self._keys(self.prefix_vrfs, self.starts),
+            self._keys(self.prefix_vrfs, self.ends),
+        )
+        return self._most_specific(host_keys, start_keys, end_keys)
+
+    def parents(self) -> np.ndarray:
+        """The most specific prefix row strictly enclosing each prefix (-1 for none)."""
+        start_keys, end_keys = self._comparable(
+            self._keys(self.prefix_vrfs, self.starts),
+            self._keys(self.prefix_vrfs, self.ends),
+        )
+        return self._most_specific(start_keys, start_keys, end_keys, self.lengths)
+
+    def _most_specific(
+        self,
+        keys: np.ndarray,
+        start_keys: np.ndarray,
+        end_keys: np.ndarray,
+        shorter_than: np.ndarray | None = None,
+        candidates: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """the matching prefix row per key, among ``candidates`` rows if given"""
+        # sorted needles keep searchsorted cache-friendly
+        order = np.argsort(keys)
+        keys = keys[order]
+        if shorter_than is not None:
+            shorter_than = shorter_than[order]
+        found = np.full(len(keys), -1, dtype=np.int64)
+        for length in np.unique(self.lengths):
+            wanted = self.lengths == length
+            if candidates is not None:
+                wanted &= candidates
+            rows = np.flatnonzero(wanted)
+            rows = rows[np.argsort(start_keys[rows], kind="stable")]
+            index = np.searchsorted(start_keys[rows], keys, side="right") - 1
+            safe = np.maximum(index, 0)
+            hit = (index >= 0) & (keys <= end_keys[rows[safe]])
+            if shorter_than is not None:
+                hit &= length < shorter_than
+            found[hit] = rows[safe[hit]]
+        result = np.empty_like(found)
+        result[order] = found
+        return result
+
+    def utilization(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Used addresses of each prefix, as NetBox counts them.
+
+        A container is used by its child prefixes in the same VRF; any other
+        prefix by the distinct addresses inside it. IPv4 prefixes shorter
+        than /31 that are not pools leave out the network and broadcast
+        addresses from their size.
+
+        Returns:
+            tuple: (used, size, percent) float64 arrays per prefix row.
+        """
+        hosts, start_keys, end_keys = self._comparable(
+            self._keys(self.host_vrfs, self.hosts),
+            self._keys(self.prefix_vrfs, self.starts),
+            self._keys(self.prefix_vrfs, self.ends),
+        )
+        hosts = _sorted_distinct(hosts)
+        used = np.searchsorted(hosts, end_keys, side="right") - np.searchsorted(
+            hosts, start_keys, side="left"
+        )
+        # copies of one prefix (same VRF, start and length) collapse onto
+        # the first of them, so a child is neither counted twice nor
+        # credited to one copy while another reports nothing
+        order = np.lexsort((self.lengths, start_keys))
+        new = np.ones(len(order), dtype=bool)
+        new[1:] = (start_keys[order[1:]] != start_keys[order[:-1]]) | (
+            self.lengths[order[1:]] != self.lengths[order[:-1]]
+        )
+        canonical = np.zeros(len(order), dtype=bool)
+        canonical[order[new]] = True
+        copy_of = np.empty(len(order), dtype=np.int64)
+        copy_of[order] = order[new][np.cumsum(new) - 1]
+        # direct children never overlap, so their sizes add up
+        children = np.flatnonzero(canonical)
+        parents = self._most_specific(
+            start_keys[children],
+            start_keys,
+            end_keys,
+            self.lengths[children],
+            canonical,
+        )
+        direct = parents >= 0
+        covered = np.bincount(
+            parents[direct],
+            weights=self.sizes[children[direct]],
+            minlength=len(used),
+        )
+        used = np.where(self.containers, covered[copy_of], used)
+        size = self.sizes
+        if self.version == 4:
+            hosts_only = (self.lengths < 31) & ~self.containers & ~self.pools
+            size = np.where(hosts_only, size - 2, size)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            percent = np.minimum(np.nan_to_num(used / size * 100), 100.0)
+        return used, size, percent
+
+    def gaps(self, row: int) -> list[tuple[str, str]]:
+        """
+        Address ranges of prefix ``row`` not covered by any prefix inside it.
+
+        Returns:
+            list: (first, last) address strings of each free range.
+        """
+        start_keys = self._keys(self.prefix_vrfs, self.starts)
+        order = np.argsort(start_keys, kind="stable")
+        ends = self.ends
+        vrf = self.prefix_vrfs[row : row + 1]
+        low = np.searchsorted(
+            start_keys[order], self._keys(vrf, self.starts[row : row + 1])[0], "left"
+        )
+        high = np.searchsorted(
+            start_keys[order], self._keys(vrf, ends[row : row + 1])[0], "right"
+        )
+        children = order[low:high]
+        children = children[self.lengths[children] > self.lengths[row]]
+        if self.version == 4:
+            first, last = int(self.starts[row]), int(ends[row])
+            starts = self.starts[children].astype(np.int64)
+            covered = np.maximum.accumulate(ends[children].astype(np.int64))
+            free_from = np.concatenate(([first], covered + 1))
+            free_to = np.concatenate((starts - 1, [last]))
+            keep = free_from <= free_to
+            return list(
+                zip(
+                    unpack_addresses(free_from[keep], 4),
+                    unpack_addresses(free_to[keep], 4),
+                )
+            )
+        return self._gaps_v6(row, children, ends)
+
+    def _gaps_v6(self, row: int, children: np.ndarray, ends: np.ndarray) -> list:
+        # a running maximum over paired halves, via ranks of the distinct ends
+        distinct, rank = np.unique(ends[children], return_inverse=True)
+        covered = distinct[np.maximum.accumulate(rank)]
+        free_from = np.concatenate((self.starts[row : row + 1], covered))
+        free_to = np.concatenate((self.starts[children], ends[row : row + 1]))
+        # nothing follows a child ending at ffff:...:ffff or precedes one at ::
+        overflow = np.concatenate(
+            ([False], (covered["hi"] == _ONES) & (covered["lo"] == _ONES))
+        )
+        underflow = np.concatenate(
+            ((free_to["hi"][:-1] == 0) & (free_to["lo"][:-1] == 0), [False])
+        )
+        # covered + 1 and child start - 1, carrying between the halves
+        free_from["lo"][1:] += np.uint64(1)
+        free_from["hi"][1:] += (free_from["lo"][1:] == 0).astype(np.uint64)
+        borrow = (free_to["lo"][:-1] == 0).astype(np.uint64)
+        free_to["lo"][:-1] -= np.uint64(1)
+        free_to["hi"][:-1] -= borrow
+        keep = _lex_le(free_from, free_to) & ~overflow & ~underflow
+        return list(
+            zip(
+                unpack_addresses(free_from[keep], 6),
+                unpack_addresses(free_to[keep], 6),
+            )
+        )
@@ -1,48 +1,131 @@
 import ipaddress
-from ipaddress import IPv4Address
-from ipaddress import IPv4Network
-from ipaddress import IPv4Interface
-from ipaddress import ip_network
-
+from dataclasses import dataclass
+from typing import Iterator
 
 from loguru import logger
 
+# usable hosts logged per call; ask for another page with offset
+DEFAULT_HOST_PAGE: int = 256
 
-def ip_info(cidr: str) -> None:
-    """Provide information about the IP address"""
 
-    logger.info(f"CIDR    {cidr}")
-    ip = cidr.split("/")[0]
-    if ipaddress.ip_address(ip).version == 4:
-        logger.info(f"cidr = {cidr}")
-        net = ipaddress.ip_network(cidr, strict=False).netmask
+@dataclass(frozen=True)
+class IpInfo:
+    """
+    Summary of an address and its network, computed without listing hosts.
 
-        # concatenate the IP and Netmask
-        check_this: str = f"{ip}/{net}"
+    Every field is arithmetic on the network bounds, so a /8 or a v6 /32 is
+    as cheap as a /30. ``hosts()`` walks the usable addresses lazily.
+    """
 
-        logger.info(f"IPv4    {ip}")
-        logger.info(f"inet_aton: {int(ipaddress.IPv4Address(ip))}")
+    cidr: str
+    ip: ipaddress.IPv4Address | ipaddress.IPv6Address
+    network: ipaddress.IPv4Network | ipaddress.IPv6Network
+    first_host: ipaddress.IPv4Address | ipaddress.IPv6Address
+    last_host: ipaddress.IPv4Address | ipaddress.IPv6Address
+    num_hosts: int
 
-        if IPv4Address(ip).is_private:
-            logger.info("private IP")
+    @property
+    def version(self) -> int:
+        return self.ip.version
 
-        if IPv4Address(ip).is_multicast:
-            logger.info("multicast IP")
+    @property
+    def num_addresses(self) -> int:
+        return self.network.num_addresses
 
-        ifc: IPv4Interface = IPv4Interface(check_this)
-        logger.info(f"ifc.ip = {ifc.ip}")
-        logger.info(f"ifc.network = {ifc.network}")
-        net: IPv4Network = IPv4Network(ifc.network)
-        logger.info(f"broadcast address: {net.broadcast_address}")
-        logger.info(f"number of addresses: {str(net.num_addresses)}")
-        subnet_host_list: list = list(ip_network(ifc.network).hosts())
+    @property
+    def broadcast(self) -> ipaddress.IPv4Address | None:
+        """the v4 broadcast address; IPv6 has none"""
+        return self.network.broadcast_address if self.version == 4 else None
+
+    def hosts(self, offset: int = 0, limit: int | None = None) -> Iterator:
+        """
+        Usable host addresses, like ``network.hosts()`` but able to start anywhere.
+
+        Args:
+            offset (int): Hosts to skip; the first one returned is computed directly.
+            limit (int): Stop after this many hosts (None for all of them).
+
+        Raises:
+            ValueError: If offset or limit is negative.
+        """
+        if offset < 0 or (limit is not None and limit < 0):
+            raise ValueError(
+                f"offset and limit must not be negative: {offset}, {limit}"
+            )
+        start = int(self.first_host) + offset
+        stop = int(self.last_host) + 1
+        if limit is not None:
+            stop = min(stop, start + limit)
+        make = type(self.ip)
+        return (make(value) for value in range(start, stop))
+
+
+def get_ip_info(cidr: str) -> IpInfo:
+    """
+    Parse an address with a prefix length or netmask into an IpInfo.
+
+    Usable hosts follow ``ipaddress``: IPv4 leaves out the network and
+    broadcast addresses below /31, IPv6 the subnet-router anycast address
+    below /127.
+    """
+    ifc = ipaddress.ip_interface(cidr)
+    net = ifc.network
+    first, last = int(net.network_address), int(net.broadcast_address)
+    if net.version == 4 and net.prefixlen < 31:
+        first, last = first + 1, last - 1
+    elif net.version == 6 and net.prefixlen < 127:
+        first += 1
+    return IpInfo(
+        cidr,
+        ifc.ip,
+        net,
+        type(ifc.ip)(first),
+        type(ifc.ip)(last),
+        last - first + 1,
+    )
 
-        logger.info("usable host IPs:")
-        for host in subnet_host_list:
-            logger.info(host)
 
-    elif ipaddress.ip_address(ip).version == 6:
+def ip_info(cidr: str, offset: int = 0, limit: int = DEFAULT_HOST_PAGE) -> IpInfo:
+    """
+    Log information about an address and one page of its usable hosts.
+
+    Memory and time do not depend on the network size; pass offset to page
+    through the hosts of a large network.
+
+    Returns:
+        IpInfo: The summary that was logged.
+    """
+    info = get_ip_info(cidr)
+    ip, net = info.ip, info.network
+    # checked before anything is logged
+    page = list(info.hosts(offset, limit))
+
+    logger.info(f"CIDR    {cidr}")
+    if info.version == 4:
+        logger.info(f"cidr = {cidr}")
+        logger.info(f"IPv4    {ip}")
+    else:
         logger.info(f"IPv6    {ip}")
-        logger.info(f"inet_aton: {int(ipaddress.IPv6Address(ip))}")
-        net6 = ipaddress.ip_network(cidr, strict=False)
-        logger.info(f"number of addresses: {str(net6.num_addresses)}")
+    logger.info(f"inet_aton: {int(ip)}")
+
+    if ip.is_private:
+        logger.info("private IP")
+    if ip.is_multicast:
+        logger.info("multicast IP")
+
+    logger.info(f"ifc.ip = {ip}")
+    logger.info(f"ifc.network = {net}")
+    if info.broadcast is not None:
+        logger.info(f"broadcast address: {info.broadcast}")
+    logger.info(f"number of addresses: {info.num_addresses}")
+    logger.info(f"first usable host: {info.first_host}")
+    logger.info(f"last usable host: {info.last_host}")
+    logger.info(f"number of usable hosts: {info.num_hosts}")
+
+    if page:
+        logger.info(
+            f"usable host IPs {offset + 1}-{offset + len(page)} of {info.num_hosts}:"
+        )
+        for host in page:
+            logger.info(host)
+    return info
@@ -1,5 +1,6 @@
 import pynetbox
 from typing import Dict
+from .connection import get_api
 
 
 class NetboxManager:
@@ -15,8 +16,7 @@ class NetboxManager:
             ssl_verify (bool): Whether to verify SSL certificates (default: True).
         """
         try:
-            self.nb = pynetbox.api(url, token=token)
-            self.nb.http_session.verify = ssl_verify
+            self.nb = get_api(url, token, ssl_verify=ssl_verify)
         except Exception as e:
             raise Exception(f"Failed to connect to NetBox: {str(e)}")
 
@@ -7,7 +7,14 @@ from os import getenv
 import pynetbox
 from ipaddress import IPv4Network
 from ipaddress import IPv4Interface
-from ipaddress import ip_address, IPv4Address
+from ipaddress import ip_address, ip_interface, ip_network
+from urllib.parse import quote
+from . import cache_events
+from .connection import get_api
+from .pagination import iter_all
+
+# keep list-filter query strings well under common proxy/server URL limits
+MAX_QUERY_LENGTH: int = 4000
 
 
 nm_cidr_dict = {
@@ -88,9 +95,7 @@ def connect_netbox():
         logger.error("NETBOX_TOKEN or NETBOX_URL missing from environment variables")
         sys.exit()
 
-    nb = pynetbox.api(url=url, token=token)
-    nb.http_session.verify = False
-    return nb
+    return get_api(url, token)
 
 
 def get_pynetbox_version(nb) -> str:
@@ -103,12 +108,17 @@ def show_pynetbox_version(nb) -> None:
     logger.info(get_pynetbox_version(nb))
 
 
-def show_all_netbox_devices(nb) -> None:
-    """show all devices in netbox"""
-    devices = nb.dcim.devices.all()
+def show_all_netbox_devices(
+    nb, fields=("name", "display", "primary_ip", "role", "device_role")
+) -> None:
+    """show all devices in netbox, requesting only the fields shown"""
+    devices = iter_all(nb.dcim.devices, fields=fields)
     for device in devices:
+        # device_role was renamed role in netbox 4.0
+        values = dict(device)
+        role = values.get("role") or values.get("device_role")
         logger.info(
-            f"{str(device.id):<6} {str(device):<30}  {str(device.primary_ip):<20}  {str(device.device_role)}"
+            f"{str(device.id):<6} {str(device):<30}  {str(device.primary_ip):<20}  {str(role)}"
         )
 
 
@@ -119,80 +129,208 @@ def get_netbox_device_count(nb):
 
 def check_if_cidr_exists(nb, cidr: str) -> bool:
     """given a CIDR, check to see if that CIDR is in netbox"""
-    result = False
-    try:
-        result = nb.ipam.ip_addresses.get(address=cidr)
-    except pynetbox.RequestError as e:
-        logger.error(e.error)
+    return cidr in check_cidrs_exist_many(nb, [cidr])
 
-    if result:
-        return True
-    else:
-        return False
+
+def check_cidrs_exist_many(nb, cidrs: list[str]) -> set[str]:
+    """
+    given many CIDRs, return the set of those already in netbox
+    the CIDRs are sent as multi-value address= filters in url-bounded chunks
+    """
+    wanted: dict = {}
+    for cidr in cidrs:
+        try:
+            wanted.setdefault(ip_interface(cidr), []).append(cidr)
+        except ValueError as e:
+            logger.error(f"invalid CIDR {cidr}: {e}")
+
+    found: set[str] = set()
+    for chunk in batch_filter_values([str(ifc) for ifc in wanted], "address"):
+        try:
+            for record in nb.ipam.ip_addresses.filter(address=chunk):
+                found.update(wanted.get(ip_interface(str(record.address)), []))
+        except pynetbox.RequestError as e:
+            logger.error(e.error)
+    return found
+
+
+def batch_filter_values(
+    values: list[str], param: str, max_query_len: int = MAX_QUERY_LENGTH
+) -> list[list[str]]:
+    """split filter values into chunks whose ?param=v1&param=v2 query stays bounded"""
+    chunks: list[list[str]] = []
+    chunk: list[str] = []
+    length = 0
+    for value in values:
+        # "&param=value" with the value url-encoded as requests will send it
+        item_len = len(param) + len(quote(str(value), safe="")) + 2
+        if chunk and length + item_len > max_query_len:
+            chunks.append(chunk)
+            chunk, length = [], 0
+        chunk.append(value)
+        length += item_len
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def get_cidrs_from_ips(nb, ips: list[str]) -> dict[str, list[str]]:
+    """
+    given bare IPs, return every CIDR netbox has for each one
+    netbox matches a mask-less address filter against the host part, so one
+    request per chunk of IPs returns the records for every mask length
+    """
+    wanted: dict = {}
+    for ip in ips:
+        wanted.setdefault(ip_address(ip), []).append(ip)
+
+    found: dict[str, list[str]] = {ip: [] for ip in ips}
+    hosts = [str(host) for host in wanted]
+    for chunk in batch_filter_values(hosts, "address"):
+        for record in nb.ipam.ip_addresses.filter(address=chunk):
+            ifc = ip_interface(str(record.address))
+            for ip in wanted.get(ifc.ip, []):
+                found[ip].append(f"{ip}/{ifc.network.prefixlen}")
+
+    # most specific first, matching the order of the old /32 -> /1 probe
+    for ip, cidrs in found.items():
+        cidrs.sort(key=lambda cidr: int(cidr.split("/")[1]), reverse=True)
+    return found
 
 
 def check_if_ip_exists(nb, ip: str) -> bool:
     """given just an IP, look for any CIDR which exists in netbox using that IP"""
-    rv = False
-    max_bitrange: int = 128
-    ip_type = ip_address(ip)
-    if isinstance(ip_type, IPv4Address):
-        max_bitrange: int = 32
-    for slash in range(max_bitrange, 0, -1):
-        cidr = f"{ip}/{slash}"
-        result = nb.ipam.ip_addresses.get(address=cidr)
-        if result:
-            logger.info(f"IP: {ip}  =>  CIDR: {cidr}  exists in netbox")
-            rv = True
-    if rv is False:
+    cidrs = get_cidrs_from_ips(nb, [ip])[ip]
+    for cidr in cidrs:
+        logger.info(f"IP: {ip}  =>  CIDR: {cidr}  exists in netbox")
+    if not cidrs:
         logger.info(f"IP: {ip} was not found in netbox")
-    return rv
+    return bool(cidrs)
 
 
 def get_cidr_from_ip(nb, ip: str) -> str:
     """ "given an IP, return the CIDR if it exists in netbox"""
-    max_bitrange: int = 128
-    ip_type = ip_address(ip)
-    if isinstance(ip_type, IPv4Address):
-        max_bitrange: int = 32
+    cidrs = get_cidrs_from_ips(nb, [ip])[ip]
+    return cidrs[0] if cidrs else None
 
-    for slash in range(max_bitrange, 0, -1):
-        cidr = f"{ip}/{slash}"
-        result = nb.ipam.ip_addresses.get(address=cidr)
-
-        if result:
-            return cidr
 
-
-def get_all_ip_prefixes(nb):
-    """get all of the ip prefixes"""
+def get_all_ip_prefixes(nb, fields=None, brief: bool = False):
+    """
+    get all of the ip prefixes
+    pass fields or brief to download a reduced representation
+    """
+    if fields or brief:
+        return iter_all(nb.ipam.prefixes, fields=fields, brief=brief)
     return nb.ipam.prefixes.all()
 
 
 def show_all_ip_prefixes(nb) -> None:
     """show all of the ip prefixes"""
-    prefixes = nb.ipam.prefixes.all()
+    prefixes = get_all_ip_prefixes(nb, fields=("display", "prefix"))
     for pf in prefixes:
         logger.info(pf)
 
 
-def add_ip_prefix(nb, prefix) -> bool:
-    """add a netbox prefix"""
+def _prefix_string(prefix) -> str:
+    """accept either a prefix string or a create payload dict"""
+    return prefix["prefix"] if isinstance(prefix, dict) else str(prefix)
+
+
+def _vrf_id(vrf) -> int | None:
+    """the VRF id of a record's vrf or a payload's vrf (an id or nested object)"""
+    if vrf is None or vrf == "":
+        return None
+    if isinstance(vrf, (int, str)):
+        return int(vrf)
+    vrf_id = vrf.get("id") if isinstance(vrf, dict) else getattr(vrf, "id", None)
+    if vrf_id is None:
+        raise ValueError(f"pass the prefix vrf as an id, not {vrf}")
+    return int(vrf_id)
+
+
+def _prefix_key(prefix) -> tuple:
+    """(vrf id or None for the global table, normalized ip_network)"""
+    vrf = prefix.get("vrf") if isinstance(prefix, dict) else None
+    return _vrf_id(vrf), ip_network(_prefix_string(prefix), strict=False)
+
+
+def get_prefix_index(nb) -> set:
+    """
+    build a set of every prefix in netbox, keyed on (vrf id, ip_network)
+    so a prefix in one VRF does not hide the same prefix in another
+    uses one projected list fetch of prefix and vrf rather than full objects
+    """
+    return {
+        (_vrf_id(pf.vrf), ip_network(str(pf.prefix), strict=False))
+        for pf in get_all_ip_prefixes(nb, fields=("prefix", "vrf"))
+    }
+
+
+def add_ip_prefix(nb, prefix, index: set | None = None) -> bool:
+    """
+    add a netbox prefix, unless it already exists in the same VRF
+    pass index (from get_prefix_index) to check locally instead of querying
+    """
+    key = _prefix_key(prefix)
+    vrf, network = key
     # ensure the prefix doesn't exist
-    prefixes = get_all_ip_prefixes(nb)
-    if prefix in prefixes:
+    if index is not None:
+        exists = key in index
+    else:
+        found = nb.ipam.prefixes.filter(
+            prefix=str(network), vrf_id=vrf if vrf is not None else "null"
+        )
+        exists = next(iter(found), None)
+    if exists:
         return False
     else:
-        nb.ipam.prefixes.create(prefix)
+        payload = prefix if isinstance(prefix, dict) else {"prefix": str(network)}
+        new_prefix = nb.ipam.prefixes.create(payload)
+        cache_events.publish_created("prefix", str(network), new_prefix)
+        if index is not None:
+            index.add(key)
         return True
 
 
+def add_ip_prefixes(nb, prefixes: list, batch_size: int = 250) -> list:
+    """
+    add many netbox prefixes, creating only the missing ones in list POSTs
+    prefixes may be prefix strings or create payload dicts (with a vrf id
+    for a VRF prefix); existence is checked per VRF
+    """
+    index = get_prefix_index(nb)
+    todo = []
+    for prefix in prefixes:
+        key = _prefix_key(prefix)
+        network = key[1]
+        if key in index:
+            continue
+        index.add(key)
+        todo.append(prefix if isinstance(prefix, dict) else {"prefix": str(network)})
+
+    # one invalidation for a bulk write rather than an event per prefix
+    bulk = len(todo) > cache_events.BULK_THRESHOLD
+    created = []
+    for i in range(0, len(todo), batch_size):
+        rows = todo[i : i + batch_size]
+        batch = nb.ipam.prefixes.create(rows)
+        if not bulk:
+            for row, record in zip(rows, batch):
+                cache_events.publish_created("prefix", row["prefix"], record)
+        created += batch
+        logger.info(f"created {len(created)} of {len(todo)} prefixes")
+    if bulk and created:
+        cache_events.publish_invalidated("prefix")
+    return created
+
+
 def delete_ip_prefix(nb, prefix) -> bool:
     """delete a netbox prefix"""
     try:
         prefix_to_delete = nb.ipam.prefixes.get(prefix=prefix)
         if prefix_to_delete is not None:
             prefix_to_delete.delete()
+            cache_events.publish_deleted("prefix", prefix, prefix_to_delete.id)
             return True
         raise Exception("Prefix not found")
     except Exception as e:
@@ -317,6 +455,7 @@ def create_netbox_device(
             role=get_device_role_id(nb, device_role),
             site=get_site_id(nb, site),
         )
+        cache_events.publish_created("device", device_name, result)
         return result
     except pynetbox.RequestError as e:
         logger.error(e.error)
@@ -332,6 +471,9 @@ def delete_netbox_device(nb, device_name: str) -> bool:
     ndev_device = nb.dcim.devices.get(name=device_name)
     if ndev_device is not None:
         ndev_device.delete()
+        cache_events.publish_deleted("device", device_name, ndev_device.id)
+        # interfaces are deleted with the device
+        cache_events.publish_deleted("interface", None)
         return True
     else:
         logger.error(f"device name {device_name} not found")
@@ -356,6 +498,7 @@ def change_ip_status(nb, cidr: str, status: str) -> bool:
         response = nb.ipam.ip_addresses.get(address=cidr)
         response.status = status.lower()
         response.save()
+        cache_events.publish_updated("ip_address", cidr, response)
         return True
     except Exception as e:
         logger.error(f"Exception: {e}")
@@ -368,15 +511,18 @@ def change_ip_desc(nb, cidr: str, description: str) -> bool:
         response = nb.ipam.ip_addresses.get(address=cidr)
         response.description = description
         response.save()
+        cache_events.publish_updated("ip_address", cidr, response)
         return True
     except Exception as e:
         logger.error(f"Exception: {e}")
         return False
 
 
-def get_contacts_all(nb):
-    """get all contacts"""
+def get_contacts_all(nb, fields=None):
+    """get all contacts, optionally only the given fields"""
     try:
+        if fields:
+            return iter_all(nb.tenancy.contacts, fields=fields)
         contacts = nb.tenancy.contacts.all()
         return contacts
     except Exception as e:
@@ -387,7 +533,8 @@ def get_contacts_all(nb):
 def add_contact(nb, contact_name: str) -> bool:
     """add a netbox contact"""
     try:
-        nb.tenancy.contacts.create(name=contact_name)
+        contact = nb.tenancy.contacts.create(name=contact_name)
+        cache_events.publish_created("contact", contact_name, contact)
         return True
     except Exception as e:
         logger.error(f"exception: {e}")
@@ -409,7 +556,7 @@ def delete_contact(nb, contact_name: str) -> bool:
 def show_all_contacts(nb) -> bool:
     """show all netbox contacts"""
     try:
-        contacts = get_contacts_all(nb)
+        contacts = get_contacts_all(nb, fields=("display", "name", "title", "tags"))
         for contact in contacts:
             print(f"{contact.name}, {contact.title}, {contact.tags}")
         return True
@@ -426,6 +573,8 @@ def check_asn_exists(nb, asn: int) -> bool:
 def add_asn(nb, asn: int, desc: str) -> bool:
     """Add an ASN for RIR=1 ARIN"""
     rv = nb.ipam.asns.create(asn=asn, rir=1, description=desc)
+    if rv is not None:
+        cache_events.publish_created("asn", asn, rv)
     return rv is not None
 
 
@@ -434,6 +583,7 @@ def delete_asn(nb, asn: int) -> bool:
     asn_ref = nb.ipam.asns.get(asn=asn)
     if asn_ref:
         rv = nb.ipam.asns.delete([asn_ref])
+        cache_events.publish_deleted("asn", asn, asn_ref.id)
         return rv is not None
     return False
 
@@ -464,15 +614,22 @@ def get_all_bgp_communities(nb) -> dict:
 def add_bgp_community(nb, community: str, description: str) -> None:
     """Add a BGP Community"""
     try:
-        nb.plugins.bgp.community.create(value=community, description=description)
+        rv = nb.plugins.bgp.community.create(value=community, description=description)
+        cache_events.publish_created("bgp_community", community, rv)
     except Exception as e:
         logger.error(f"Exception adding BGP Community: {e}")
 
 
-def add_ipv4_ip(nb, cidr: str) -> str:
-    """add an ipv4 IP into netbox"""
+def add_ipv4_ip(nb, cidr: str, existing: set[str] | None = None) -> str:
+    """
+    add an ipv4 IP into netbox
+    pass existing (from check_cidrs_exist_many) to skip the per-IP lookup
+    """
     # check to see if it already exists in netbox
-    result = nb.ipam.ip_addresses.get(address=cidr)
+    if existing is None:
+        result = check_if_cidr_exists(nb, cidr)
+    else:
+        result = cidr in existing
     if result:
         return "IP Exists"
     else:
@@ -494,16 +651,23 @@ def add_ipv4_ip(nb, cidr: str) -> str:
             description=description,
         )
         new_ip = nb.ipam.ip_addresses.create(ip_add_dict)
+        cache_events.publish_created("ip_address", cidr, new_ip)
         if set_reserved_status:
             change_ip_status(nb, cidr, "Reserved")
         return new_ip
 
 
-def add_ipv6_ip(nb, cidr: str) -> str:
-    """add an ipv6 IP into netbox"""
+def add_ipv6_ip(nb, cidr: str, existing: set[str] | None = None) -> str:
+    """
+    add an ipv6 IP into netbox
+    pass existing (from check_cidrs_exist_many) to skip the per-IP lookup
+    """
     # check to see if it already exists in netbox
     try:
-        result = nb.ipam.ip_addresses.get(address=cidr)
+        if existing is None:
+            result = check_if_cidr_exists(nb, cidr)
+        else:
+            result = cidr in existing
         if result:
             return "IP Exists"
         else:
@@ -512,7 +676,85 @@ def add_ipv6_ip(nb, cidr: str) -> str:
                 description="",
             )
             new_ip = nb.ipam.ip_addresses.create(ip_add_dict)
+            cache_events.publish_created("ip_address", cidr, new_ip)
             return new_ip
     except Exception as e:
         logger.error(f"Exception adding IPv6: {e}")
         return "Failed"
+
+
+def build_ipv4_subnet_rows(cidr: str) -> list[dict]:
+    """
+    compute the create payload for every address in an ipv4 subnet
+    the network and broadcast addresses are created reserved, as add_ipv4_ip does
+    """
+    net: IPv4Network = IPv4Interface(cidr).network
+    nm = net.prefixlen
+    if nm >= 31:
+        # /31 point-to-point and /32 host routes have no network/broadcast
+        return [{"address": f"{host}/{nm}", "description": ""} for host in net]
+
+    rows = [
+        {"address": f"{net.network_address}/{nm}", "description": "Subnet"},
+        {"address": f"{net.broadcast_address}/{nm}", "description": "Broadcast"},
+    ]
+    for row in rows:
+        row["status"] = "reserved"
+    rows += [{"address": f"{host}/{nm}", "description": ""} for host in net.hosts()]
+    return rows
+
+
+def bulk_add_ipv4_subnet(
+    nb, cidr: str, batch_size: int = 250, progress=None
+) -> dict:
+    """
+    add every address of an ipv4 subnet using list POSTs
+    addresses whose host already exists in netbox (with any mask) are skipped,
+    found with one parent= filtered read; status and description go in the
+    create payload so no follow-up PATCH is needed
+    progress, if given, is called as progress(batch_number, total_batches, result)
+    returns a dict of created/skipped counts and the rows that failed
+    """
+    net: IPv4Network = IPv4Interface(cidr).network
+    rows = build_ipv4_subnet_rows(cidr)
+
+    existing_hosts = {
+        ip_interface(str(ip.address)).ip
+        for ip in nb.ipam.ip_addresses.filter(parent=str(net))
+    }
+    todo = [r for r in rows if ip_interface(r["address"]).ip not in existing_hosts]
+
+    result = {"created": 0, "skipped": len(rows) - len(todo), "failed": []}
+    # one invalidation for a bulk write rather than an event per address, so
+    # resolvers keep their working set
+    bulk = len(todo) > cache_events.BULK_THRESHOLD
+    batches = [todo[i : i + batch_size] for i in range(0, len(todo), batch_size)]
+    for number, batch in enumerate(batches, start=1):
+        try:
+            records = nb.ipam.ip_addresses.create(batch)
+            if not bulk:
+                for row, record in zip(batch, records or []):
+                    cache_events.publish_created("ip_address", row["address"], record)
+            result["created"] += len(batch)
+        except pynetbox.RequestError as e:
+            # netbox bulk creates are atomic; retry row by row to isolate bad rows
+            logger.error(f"batch {number} failed, retrying rows individually: {e}")
+            for row in batch:
+                try:
+                    record = nb.ipam.ip_addresses.create(row)
+                    if not bulk:
+                        cache_events.publish_created(
+                            "ip_address", row["address"], record
+                        )
+                    result["created"] += 1
+                except pynetbox.RequestError as row_error:
+                    result["failed"].append({**row, "error": str(row_error)})
+        logger.info(
+            f"batch {number}/{len(batches)}: created {result['created']}, "
+            f"failed {len(result['failed'])}"
+        )
+        if progress:
+            progress(number, len(batches), result)
+    if bulk and result["created"]:
+        cache_events.publish_invalidated("ip_address")
+    return result
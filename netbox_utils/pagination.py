@@ -0,0 +1,106 @@
+"""Parallel, order-preserving page fetcher for large NetBox list endpoints."""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Iterator
+
+from loguru import logger
+from pynetbox import RequestError
+
+from .connection import DEFAULT_POOL_SIZE
+
+DEFAULT_PAGE_SIZE: int = 1000
+DEFAULT_WORKERS: int = min(8, DEFAULT_POOL_SIZE)
+# always projected so records keep their identity and can lazily load the rest
+BASE_FIELDS: tuple[str, ...] = ("id", "url")
+
+
+def projection_params(fields=None, brief: bool = False) -> dict:
+    """
+    Build the query parameters asking NetBox for a reduced representation.
+
+    ``fields`` (NetBox 4.0+) returns only the named fields; ``brief`` returns
+    the minimal nested representation. Servers that do not know ``fields``
+    ignore it and return full objects.
+    """
+    params = {}
+    if fields:
+        wanted = list(BASE_FIELDS) + [f for f in fields if f not in BASE_FIELDS]
+        params["fields"] = ",".join(wanted)
+    if brief:
+        params["brief"] = 1
+    return params
+
+
+def fetch_page(endpoint, offset: int, page_size: int, **filters) -> tuple[list, int]:
+    """
+    Fetch one page of a pynetbox endpoint.
+
+    Returns:
+        tuple: (records on the page, total count reported by NetBox)
+    """
+    recordset = endpoint.filter(limit=page_size, offset=offset, **filters)
+    records = list(recordset)
+    return records, len(recordset)
+
+
+def iter_all(
+    endpoint,
+    workers: int = DEFAULT_WORKERS,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    fields=None,
+    brief: bool = False,
+    **filters,
+) -> Iterator:
+    """
+    Yield every record of a pynetbox endpoint, fetching pages concurrently.
+
+    The first page supplies the total count, then the remaining offsets are
+    fetched by ``workers`` threads. At most ``workers * 2`` pages are held in
+    memory and records are yielded in server order.
+
+    Args:
+        endpoint: A pynetbox Endpoint, e.g. nb.ipam.ip_addresses.
+        workers (int): Number of concurrent page requests.
+        page_size (int): Records per page (NetBox MAX_PAGE_SIZE caps this).
+        fields (list): Only request these fields (plus id and url).
+        brief (bool): Request the brief representation.
+        **filters: Filters passed to every page request.
+
+    Returns:
+        Iterator: pynetbox Records in order.
+    """
+    projection = projection_params(fields, brief)
+    try:
+        records, count = fetch_page(endpoint, 0, page_size, **filters, **projection)
+        filters = {**filters, **projection}
+    except RequestError as e:
+        if not projection or e.req.status_code != 400:
+            raise
+        logger.warning(f"{endpoint.url} rejected {projection}, fetching full objects")
+        records, count = fetch_page(endpoint, 0, page_size, **filters)
+    yield from records
+    if not records or len(records) >= count:
+        return
+
+    # NetBox may cap the page size below what we asked for
+    page_size = len(records)
+    offsets = iter(range(page_size, count, page_size))
+    window = workers * 2
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending: deque = deque(
+            pool.submit(fetch_page, endpoint, offset, page_size, **filters)
+            for offset in islice(offsets, window)
+        )
+        try:
+            while pending:
+                records, _ = pending.popleft().result()
+                for offset in islice(offsets, 1):
+                    pending.append(
+                        pool.submit(fetch_page, endpoint, offset, page_size, **filters)
+                    )
+                yield from records
+        finally:
+            for future in pending:
+                future.cancel()
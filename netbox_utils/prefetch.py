@@ -0,0 +1,85 @@
+"""Named profiles that bulk-load rarely changing reference data into a resolver."""
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable
+
+from loguru import logger
+
+from .pagination import iter_all
+from .resolver_cache import ResolverCache
+
+# reference data is kept current by cache events, so it can live longer
+DEFAULT_PREFETCH_TTL: float = 3600.0
+
+
+@dataclass(frozen=True)
+class ReferenceTable:
+    """A resolver kind and the list endpoint and field that fill it."""
+
+    kind: str
+    endpoint: str
+    key_field: str = "name"
+
+    def endpoint_for(self, nb):
+        app, name = self.endpoint.split(".")
+        return getattr(getattr(nb, app), name)
+
+
+# keyed like the NetboxClient lookups, e.g. device types by model
+REFERENCE_TABLES: dict[str, ReferenceTable] = {
+    t.kind: t
+    for t in (
+        ReferenceTable("site", "dcim.sites"),
+        ReferenceTable("role", "dcim.device_roles"),
+        ReferenceTable("device_type", "dcim.device_types", "model"),
+        ReferenceTable("manufacturer", "dcim.manufacturers"),
+        ReferenceTable("rir", "ipam.rirs"),
+        ReferenceTable("asn", "ipam.asns", "asn"),
+        ReferenceTable("vlan_group", "ipam.vlan_groups"),
+    )
+}
+PROFILES: dict[str, tuple[str, ...]] = {
+    "provisioning": ("site", "role", "device_type", "manufacturer", "rir", "asn"),
+    "bgp": ("site", "asn"),
+    "vlans": ("site", "vlan_group"),
+}
+
+
+def prefetch(
+    nb,
+    resolver: ResolverCache,
+    tables: Iterable[str],
+    ttl: float = DEFAULT_PREFETCH_TTL,
+) -> dict[str, int]:
+    """
+    Load reference tables with projected list calls and seed the resolver.
+
+    Args:
+        nb: A pynetbox API handle.
+        resolver (ResolverCache): The cache the lookups read from.
+        tables (Iterable): Resolver kinds from REFERENCE_TABLES.
+        ttl (float): Seconds the seeded entries stay valid.
+
+    Returns:
+        dict: kind -> number of entries seeded.
+    """
+    wanted = [REFERENCE_TABLES[kind] for kind in tables]
+
+    def load(table: ReferenceTable) -> list[tuple]:
+        records = iter_all(table.endpoint_for(nb), fields=(table.key_field,))
+        return [(getattr(r, table.key_field), r.id) for r in records]
+
+    counts = {}
+    with ThreadPoolExecutor(max_workers=max(1, len(wanted))) as pool:
+        for table, rows in zip(wanted, pool.map(load, wanted)):
+            for key, id in rows:
+                resolver.set(table.kind, key, id, ttl=ttl)
+            counts[table.kind] = len(rows)
+    total = sum(counts.values())
+    if total > resolver.maxsize:
+        logger.warning(
+            f"prefetched {total} entries into a resolver holding {resolver.maxsize}"
+        )
+    logger.info(f"prefetched {counts}")
+    return counts
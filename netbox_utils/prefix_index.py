@@ -0,0 +1,309 @@
+"""Binary radix trie of NetBox prefixes for local longest-prefix match."""
+
+import ipaddress
+import socket
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+
+from .netboxlib import get_all_ip_prefixes
+
+BITS: dict[int, int] = {4: 32, 6: 128}
+# pass as vrf to search every VRF and return the most specific match
+ANY_VRF = object()
+
+
+@dataclass(frozen=True)
+class PrefixEntry:
+    """One indexed NetBox prefix; vrf None is the global table."""
+
+    prefix: str
+    vrf: str | None = None
+    id: int | None = None
+    length: int = 0
+
+
+class _Node:
+    __slots__ = ("network", "length", "entry", "children")
+
+    def __init__(self, network: int, length: int, entry: PrefixEntry | None = None):
+        self.network = network
+        self.length = length
+        self.entry = entry
+        self.children: list = [None, None]
+
+
+def _bit(value: int, position: int, bits: int) -> int:
+    """the bit after the first ``position`` bits of value"""
+    return (value >> (bits - position - 1)) & 1
+
+
+def _contains(node: _Node, value: int, bits: int) -> bool:
+    shift = bits - node.length
+    return (value >> shift) == (node.network >> shift)
+
+
+def _common_length(a: int, b: int, limit: int, bits: int) -> int:
+    """length of the common leading bits of a and b, at most limit"""
+    diff = (a ^ b) >> (bits - limit) if limit else 0
+    return limit - diff.bit_length()
+
+
+def parse_address(address) -> tuple[int, int]:
+    """(version, integer) of an address string, optionally with a /mask"""
+    text = str(address).split("/", 1)[0]
+    try:
+        return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, text), "big")
+    except OSError:
+        pass
+    try:
+        return 6, int.from_bytes(socket.inet_pton(socket.AF_INET6, text), "big")
+    except OSError:
+        raise ValueError(f"{address!r} is not an IP address") from None
+
+
+class RadixTrie:
+    """A path-compressed binary trie of integer prefixes of one address family."""
+
+    def __init__(self, bits: int):
+        self.bits = bits
+        self.root = _Node(0, 0)
+        self.size = 0
+
+    def insert(self, network: int, length: int, entry: PrefixEntry) -> None:
+        """Add or replace the entry for network/length."""
+        bits = self.bits
+        node = self.root
+        while True:
+            if node.length == length:
+                if node.entry is None:
+                    self.size += 1
+                node.entry = entry
+                return
+            branch = _bit(network, node.length, bits)
+            child = node.children[branch]
+            if child is None:
+                node.children[branch] = _Node(network, length, entry)
+                self.size += 1
+                return
+            common = _common_length(
+                child.network, network, min(child.length, length), bits
+            )
+            if common == child.length:
+                node = child
+                continue
+            # the new prefix and the child diverge (or it covers the child)
+            mask = ((1 << common) - 1) << (bits - common)
+            split = _Node(network & mask, common)
+            split.children[_bit(child.network, common, bits)] = child
+            if common == length:
+                split.entry = entry
+            else:
+                split.children[_bit(network, common, bits)] = _Node(
+                    network, length, entry
+                )
+            node.children[branch] = split
+            self.size += 1
+            return
+
+    def delete(self, network: int, length: int) -> PrefixEntry | None:
+        """Remove network/length; returns the removed entry or None."""
+        path = []
+        node = self.root
+        while node is not None and node.length < length:
+            if not _contains(node, network, self.bits):
+                return None
+            path.append(node)
+            node = node.children[_bit(network, node.length, self.bits)]
+        if (
+            node is None
+            or node.length != length
+            or node.network != network
+            or node.entry is None
+        ):
+            return None
+        entry, node.entry = node.entry, None
+        self.size -= 1
+        # splice out nodes that no longer hold an entry or a branch
+        while path and node.entry is None:
+            parent = path.pop()
+            kids = [c for c in node.children if c is not None]
+            if len(kids) > 1:
+                break
+            slot = parent.children.index(node)
+            parent.children[slot] = kids[0] if kids else None
+            node = parent
+        return entry
+
+    def longest(self, value: int) -> PrefixEntry | None:
+        bits = self.bits
+        node = self.root
+        best = None
+        while node is not None and _contains(node, value, bits):
+            if node.entry is not None:
+                best = node.entry
+            if node.length == bits:
+                break
+            node = node.children[_bit(value, node.length, bits)]
+        return best
+
+    def covering(self, network: int, length: int) -> list[PrefixEntry]:
+        """entries containing network/length, least specific first"""
+        bits = self.bits
+        node = self.root
+        found = []
+        while node is not None and node.length <= length:
+            if not _contains(node, network, bits):
+                break
+            if node.entry is not None:
+                found.append(node.entry)
+            if node.length == length:
+                break
+            node = node.children[_bit(network, node.length, bits)]
+        return found
+
+    def covered(self, network: int, length: int) -> Iterator[PrefixEntry]:
+        """entries inside network/length, in address order"""
+        bits = self.bits
+        node = self.root
+        while node is not None and node.length < length:
+            node = node.children[_bit(network, node.length, bits)]
+        shift = bits - length
+        if node is None or (node.network >> shift) != (network >> shift):
+            return
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.entry is not None:
+                yield node.entry
+            stack.extend(c for c in reversed(node.children) if c is not None)
+
+
+def _field(record, name: str):
+    if isinstance(record, dict):
+        return record.get(name)
+    return getattr(record, name, None)
+
+
+def _vrf_name(vrf) -> str | None:
+    if vrf is None:
+        return None
+    if isinstance(vrf, str):
+        return vrf
+    return _field(vrf, "name")
+
+
+class PrefixIndex:
+    """Longest-prefix match over NetBox prefixes, one trie per VRF and family.
+
+    Built once from prefix records, then queried locally: ``lookup`` answers
+    "which prefix/VRF contains this address" without touching the API.
+    """
+
+    def __init__(self):
+        self._tries: dict[tuple, RadixTrie] = {}
+
+    @classmethod
+    def from_prefixes(cls, prefixes: Iterable) -> "PrefixIndex":
+        """Index pynetbox prefix records (or dicts with prefix, vrf and id)."""
+        index = cls()
+        for record in prefixes:
+            index.insert(
+                str(_field(record, "prefix")),
+                _vrf_name(_field(record, "vrf")),
+                _field(record, "id"),
+            )
+        return index
+
+    def _trie(self, vrf: str | None, version: int, create: bool = False):
+        trie = self._tries.get((vrf, version))
+        if trie is None and create:
+            trie = self._tries[(vrf, version)] = RadixTrie(BITS[version])
+        return trie
+
+    def _tries_for(self, vrf, version: int) -> list[RadixTrie]:
+        if vrf is ANY_VRF:
+            return [t for (_, v), t in self._tries.items() if v == version]
+        trie = self._trie(vrf, version)
+        return [trie] if trie is not None else []
+
+    def insert(self, prefix: str, vrf: str | None = None, id: int | None = None):
+        """Add (or replace) one prefix."""
+        network = ipaddress.ip_network(prefix, strict=False)
+        entry = PrefixEntry(str(network), vrf, id, network.prefixlen)
+        self._trie(vrf, network.version, create=True).insert(
+            int(network.network_address), network.prefixlen, entry
+        )
+        return entry
+
+    def delete(self, prefix: str, vrf: str | None = None) -> PrefixEntry | None:
+        """Remove one prefix; returns the removed entry or None."""
+        network = ipaddress.ip_network(prefix, strict=False)
+        trie = self._trie(vrf, network.version)
+        if trie is None:
+            return None
+        return trie.delete(int(network.network_address), network.prefixlen)
+
+    def _best(self, tries: list[RadixTrie], value: int) -> PrefixEntry | None:
+        best = None
+        for trie in tries:
+            entry = trie.longest(value)
+            if entry is not None and (best is None or entry.length > best.length):
+                best = entry
+        return best
+
+    def lookup(self, address, vrf=ANY_VRF) -> PrefixEntry | None:
+        """
+        The most specific prefix containing an address.
+
+        Args:
+            address: An address string ("10.1.2.3", a /mask is ignored).
+            vrf: A VRF name, None for the global table, or ANY_VRF (default).
+        """
+        version, value = parse_address(address)
+        return self._best(self._tries_for(vrf, version), value)
+
+    def lookup_many(
+        self, addresses: Iterable, vrf=ANY_VRF, version: int | None = None
+    ) -> list[PrefixEntry | None]:
+        """
+        Longest match for many addresses, in input order.
+
+        Addresses may be strings or integers; integers need ``version``.
+        Repeated addresses, common in log feeds, are looked up once.
+        """
+        tries = {v: self._tries_for(vrf, v) for v in BITS}
+        seen: dict = {}
+        results = []
+        for address in addresses:
+            if address not in seen:
+                if isinstance(address, str):
+                    family, value = parse_address(address)
+                else:
+                    family, value = version or 4, int(address)
+                seen[address] = self._best(tries[family], value)
+            results.append(seen[address])
+        return results
+
+    def covering(self, prefix: str, vrf=ANY_VRF) -> list[PrefixEntry]:
+        """Every prefix containing prefix (itself included), least specific first."""
+        network = ipaddress.ip_network(prefix, strict=False)
+        found = []
+        for trie in self._tries_for(vrf, network.version):
+            found += trie.covering(int(network.network_address), network.prefixlen)
+        return sorted(found, key=lambda e: e.length)
+
+    def covered(self, prefix: str, vrf=ANY_VRF) -> list[PrefixEntry]:
+        """Every prefix inside prefix (itself included)."""
+        network = ipaddress.ip_network(prefix, strict=False)
+        found = []
+        for trie in self._tries_for(vrf, network.version):
+            found += trie.covered(int(network.network_address), network.prefixlen)
+        return found
+
+    def __len__(self) -> int:
+        return sum(trie.size for trie in self._tries.values())
+
+
+def build_prefix_index(nb) -> PrefixIndex:
+    """Download every prefix once (projected) and index it."""
+    return PrefixIndex.from_prefixes(get_all_ip_prefixes(nb, fields=("prefix", "vrf")))
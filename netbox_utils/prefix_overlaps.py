@@ -0,0 +1,122 @@
+"""Find duplicate, nested and shadowed prefixes with one sorted sweep per VRF."""
+
+import ipaddress
+from dataclasses import dataclass
+from itertools import groupby
+from typing import Iterable, Iterator
+
+DUPLICATE = "duplicate"
+# allocated inside another prefix that is not a container
+NESTED = "nested"
+# every address is covered by more specific children
+SHADOWED = "shadowed"
+
+
+@dataclass(frozen=True)
+class PrefixConflict:
+    """One finding; ``other`` is the duplicated or enclosing prefix."""
+
+    kind: str
+    vrf: str | None
+    prefix: str
+    id: int | None
+    other: str | None = None
+    other_id: int | None = None
+
+    def __str__(self) -> str:
+        vrf = self.vrf or "global"
+        if self.kind == SHADOWED:
+            return f"{self.kind:<9} {vrf:<12} {self.prefix} fully covered by children"
+        relation = "of" if self.kind == DUPLICATE else "in"
+        return (
+            f"{self.kind:<9} {vrf:<12} {self.prefix} (id {self.id}) "
+            f"{relation} {self.other} (id {self.other_id})"
+        )
+
+
+def _field(record, name: str):
+    if isinstance(record, dict):
+        return record.get(name)
+    return getattr(record, name, None)
+
+
+def _text(value, key: str) -> str | None:
+    """a nested object's key (API records) or the plain value (mirror rows)"""
+    if value is None or isinstance(value, str):
+        return value
+    return _field(value, key)
+
+
+def prefix_spans(prefixes: Iterable) -> list[tuple]:
+    """
+    Convert prefix records to sortable integer spans.
+
+    Accepts pynetbox records, API dicts or inventory mirror rows. Each span is
+    (vrf, version, start, -end, prefix, id, is_container) so a plain sort puts
+    every parent before its children.
+    """
+    spans = []
+    for record in prefixes:
+        network = ipaddress.ip_network(str(_field(record, "prefix")), strict=False)
+        start = int(network.network_address)
+        spans.append(
+            (
+                _text(_field(record, "vrf"), "name") or "",
+                network.version,
+                start,
+                -(start + network.num_addresses - 1),
+                str(network),
+                _field(record, "id"),
+                _text(_field(record, "status"), "value") == "container",
+            )
+        )
+    return spans
+
+
+def _sweep(vrf: str | None, spans: Iterable[tuple]) -> Iterator[PrefixConflict]:
+    """one VRF and family, sorted: a stack holds the chain of open parents"""
+    # frames: [span, next address not yet covered by direct children or None]
+    stack: list[list] = []
+
+    def close(frame) -> Iterator[PrefixConflict]:
+        span, uncovered = frame
+        if uncovered is not None and uncovered == -span[3] + 1:
+            yield PrefixConflict(SHADOWED, vrf, span[4], span[5])
+
+    for span in spans:
+        start, end = span[2], -span[3]
+        while stack and -stack[-1][0][3] < start:
+            yield from close(stack.pop())
+        if stack:
+            parent = stack[-1][0]
+            if parent[2] == start and -parent[3] == end:
+                yield PrefixConflict(
+                    DUPLICATE, vrf, span[4], span[5], parent[4], parent[5]
+                )
+                continue
+            if not parent[6]:
+                yield PrefixConflict(
+                    NESTED, vrf, span[4], span[5], parent[4], parent[5]
+                )
+            frame = stack[-1]
+            if frame[1] is not None:
+                frame[1] = end + 1 if frame[1] == start else None
+        # the first direct child must start where the parent starts
+        stack.append([span, start])
+    while stack:
+        yield from close(stack.pop())
+
+
+def find_prefix_conflicts(prefixes: Iterable) -> Iterator[PrefixConflict]:
+    """
+    Yield duplicate, nested and shadowed prefixes, VRF by VRF.
+
+    CIDR blocks either nest or are disjoint, so overlapping allocations show
+    up as NESTED: a prefix inside a parent whose status is not container.
+    One sort (O(n log n)) plus a single linear sweep; findings are yielded as
+    soon as they are known.
+    """
+    spans = prefix_spans(prefixes)
+    spans.sort(key=lambda s: s[:5])
+    for (vrf, _), group in groupby(spans, key=lambda s: (s[0], s[1])):
+        yield from _sweep(vrf or None, group)
@@ -0,0 +1,82 @@
+"""Utilization of every prefix, computed locally from one download of IPAM."""
+
+import csv
+import json
+from dataclasses import asdict, dataclass, fields
+from typing import Iterable, TextIO
+
+from .ip_analytics import IpamArrays, unpack_addresses
+
+
+@dataclass(frozen=True)
+class PrefixUsage:
+    """One report row; a container's ``used`` counts child prefix addresses."""
+
+    prefix: str
+    vrf: str | None
+    id: int | None
+    container: bool
+    used: int
+    size: int
+    percent: float
+
+
+def prefix_utilization(
+    addresses: Iterable, prefixes: Iterable, min_percent: float = 0.0
+) -> list[PrefixUsage]:
+    """
+    Used/total/percent for every prefix, fullest first.
+
+    Records may be pynetbox records, API dicts or inventory mirror rows.
+    Addresses and child prefixes only count inside their own VRF.
+
+    Args:
+        addresses (Iterable): IP address records (address, vrf).
+        prefixes (Iterable): Prefix records (prefix, vrf, status, is_pool).
+        min_percent (float): Leave out prefixes used less than this.
+    """
+    report = []
+    for version, arrays in IpamArrays.from_records(addresses, prefixes).items():
+        used, size, percent = arrays.utilization()
+        keep = percent >= min_percent
+        starts = unpack_addresses(arrays.starts[keep], version)
+        report += [
+            PrefixUsage(
+                f"{start}/{length}",
+                arrays.vrf_names[vrf],
+                id or None,
+                container,
+                int(u),
+                int(s),
+                round(float(p), 2),
+            )
+            for start, length, vrf, id, container, u, s, p in zip(
+                starts,
+                arrays.lengths[keep].tolist(),
+                arrays.prefix_vrfs[keep].tolist(),
+                arrays.prefix_ids[keep].tolist(),
+                arrays.containers[keep].tolist(),
+                used[keep].tolist(),
+                size[keep].tolist(),
+                percent[keep].tolist(),
+            )
+        ]
+    report.sort(key=lambda r: (-r.percent, -r.used, r.prefix))
+    return report
+
+
+def write_utilization(
+    report: Iterable[PrefixUsage], stream: TextIO, fmt: str = "csv"
+) -> None:
+    """Write report rows to a text stream as "csv" or "json"."""
+    if fmt == "json":
+        json.dump([asdict(row) for row in report], stream, indent=2)
+        stream.write("\n")
+    elif fmt == "csv":
+        writer = csv.DictWriter(
+            stream, fieldnames=[f.name for f in fields(PrefixUsage)]
+        )
+        writer.writeheader()
+        writer.writerows(asdict(row) for row in report)
+    else:
+        raise ValueError(f"unknown report format {fmt!r}")
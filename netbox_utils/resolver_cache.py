@@ -0,0 +1,170 @@
+"""A memoizing name-to-ID cache used by NetboxClient for reference lookups."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+from .cache_events import CREATED, DELETED, INVALIDATED, UPDATED
+from .singleflight import SingleFlight
+
+# Sentinel distinguishing "not cached" from a cached negative (None) result
+MISSING = object()
+# kinds the NetboxClient lookups resolve; created/updated events of any
+# other kind (prefixes, contacts, ...) are not stored
+RESOLVER_KINDS: frozenset = frozenset(
+    {
+        "site",
+        "device",
+        "role",
+        "device_type",
+        "manufacturer",
+        "rir",
+        "interface",
+        "ip_address",
+        "asn",
+        "vlan_group",
+        "vlan",
+    }
+)
+
+
+class ResolverCache:
+    """A TTL + LRU cache of name -> ID lookups keyed by (kind, key).
+
+    Misses (loaders returning None) are cached for ``negative_ttl`` seconds so
+    repeated lookups of an unknown name do not hit NetBox each time. Threads
+    missing on the same key at once share a single loader call.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 300.0,
+        negative_ttl: float = 30.0,
+        maxsize: int = 4096,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl (float): Seconds a resolved ID stays valid (default: 300).
+            negative_ttl (float): Seconds a miss stays cached (default: 30).
+            maxsize (int): Maximum number of entries before LRU eviction.
+            clock (Callable): Monotonic time source, overridable for tests.
+        """
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.maxsize = maxsize
+        self._clock = clock
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.evictions = 0
+
+    def get(self, kind: str, key: Hashable) -> Any:
+        """Return the cached value for (kind, key) or MISSING."""
+        with self._lock:
+            entry = self._entries.get((kind, key))
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            value, expires = entry
+            if expires <= self._clock():
+                del self._entries[(kind, key)]
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end((kind, key))
+            if value is None:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return value
+
+    def set(
+        self, kind: str, key: Hashable, value: Any, ttl: float | None = None
+    ) -> None:
+        """Store a value; None is stored as a negative entry."""
+        if ttl is None:
+            ttl = self.negative_ttl if value is None else self.ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[(kind, key)] = (value, self._clock() + ttl)
+            self._entries.move_to_end((kind, key))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def resolve(self, kind: str, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return the cached value for (kind, key), calling loader on a miss."""
+        value = self.get(kind, key)
+        if value is not MISSING:
+            return value
+
+        def load():
+            value = loader()
+            self.set(kind, key, value)
+            return value
+
+        return self._flights.do((kind, key), load)
+
+    def invalidate(self, kind: str | None = None, key: Hashable = MISSING) -> int:
+        """
+        Drop cached entries.
+
+        With no arguments the whole cache is cleared; with only ``kind`` every
+        entry of that kind is dropped; with both only that entry is dropped.
+
+        Returns:
+            int: Number of entries removed.
+        """
+        with self._lock:
+            if kind is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            if key is not MISSING:
+                return 1 if self._entries.pop((kind, key), MISSING) is not MISSING else 0
+            doomed = [k for k in self._entries if k[0] == kind]
+            for k in doomed:
+                del self._entries[k]
+            return len(doomed)
+
+    def apply(self, event) -> None:
+        """
+        Apply a cache_events.CacheEvent published by a mutating helper.
+
+        Created and updated objects of the RESOLVER_KINDS are stored directly
+        so the follow-up lookup is free; deleted and invalidated ones are
+        dropped (the whole kind if no key).
+        """
+        if event.action in (DELETED, INVALIDATED):
+            if event.key is None:
+                self.invalidate(event.kind)
+            else:
+                self.invalidate(event.kind, event.key)
+        elif (
+            event.action in (CREATED, UPDATED)
+            and event.kind in RESOLVER_KINDS
+            and event.id is not None
+        ):
+            self.set(event.kind, event.key, event.id)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stats(self) -> dict:
+        """Hit/miss counters, useful for proving the API call count dropped."""
+        return {
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "coalesced": self._flights.shared,
+            "size": len(self._entries),
+        }
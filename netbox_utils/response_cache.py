@@ -0,0 +1,172 @@
+"""An opt-in on-disk cache of NetBox GET responses for read-only scripts."""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from os import getenv
+from typing import Callable
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+DEFAULT_CACHE_PATH: str = getenv(
+    "NETBOX_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "netbox_utils", "responses.db"),
+)
+DEFAULT_TTL: float = 300.0
+DEFAULT_MAX_BYTES: int = 256 * 1024 * 1024
+# seconds a response stays fresh, by API path; the longest match wins
+DEFAULT_TTLS: dict[str, float] = {
+    "/api/status/": 30,
+    "/api/dcim/interfaces/": 120,
+    "/api/dcim/": 600,
+    "/api/circuits/": 600,
+    "/api/ipam/": 300,
+    "/api/extras/": 3600,
+}
+
+
+def normalize_url(url: str) -> str:
+    """the URL with its query parameters sorted, so equal queries share a key"""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, query, ""))
+
+
+class ResponseCache:
+    """A SQLite-backed, size-capped LRU cache of HTTP responses.
+
+    Entries are keyed by method, normalized URL and a hash of the credentials
+    so one token's results are never served to another.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        default_ttl: float = DEFAULT_TTL,
+        ttls: dict[str, float] | None = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Open (and create if needed) the cache file.
+
+        Args:
+            path (str): SQLite file path, ":memory:" for a throwaway cache.
+            default_ttl (float): Seconds a response stays fresh when no ttl matches.
+            ttls (dict): API path prefix -> ttl seconds (default: DEFAULT_TTLS).
+            max_bytes (int): Stored body size cap before LRU eviction.
+            clock (Callable): Wall-clock time source, overridable for tests.
+        """
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.default_ttl = default_ttl
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, url TEXT, status INTEGER, headers TEXT, "
+                "body BLOB, size INTEGER, expires REAL, last_access REAL)"
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_responses_last_access "
+                "ON responses (last_access)"
+            )
+
+    def close(self) -> None:
+        self.conn.close()
+
+    @staticmethod
+    def key(method: str, url: str, auth: str = "") -> str:
+        digest = hashlib.sha256()
+        for part in (method.upper(), normalize_url(url), auth or ""):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def ttl_for(self, url: str) -> float:
+        """the ttl of the longest configured path prefix found in the URL"""
+        path = urlsplit(url).path
+        matches = [prefix for prefix in self.ttls if prefix in path]
+        if not matches:
+            return self.default_ttl
+        return self.ttls[max(matches, key=len)]
+
+    def get(self, key: str) -> tuple[int, dict, bytes] | None:
+        """Return (status, headers, body) for a fresh entry, else None."""
+        now = self._clock()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT status, headers, body, expires FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None or row[3] <= now:
+                self.misses += 1
+                return None
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE responses SET last_access = ? WHERE key = ?", (now, key)
+                )
+            self.hits += 1
+        return row[0], json.loads(row[1]), zlib.decompress(row[2])
+
+    def set(self, key: str, url: str, status: int, headers: dict, body: bytes) -> None:
+        """Store a response if its URL has a positive ttl, evicting LRU entries."""
+        ttl = self.ttl_for(url)
+        if ttl <= 0:
+            return
+        now = self._clock()
+        blob = zlib.compress(body, 1)
+        header_text = json.dumps(dict(headers))
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, status, header_text, blob, len(blob), now + ttl, now),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses")
+        excess = total.fetchone()[0] - self.max_bytes
+        if excess <= 0:
+            return
+        freed = 0
+        victims = []
+        for key, size in self.conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_access"
+        ):
+            if freed >= excess:
+                break
+            victims.append((key,))
+            freed += size
+        self.conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+
+    def invalidate(self, url_prefix: str | None = None) -> int:
+        """Drop entries whose URL starts with url_prefix (all entries if None)."""
+        with self._lock, self.conn:
+            if url_prefix is None:
+                cursor = self.conn.execute("DELETE FROM responses")
+            else:
+                cursor = self.conn.execute(
+                    "DELETE FROM responses WHERE substr(url, 1, ?) = ?",
+                    (len(url_prefix), url_prefix),
+                )
+            return cursor.rowcount
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    @property
+    def size(self) -> int:
+        """stored (compressed) bytes"""
+        query = "SELECT COALESCE(SUM(size), 0) FROM responses"
+        return self.conn.execute(query).fetchone()[0]
@@ -0,0 +1,423 @@
+"""Compressed offline snapshots of NetBox data, readable like a live connection."""
+
+import ipaddress
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from array import array
+from collections import OrderedDict
+from typing import Iterable, Iterator
+
+from loguru import logger
+from pynetbox import RequestError
+
+from .pagination import iter_all
+
+MAGIC: bytes = b"NBSNAP1\n"
+# records per compressed frame; a frame is the unit read from disk
+DEFAULT_FRAME_SIZE: int = 1000
+DEFAULT_SNAPSHOT_ENDPOINTS: tuple[str, ...] = (
+    "dcim.sites",
+    "dcim.devices",
+    "dcim.interfaces",
+    "ipam.vrfs",
+    "ipam.prefixes",
+    "ipam.ip_addresses",
+    "ipam.vlans",
+    "circuits.circuits",
+    "plugins.bgp.session",
+)
+# returned as plain dicts, like pynetbox does, rather than nested records
+JSON_FIELDS: frozenset = frozenset(
+    {"custom_fields", "local_context_data", "config_context", "data"}
+)
+# filter sets whose matching row numbers are remembered per snapshot
+MAX_CACHED_FILTERS: int = 256
+_FOOTER = struct.Struct("<Q")
+
+
+class SnapshotWriter:
+    """Stream records into a snapshot file, one endpoint after another.
+
+    Records are written as zlib-compressed frames of JSON lines, followed by
+    an index of frame offsets per endpoint. The file is written next to its
+    destination and moved into place on close, so readers never see half of it.
+    """
+
+    def __init__(
+        self, path: str, meta: dict | None = None, frame_size: int = DEFAULT_FRAME_SIZE
+    ):
+        self.path = path
+        self.meta = {"created": time.time(), **(meta or {})}
+        self.frame_size = frame_size
+        self.endpoints: dict[str, dict] = {}
+        self._tmp = f"{path}.tmp"
+        self._file = open(self._tmp, "wb")
+        self._file.write(MAGIC)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+            os.remove(self._tmp)
+
+    def _write_frame(self, section: dict, lines: list[bytes]) -> None:
+        blob = zlib.compress(b"".join(lines), 6)
+        section["frames"].append([self._file.tell(), len(blob), len(lines)])
+        section["count"] += len(lines)
+        self._file.write(blob)
+
+    def write(self, endpoint: str, records: Iterable[dict]) -> int:
+        """
+        Append every record of one endpoint, e.g. "ipam.ip_addresses".
+
+        Returns:
+            int: The number of records written.
+        """
+        section = self.endpoints.setdefault(endpoint, {"count": 0, "frames": []})
+        lines: list[bytes] = []
+        for record in records:
+            lines.append(json.dumps(record, default=str).encode() + b"\n")
+            if len(lines) >= self.frame_size:
+                self._write_frame(section, lines)
+                lines = []
+        if lines:
+            self._write_frame(section, lines)
+        return section["count"]
+
+    def close(self) -> None:
+        index = {"meta": self.meta, "endpoints": self.endpoints}
+        offset = self._file.tell()
+        self._file.write(zlib.compress(json.dumps(index).encode()))
+        self._file.write(_FOOTER.pack(offset) + MAGIC)
+        self._file.close()
+        os.replace(self._tmp, self.path)
+
+
+def export_snapshot(
+    nb,
+    path: str,
+    endpoints: Iterable[str] = DEFAULT_SNAPSHOT_ENDPOINTS,
+    frame_size: int = DEFAULT_FRAME_SIZE,
+) -> dict[str, int]:
+    """
+    Download endpoints with parallel paging and stream them into a snapshot.
+
+    Endpoints the server does not have (e.g. an uninstalled plugin) are skipped.
+
+    Returns:
+        dict: endpoint -> number of records written.
+    """
+    try:
+        meta = {"netbox_version": str(nb.status()["netbox-version"])}
+    except Exception as e:
+        logger.warning(f"snapshot: could not read the NetBox status: {e}")
+        meta = {}
+    counts = {}
+    with SnapshotWriter(path, meta, frame_size) as writer:
+        for name in endpoints:
+            endpoint = nb
+            for part in name.split("."):
+                endpoint = getattr(endpoint, part)
+            try:
+                counts[name] = writer.write(
+                    name, (dict(record) for record in iter_all(endpoint))
+                )
+            except RequestError as e:
+                logger.warning(f"snapshot: skipping {name}: {e}")
+                writer.endpoints.pop(name, None)
+            logger.info(f"snapshot: {name} {counts.get(name, 0)} records")
+    return counts
+
+
+class Snapshot:
+    """A memory-mapped snapshot file; frames are decompressed on demand."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        tail = len(MAGIC) + _FOOTER.size
+        if self._map[: len(MAGIC)] != MAGIC or self._map[-len(MAGIC) :] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a NetBox snapshot")
+        (offset,) = _FOOTER.unpack(self._map[-tail : -len(MAGIC)])
+        index = json.loads(zlib.decompress(self._map[offset:-tail]))
+        self.meta: dict = index["meta"]
+        self.endpoints: dict[str, dict] = index["endpoints"]
+        self._matches: OrderedDict = OrderedDict()
+        self._matches_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def count(self, endpoint: str) -> int:
+        return self.endpoints[endpoint]["count"]
+
+    def rows(self, endpoint: str, skip: int = 0) -> Iterator[dict]:
+        """Yield the endpoint's records as dicts, skipping whole frames cheaply."""
+        for offset, length, count in self.endpoints[endpoint]["frames"]:
+            if skip >= count:
+                skip -= count
+                continue
+            data = zlib.decompress(self._map[offset : offset + length])
+            lines = data.splitlines()
+            for line in lines[skip:]:
+                yield json.loads(line)
+            skip = 0
+
+    def rows_at(self, endpoint: str, numbers: Iterable[int]) -> Iterator[dict]:
+        """Yield the records at ascending row numbers, reading only their frames."""
+        numbers = iter(numbers)
+        wanted = next(numbers, None)
+        first = 0
+        for offset, length, count in self.endpoints[endpoint]["frames"]:
+            if wanted is None:
+                return
+            if wanted < first + count:
+                data = zlib.decompress(self._map[offset : offset + length])
+                lines = data.splitlines()
+                while wanted is not None and wanted < first + count:
+                    yield json.loads(lines[wanted - first])
+                    wanted = next(numbers, None)
+            first += count
+
+    def matches(self, endpoint: str, filters: dict) -> array:
+        """
+        Row numbers of the records matching filters, in order.
+
+        The endpoint is scanned once per filter set; the numbers are kept (as
+        a flat array, for the last MAX_CACHED_FILTERS sets) so len() and every
+        page after the first only read the frames they need. Pages fetched
+        by iter_all's threads wait for the one scan instead of repeating it.
+        """
+        key = (endpoint, _filter_key(filters))
+        with self._matches_lock:
+            if key in self._matches:
+                self._matches.move_to_end(key)
+                return self._matches[key]
+            rows = enumerate(self.rows(endpoint))
+            found = array("Q", (i for i, row in rows if _matches(row, filters)))
+            self._matches[key] = found
+            while len(self._matches) > MAX_CACHED_FILTERS:
+                self._matches.popitem(last=False)
+            return found
+
+
+def _wrap(name: str, value):
+    if name in JSON_FIELDS:
+        return value
+    if isinstance(value, dict):
+        return SnapshotRecord(value)
+    if isinstance(value, list):
+        return [_wrap("", item) for item in value]
+    return value
+
+
+class SnapshotRecord:
+    """Attribute access to a stored object, like a pynetbox Record."""
+
+    __slots__ = ("_values",)
+
+    def __init__(self, values: dict):
+        self._values = values
+
+    def __getattr__(self, name: str):
+        try:
+            return _wrap(name, self._values[name])
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __getitem__(self, key: str):
+        return self._values[key]
+
+    def __iter__(self):
+        return iter(self._values.items())
+
+    def __str__(self) -> str:
+        for field in ("name", "label", "display", "address", "prefix", "cid", "model"):
+            if self._values.get(field) is not None:
+                return str(self._values[field])
+        return str(self._values.get("id", ""))
+
+    def __repr__(self) -> str:
+        return str(self)
+
+    def serialize(self) -> dict:
+        return dict(self._values)
+
+
+def _candidates(value) -> list:
+    """the values a filter may match: nested objects match by value/slug/name/id"""
+    if isinstance(value, dict):
+        return [value.get(k) for k in ("value", "slug", "name", "id") if k in value]
+    if isinstance(value, list):
+        return [c for item in value for c in _candidates(item)]
+    return [value]
+
+
+def _host(address) -> str:
+    return str(ipaddress.ip_interface(address).ip)
+
+
+def _wanted(wanted) -> set[str]:
+    wanted = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+    return {str(w).lower() for w in wanted}
+
+
+def _filter_key(filters: dict) -> tuple:
+    return tuple(sorted((k, frozenset(_wanted(v))) for k, v in filters.items()))
+
+
+def _matches(row: dict, filters: dict) -> bool:
+    for key, wanted in filters.items():
+        wanted = _wanted(wanted)
+        if key in row:
+            value = row[key]
+            if key == "address" and value and not any("/" in w for w in wanted):
+                # like NetBox, a bare address matches any mask
+                value = _host(value)
+            found = _candidates(value)
+        elif key.endswith("_id") and key[:-3] in row:
+            nested = row[key[:-3]]
+            found = [
+                n.get("id")
+                for n in (nested if isinstance(nested, list) else [nested])
+                if n
+            ]
+        else:
+            raise ValueError(f"snapshot cannot filter on {key!r}")
+        if not any(str(f).lower() in wanted for f in found if f is not None):
+            return False
+    return True
+
+
+class SnapshotRecordSet:
+    """The result of all()/filter(); len() is the total match count, like pynetbox."""
+
+    def __init__(self, endpoint: "SnapshotEndpoint", filters: dict, limit=0, offset=0):
+        self.endpoint = endpoint
+        self.filters = filters
+        self.limit = limit
+        self.offset = offset
+        self._count: int | None = None
+
+    def _rows(self) -> Iterator[dict]:
+        snapshot, name = self.endpoint.snapshot, self.endpoint.name
+        if self.filters:
+            numbers = snapshot.matches(name, self.filters)
+            stop = self.offset + self.limit if self.limit else len(numbers)
+            return snapshot.rows_at(name, numbers[self.offset : stop])
+        rows = snapshot.rows(name, skip=self.offset)
+        if self.limit:
+            rows = (row for _, row in zip(range(self.limit), rows))
+        return rows
+
+    def __iter__(self) -> Iterator[SnapshotRecord]:
+        return (SnapshotRecord(row) for row in self._rows())
+
+    def __len__(self) -> int:
+        if self._count is None:
+            if self.filters:
+                self._count = len(
+                    self.endpoint.snapshot.matches(self.endpoint.name, self.filters)
+                )
+            else:
+                self._count = self.endpoint.snapshot.count(self.endpoint.name)
+        return self._count
+
+
+class SnapshotEndpoint:
+    """The read-only subset of a pynetbox Endpoint, served from a snapshot."""
+
+    def __init__(self, snapshot: Snapshot, name: str):
+        self.snapshot = snapshot
+        self.name = name
+        self.url = f"snapshot://{name}"
+
+    @staticmethod
+    def _split(kwargs: dict) -> tuple[dict, int, int]:
+        # projections are ignored: stored records are always complete
+        kwargs = {k: v for k, v in kwargs.items() if k not in ("fields", "brief")}
+        limit = int(kwargs.pop("limit", 0) or 0)
+        offset = int(kwargs.pop("offset", 0) or 0)
+        return kwargs, limit, offset
+
+    def all(self, limit: int = 0, offset: int = 0) -> SnapshotRecordSet:
+        return SnapshotRecordSet(self, {}, limit, offset)
+
+    def filter(self, *args, **kwargs) -> SnapshotRecordSet:
+        if args:
+            kwargs["q"] = args[0]
+        filters, limit, offset = self._split(kwargs)
+        return SnapshotRecordSet(self, filters, limit, offset)
+
+    def get(self, *args, **kwargs) -> SnapshotRecord | None:
+        if args:
+            kwargs["id"] = args[0]
+        filters, _, _ = self._split(kwargs)
+        found = list(SnapshotRecordSet(self, filters, limit=2))
+        if len(found) > 1:
+            raise ValueError(
+                "get() returned more than one result. "
+                "Check that the kwarg(s) passed are valid for this endpoint."
+            )
+        return found[0] if found else None
+
+    def count(self, *args, **kwargs) -> int:
+        return len(self.filter(*args, **kwargs))
+
+
+class _Namespace:
+    def __init__(self, snapshot: Snapshot, prefix: str):
+        self._snapshot = snapshot
+        self._prefix = prefix
+
+    def __getattr__(self, name: str):
+        path = f"{self._prefix}.{name}"
+        if path in self._snapshot.endpoints:
+            return SnapshotEndpoint(self._snapshot, path)
+        if any(e.startswith(f"{path}.") for e in self._snapshot.endpoints):
+            return _Namespace(self._snapshot, path)
+        raise AttributeError(f"snapshot has no {path}")
+
+
+class SnapshotApi:
+    """Stands in for pynetbox.api so read-only scripts can run offline.
+
+    ``nb.dcim.devices.filter(site="x")`` and ``iter_all(nb.ipam.prefixes)``
+    read the snapshot; each object type is only decompressed when iterated.
+    """
+
+    def __init__(self, snapshot: Snapshot):
+        self.snapshot = snapshot
+
+    def __getattr__(self, name: str):
+        return _Namespace(self.snapshot, name)
+
+    @property
+    def version(self) -> str:
+        return ".".join(self.snapshot.meta.get("netbox_version", "").split(".")[:2])
+
+    def status(self) -> dict:
+        return {"netbox-version": self.snapshot.meta.get("netbox_version", "")}
+
+
+def open_snapshot(path: str) -> SnapshotApi:
+    """Open a snapshot file as a read-only stand-in for a pynetbox API handle."""
+    return SnapshotApi(Snapshot(path))
@@ -0,0 +1,320 @@
+"""An embedded HTTP endpoint that applies NetBox webhooks to local caches."""
+
+import hashlib
+import hmac
+import json
+import queue
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Hashable, Iterable
+
+import requests
+from loguru import logger
+
+from . import cache_events
+from .cache_events import CREATED, DELETED, INVALIDATED, UPDATED, CacheEvent
+from .inventory_mirror import TABLES, InventoryMirror
+
+DEFAULT_PORT: int = 8085
+DEFAULT_BATCH_SIZE: int = 1000
+DEFAULT_FLUSH_INTERVAL: float = 0.5
+# batches with more events than this only invalidate resolver entries
+DEFAULT_BULK_THRESHOLD: int = cache_events.BULK_THRESHOLD
+SIGNATURE_HEADER: str = "X-Hook-Signature"
+
+
+def _name(obj) -> str | None:
+    return obj.get("name") if isinstance(obj, dict) else None
+
+
+def _address(obj) -> str | None:
+    return obj.get("address") if isinstance(obj, dict) else None
+
+
+def _complete(key) -> bool:
+    """snapshots hold related objects as ids, so nested key parts may be None"""
+    parts = key if isinstance(key, tuple) else (key,)
+    return None not in parts
+
+
+# object type -> (resolver kind, key built from the webhook's object data);
+# keys match the NetboxClient lookups and the keys mutating helpers publish
+RESOLVER_KEYS: dict[str, tuple[str, Callable[[dict], Hashable]]] = {
+    "dcim.site": ("site", lambda d: d.get("name")),
+    "dcim.device": ("device", lambda d: d.get("name")),
+    "dcim.devicerole": ("role", lambda d: d.get("name")),
+    "dcim.devicetype": ("device_type", lambda d: d.get("model")),
+    "dcim.interface": (
+        "interface",
+        lambda d: (_name(d.get("device")), d.get("name")),
+    ),
+    "ipam.ipaddress": ("ip_address", lambda d: d.get("address")),
+    "ipam.prefix": ("prefix", lambda d: d.get("prefix")),
+    "ipam.asn": ("asn", lambda d: d.get("asn")),
+    "ipam.vlangroup": ("vlan_group", lambda d: d.get("name")),
+    "ipam.vlan": ("vlan", lambda d: (d.get("vid"), _name(d.get("site")))),
+    "netbox_bgp.bgpsession": (
+        "bgp_session",
+        lambda d: (_name(d.get("device")), _address(d.get("remote_address"))),
+    ),
+}
+MIRROR_TABLES: dict[str, str] = {t.object_type: t.name for t in TABLES.values()}
+# payloads from NetBox < 4.0 carry only the model name
+_BY_MODEL: dict[str, str] = {
+    object_type.split(".")[1]: object_type
+    for object_type in (*RESOLVER_KEYS, *MIRROR_TABLES)
+}
+
+
+def object_type_of(payload: dict) -> str | None:
+    """the app_label.model of a webhook payload"""
+    object_type = payload.get("object_type")
+    if object_type:
+        return object_type
+    return _BY_MODEL.get(payload.get("model", ""))
+
+
+def sign(body: bytes, secret: str) -> str:
+    """the HMAC-SHA512 signature NetBox sends in X-Hook-Signature"""
+    return hmac.new(secret.encode(), body, hashlib.sha512).hexdigest()
+
+
+class WebhookReceiver:
+    """Receive NetBox webhooks and batch-apply them to caches.
+
+    Payloads are queued by the HTTP handler and applied by a flusher thread
+    every ``flush_interval`` seconds or ``batch_size`` payloads. Each batch
+    is coalesced to the last change per object, applied to the mirror in one
+    transaction per table and published on the cache event bus for resolvers.
+    Batches larger than ``bulk_threshold`` only invalidate resolver entries,
+    so a bulk import cannot evict the hot working set.
+    """
+
+    def __init__(
+        self,
+        mirror: InventoryMirror | None = None,
+        bus: cache_events.CacheEventBus = cache_events.bus,
+        secret: str | None = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        bulk_threshold: int = DEFAULT_BULK_THRESHOLD,
+    ):
+        self.mirror = mirror
+        self.bus = bus
+        self.secret = secret
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.bulk_threshold = bulk_threshold
+        self._queue: queue.Queue = queue.Queue()
+        # serializes flushes from the flusher thread and explicit flush() calls
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._server: ThreadingHTTPServer | None = None
+        self._threads: list[threading.Thread] = []
+        # counters are bumped by every HTTP handler thread and the flusher
+        self._stats_lock = threading.Lock()
+        self.stats = {"received": 0, "rejected": 0, "applied": 0, "batches": 0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def verify(self, body: bytes, signature: str | None) -> bool:
+        """check the request signature when a secret is configured"""
+        if not self.secret:
+            return True
+        return bool(signature) and hmac.compare_digest(
+            sign(body, self.secret), signature
+        )
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[name] += n
+
+    def submit(self, payload: dict) -> None:
+        """Queue one webhook payload for the next batch."""
+        self._count("received")
+        self._queue.put(payload)
+
+    def _drain(self) -> list[dict]:
+        payloads = []
+        while len(payloads) < self.batch_size:
+            try:
+                payloads.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return payloads
+
+    def flush(self) -> int:
+        """Apply everything queued so far; returns the number of payloads."""
+        total = 0
+        with self._flush_lock:
+            while True:
+                payloads = self._drain()
+                if not payloads:
+                    return total
+                self._apply(payloads)
+                total += len(payloads)
+
+    @staticmethod
+    def _coalesce(payloads: Iterable[dict]) -> list[tuple]:
+        """
+        the last (object_type, event, data, prechanges) per object, in arrival
+        order; prechanges holds every earlier snapshot, to drop renamed keys
+        """
+        latest: dict[tuple[str, int], tuple] = {}
+        for payload in payloads:
+            object_type = object_type_of(payload)
+            data = payload.get("data") or {}
+            if object_type is None or "id" not in data:
+                logger.debug(f"ignoring webhook payload: {payload.get('event')}")
+                continue
+            key = (object_type, data["id"])
+            previous = latest.pop(key, None)
+            prechanges = previous[3] if previous is not None else []
+            prechange = (payload.get("snapshots") or {}).get("prechange")
+            if prechange:
+                prechanges.append(prechange)
+            latest[key] = (object_type, payload.get("event"), data, prechanges)
+        return list(latest.values())
+
+    def _apply(self, payloads: list[dict]) -> None:
+        changes = self._coalesce(payloads)
+        self._apply_mirror(changes)
+        bulk = len(changes) > self.bulk_threshold
+        for object_type, event, data, prechanges in changes:
+            if object_type not in RESOLVER_KEYS:
+                continue
+            kind, key_of = RESOLVER_KEYS[object_type]
+            key = key_of(data)
+            for old_key in dict.fromkeys(key_of(p) for p in prechanges):
+                # renamed: the old name must not resolve to this id any more
+                if old_key != key and _complete(old_key):
+                    self.bus.publish(CacheEvent(INVALIDATED, kind, old_key))
+            if event == DELETED:
+                action = DELETED
+            elif bulk:
+                action = INVALIDATED
+            elif event == UPDATED:
+                action = UPDATED
+            else:
+                action = CREATED
+            self.bus.publish(CacheEvent(action, kind, key, data["id"], data))
+        with self._stats_lock:
+            self.stats["applied"] += len(changes)
+            self.stats["batches"] += 1
+        logger.info(
+            f"webhooks: applied {len(changes)} changes from {len(payloads)} payloads"
+        )
+
+    def _apply_mirror(self, changes: list[tuple]) -> None:
+        if self.mirror is None:
+            return
+        by_table: dict[str, tuple[list, list]] = {}
+        for object_type, event, data, _ in changes:
+            table = MIRROR_TABLES.get(object_type)
+            if table is None:
+                continue
+            upserts, deletes = by_table.setdefault(table, ([], []))
+            if event == DELETED:
+                deletes.append(data["id"])
+            else:
+                upserts.append(data)
+        for table, (upserts, deletes) in by_table.items():
+            self.mirror.apply(table, upserts, deletes, mark_synced=False)
+
+    def _flusher(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"webhook flush failed: {e}")
+        self.flush()
+
+    def _handler(self):
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if not receiver.verify(body, self.headers.get(SIGNATURE_HEADER)):
+                    receiver._count("rejected")
+                    self.send_response(403)
+                    self.end_headers()
+                    return
+                try:
+                    payload = json.loads(body)
+                except ValueError:
+                    receiver._count("rejected")
+                    self.send_response(400)
+                    self.end_headers()
+                    return
+                receiver.submit(payload)
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                logger.debug(f"webhook {self.address_string()} {format % args}")
+
+        return Handler
+
+    def start(self, host: str = "0.0.0.0", port: int = DEFAULT_PORT) -> str:
+        """
+        Start the HTTP endpoint and the flusher in background threads.
+
+        Returns:
+            str: The URL webhooks should be sent to (port 0 picks a free port).
+        """
+        self._stop.clear()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._threads = [
+            threading.Thread(target=self._server.serve_forever, daemon=True),
+            threading.Thread(target=self._flusher, daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        bound_host, bound_port = self._server.server_address[:2]
+        url = f"http://{bound_host}:{bound_port}/"
+        logger.info(f"webhook receiver listening on {url}")
+        return url
+
+    def stop(self) -> None:
+        """Stop accepting webhooks and apply whatever is still queued."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self.flush()
+
+
+def replay_webhooks(
+    url: str,
+    payloads: Iterable[dict],
+    secret: str | None = None,
+    session: requests.Session | None = None,
+) -> int:
+    """
+    Post recorded webhook bodies to a receiver, standing in for NetBox.
+
+    Returns:
+        int: The number of payloads accepted.
+    """
+    session = session or requests.Session()
+    accepted = 0
+    for payload in payloads:
+        body = json.dumps(payload).encode()
+        headers = {"Content-Type": "application/json"}
+        if secret:
+            headers[SIGNATURE_HEADER] = sign(body, secret)
+        response = session.post(url, data=body, headers=headers)
+        if response.status_code < 300:
+            accepted += 1
+        else:
+            logger.error(f"webhook replay rejected: {response.status_code}")
+    return accepted
@@ -1,25 +1,25 @@
 """
 Add an entire subnet for a specified cidr
 It will mark the network and broadcast addresses as Reserved
+Addresses are created in bulk list POSTs after a single read of what exists
 """
 
 import sys
 import argparse
-from ipaddress import ip_network
-from ipaddress import IPv4Interface, IPv4Network
+from ipaddress import IPv4Interface
 import urllib3
 from os import getenv
 from loguru import logger
-import pynetbox
 import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from netbox_utils.netboxlib import add_ipv4_ip
+from netbox_utils.connection import get_api
+from netbox_utils.netboxlib import bulk_add_ipv4_subnet
 
 urllib3.disable_warnings()
 
 
-def main(cidr: str):
+def main(cidr: str, batch_size: int = 250):
     """main code for adding the subnet"""
 
     try:
@@ -32,32 +32,22 @@ def main(cidr: str):
     if int(nm) <= 22:
         proceed: str = input("A large subnet - Are you sure? Y or N: ")
         if proceed.lower() != "y":
-            logger.info("Exiting - proceed check was {proceed}")
+            logger.info(f"Exiting - proceed check was {proceed}")
             sys.exit()
 
-    net: IPv4Network = IPv4Network(ifc.network)
+    def show_progress(batch: int, total: int, result: dict) -> None:
+        print(
+            f"batch {batch}/{total}: created {result['created']}, "
+            f"failed {len(result['failed'])}"
+        )
 
-    # add the subnet and broadcast
-    logger.info(f"adding network address: {str(ifc.network)}")
-    rv = add_ipv4_ip(nb, str(ifc.network))
-    logger.info(f"result: {rv}")
-    bcast_addr: str = f"{net.broadcast_address}/{nm}"
-    logger.info(f"adding broadcast address: {bcast_addr}")
-    rv = add_ipv4_ip(nb, bcast_addr)
-    logger.info(f"result: {rv}")
+    logger.info(f"adding subnet {ifc.network} in batches of {batch_size}")
+    result = bulk_add_ipv4_subnet(nb, cidr, batch_size, progress=show_progress)
 
-    # add all the host ip addresses
-    try:
-        subnet_host_list: list = list(ip_network(ifc.network).hosts())
-        logger.info("adding all hosts")
-        for host in subnet_host_list:
-            ip = str(host).split("/", maxsplit=1)[0]
-            ip_addr: str = f"{ip}/{nm}"
-            logger.info(f"adding host: {ip_addr}")
-            rv = add_ipv4_ip(nb, ip_addr)
-            logger.info(f"result: {rv}")
-    except Exception as e:
-        logger.debug(f"Exception {e}")
+    logger.info(f"created: {result['created']}  skipped: {result['skipped']}")
+    for row in result["failed"]:
+        logger.error(f"failed: {row['address']} : {row['error']}")
+        print(f"failed: {row['address']} : {row['error']}")
 
     logger.info("Completed")
 
@@ -71,6 +61,13 @@ if __name__ == "__main__":
     parser.add_argument(
         "-c", "--cidr", type=str, required=True, help="indicate the cidr"
     )
+    parser.add_argument(
+        "-b",
+        "--batch-size",
+        type=int,
+        default=250,
+        help="number of addresses per bulk create request",
+    )
     args = parser.parse_args()
     logger.info(f"cidr passed: {args.cidr}")
 
@@ -83,7 +80,6 @@ if __name__ == "__main__":
 
     logger.info(f"netbox url: {url}")
 
-    nb = pynetbox.api(url=url, token=token)
-    nb.http_session.verify = False
+    nb = get_api(url, token)
 
-    main(args.cidr)
+    main(args.cidr, args.batch_size)
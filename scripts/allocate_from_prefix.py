@@ -0,0 +1,75 @@
+"""
+Script to reserve the next free addresses or child prefixes of a NetBox prefix.
+Pass --length to allocate aligned sub-prefixes (e.g. 31 for point-to-point links)
+instead of host addresses, and --dry-run to only show what would be taken.
+"""
+
+import argparse
+import urllib3
+from loguru import logger
+
+urllib3.disable_warnings()
+
+from os import getenv
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils.connection import get_api
+from netbox_utils.ip_allocator import PrefixAllocator
+
+# NetBox connection details
+NETBOX_URL = getenv("NETBOX_URL")
+API_TOKEN = getenv("NETBOX_TOKEN")
+
+
+def allocate_from_prefix(
+    prefix: str,
+    count: int,
+    length: int = None,
+    vrf_id: int = None,
+    dry_run: bool = False,
+    **fields,
+) -> list[str]:
+    """Reserve (or with dry_run only find) the next free slots of a prefix."""
+    if not NETBOX_URL or not API_TOKEN:
+        logger.error("NETBOX_TOKEN or NETBOX_URL missing from environment variables")
+        sys.exit()
+    allocator = PrefixAllocator(get_api(NETBOX_URL, API_TOKEN), prefix, vrf_id)
+    if dry_run:
+        allocator.refresh()
+        if length:
+            return allocator.free_prefixes(count, length)
+        return allocator.free_addresses(count)
+    if length:
+        records = allocator.allocate_prefixes(count, length, **fields)
+        return [str(r.prefix) for r in records]
+    records = allocator.allocate_addresses(count, **fields)
+    return [str(r.address) for r in records]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("prefix", type=str, help="parent prefix, e.g. 10.20.0.0/16")
+    parser.add_argument("-n", "--count", type=int, default=1, help="how many")
+    parser.add_argument(
+        "-l", "--length", type=int, help="allocate child prefixes of this length"
+    )
+    parser.add_argument("--vrf-id", type=int, help="VRF id (default global)")
+    parser.add_argument("--status", type=str, default="active")
+    parser.add_argument("--description", type=str, default="")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="only list the free slots"
+    )
+    args = parser.parse_args()
+    allocated = allocate_from_prefix(
+        args.prefix,
+        args.count,
+        args.length,
+        args.vrf_id,
+        args.dry_run,
+        status=args.status,
+        description=args.description,
+    )
+    for value in allocated:
+        logger.info(value)
@@ -3,7 +3,6 @@
 import argparse
 from os import getenv
 from loguru import logger
-import pynetbox
 import sys
 import urllib3
 
@@ -11,6 +10,7 @@ urllib3.disable_warnings()
 import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils.connection import get_api
 from netbox_utils.BgpSession import BgpSession
 
 
@@ -50,8 +50,7 @@ def main(bgp_session_object: BgpSession):
         logger.error("NETBOX_TOKEN or NETBOX_URL missing from environment variables")
         sys.exit()
 
-    nb = pynetbox.api(url=url, token=token)
-    nb.http_session.verify = False
+    nb = get_api(url, token)
     session_dict = dict()
     session_dict["name"] = bgp_session_object.name
     session_dict["description"] = bgp_session_object.description
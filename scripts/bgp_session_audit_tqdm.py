@@ -1,4 +1,3 @@
-import pynetbox
 from netmiko import ConnectHandler
 from netmiko import NetMikoTimeoutException, NetMikoAuthenticationException
 import re
@@ -28,6 +27,11 @@ logging.basicConfig(
 # NetBox configuration
 from os import getenv
 import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils.connection import get_api
+from netbox_utils.bgp_graphql import iter_bgp_sessions
 
 # NetBox configuration
 NETBOX_URL = getenv("NETBOX_URL")
@@ -58,8 +62,7 @@ ROUTER_CREDENTIALS = {
 def initialize_netbox():
     """Initialize pynetbox API connection with retry."""
     try:
-        nb = pynetbox.api(url=NETBOX_URL, token=NETBOX_TOKEN)
-        nb.http_session.verify = False  # Disable SSL verification if needed
+        nb = get_api(NETBOX_URL, NETBOX_TOKEN)  # SSL verification disabled
         return nb
     except Exception as e:
         logging.error(f"Failed to connect to NetBox: {e}")
@@ -75,10 +78,9 @@ def initialize_netbox():
     ),
 )
 def get_bgp_sessions(nb):
-    """Retrieve all BGP sessions from NetBox using the BGP plugin with retry."""
+    """Retrieve all BGP sessions, with device primary IPs, in paged GraphQL queries."""
     try:
-        bgp_sessions = nb.plugins.bgp.session.all()
-        return list(bgp_sessions)
+        return list(iter_bgp_sessions(nb))
     except Exception as e:
         logging.error(f"Failed to retrieve BGP sessions from NetBox: {e}")
         raise
@@ -166,16 +168,9 @@ def main():
     # Check each BGP session with a progress bar
     for session in tqdm(bgp_sessions, desc="Checking BGP Sessions", unit="session"):
         try:
-            device = session.device.name if session.device else None
+            device = session.device or None
             neighbor_ip = (
-                session.remote_address.address.split("/")[0]
-                if session.remote_address
-                else None
-            )
-            local_ip = (
-                session.local_address.address.split("/")[0]
-                if session.local_address
-                else None
+                session.remote_addr.split("/")[0] if session.remote_addr else None
             )
 
             if not device or not neighbor_ip:
@@ -187,15 +182,12 @@ def main():
             # Assume NetBox indicates the session should be active (Established)
             netbox_status = "Established"
 
-            # Get device IP from NetBox (primary IP)
-            device_obj = nb.dcim.devices.get(name=device)
-            if not device_obj or not device_obj.primary_ip4:
-                logging.warning(
-                    f"Device {device} not found or no primary IP in NetBox."
-                )
+            # Device primary IP came back with the session
+            if not session.device_ip:
+                logging.warning(f"Device {device} has no primary IP in NetBox.")
                 continue
 
-            device_ip = device_obj.primary_ip4.address.split("/")[0]
+            device_ip = session.device_ip.split("/")[0]
 
             # Check BGP status on the router
             router_status = get_router_bgp_status(device_ip, neighbor_ip)
@@ -1,6 +1,9 @@
-import pynetbox
 from os import getenv
 import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils.connection import get_api
 
 # NetBox connection details
 NETBOX_URL = getenv("NETBOX_URL")
@@ -31,7 +34,7 @@ NAME_MAPPING = {
 
 def connect_to_netbox():
     """Establish connection to NetBox API"""
-    return pynetbox.api(url=NETBOX_URL, token=NETBOX_TOKEN)
+    return get_api(NETBOX_URL, NETBOX_TOKEN)
 
 
 def get_manufacturer_id(nb, manufacturer_name):
@@ -88,7 +91,6 @@ def main():
     try:
         # Connect to NetBox
         nb = connect_to_netbox()
-        nb.http_session.verify = False
 
         # Get all devices from Cisco Systems
         cisco_devices = nb.dcim.devices.filter(
@@ -1,5 +1,10 @@
-import pynetbox
+import argparse
 import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils.connection import get_api
+from netbox_utils.inventory_mirror import InventoryMirror
 
 
 def is_canonical_cisco_name(name: str) -> bool:
@@ -35,19 +40,34 @@ NETBOX_URL = os.getenv("NETBOX_URL")
 NETBOX_TOKEN = os.getenv("NETBOX_TOKEN")
 OFFENDERS_FILE = "offenders.txt"
 
-if not NETBOX_URL or not NETBOX_TOKEN:
-    raise ValueError("NETBOX_URL and NETBOX_TOKEN must be set in environment variables")
-
-nb = pynetbox.api(NETBOX_URL, token=NETBOX_TOKEN)
-devices = nb.dcim.devices.filter(manufacturer="cisco")
+parser = argparse.ArgumentParser()
+parser.add_argument("-m", "--mirror", type=str, help="read a local inventory mirror file")
+args = parser.parse_args()
 
 offenders = []
-for device in devices:
-    interfaces = nb.dcim.interfaces.filter(device_id=device.id)
-    for iface in interfaces:
-        name = iface.name.strip()
-        if not is_canonical_cisco_name(name):
-            offenders.append((iface.id, name, device.name))
+if args.mirror:
+    # Read the local mirror, no requests to NetBox
+    with InventoryMirror(args.mirror) as mirror:
+        for device in mirror.devices(manufacturer="cisco"):
+            for iface in mirror.interfaces(device_id=device["id"]):
+                name = iface["name"].strip()
+                if not is_canonical_cisco_name(name):
+                    offenders.append((iface["id"], name, device["name"]))
+else:
+    if not NETBOX_URL or not NETBOX_TOKEN:
+        raise ValueError(
+            "NETBOX_URL and NETBOX_TOKEN must be set in environment variables"
+        )
+
+    nb = get_api(NETBOX_URL, NETBOX_TOKEN, ssl_verify=True)
+    devices = nb.dcim.devices.filter(manufacturer="cisco")
+
+    for device in devices:
+        interfaces = nb.dcim.interfaces.filter(device_id=device.id)
+        for iface in interfaces:
+            name = iface.name.strip()
+            if not is_canonical_cisco_name(name):
+                offenders.append((iface.id, name, device.name))
 
 if offenders:
     with open(OFFENDERS_FILE, "w", encoding="utf-8") as f:
@@ -1,7 +1,10 @@
-import pynetbox
 import ipaddress
 from os import getenv
 import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils.connection import get_api
 
 # NetBox connection details
 NETBOX_URL = getenv("NETBOX_URL")
@@ -12,8 +15,7 @@ if not NETBOX_URL or not API_TOKEN:
     sys.exit()
 
 # Initialize pynetbox API client
-nb = pynetbox.api(url=NETBOX_URL, token=API_TOKEN)
-nb.http_session.verify = False
+nb = get_api(NETBOX_URL, API_TOKEN)
 
 
 def get_bgp_session():
@@ -1,9 +1,10 @@
 """
 Script to find duplicate IP addresses in NetBox.
+Pass --mirror to read a local inventory mirror instead of the server,
+or --snapshot to read an offline snapshot.
 """
 
-import pynetbox
-from collections import defaultdict
+import argparse
 import urllib3
 from loguru import logger
 
@@ -12,50 +13,74 @@ urllib3.disable_warnings()
 # NetBox connection details
 from os import getenv
 import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils.connection import get_api
+from netbox_utils.duplicate_ips import find_duplicate_ips as find_duplicates
+from netbox_utils.inventory_mirror import InventoryMirror
+from netbox_utils.pagination import iter_all
+from netbox_utils.snapshot import open_snapshot
 
 # NetBox connection details
 NETBOX_URL = getenv("NETBOX_URL")
 API_TOKEN = getenv("NETBOX_TOKEN")
 
-if not NETBOX_URL or not API_TOKEN:
-    logger.error("NETBOX_TOKEN or NETBOX_URL missing from environment variables")
-    sys.exit()
-
-# Initialize pynetbox client
-nb = pynetbox.api(url=NETBOX_URL, token=API_TOKEN)
-nb.http_session.verify = False
 
+def mirror_ip_addresses(mirror_path: str):
+    """stream ip address rows from the local mirror, no requests to NetBox"""
+    with InventoryMirror(mirror_path) as mirror:
+        yield from mirror.iter_query("ip_addresses")
 
-def find_duplicate_ips():
-    """Find and log duplicate IP addresses."""
-    # Fetch all IP addresses from NetBox
-    ip_addresses = nb.ipam.ip_addresses.all()
 
-    # Dictionary to store IP addresses and their occurrences
-    ip_counts = defaultdict(list)
+def find_duplicate_ips(mirror_path: str = None, snapshot_path: str = None):
+    """Find and log duplicate IP addresses, per VRF and ignoring the mask."""
+    if mirror_path:
+        ip_addresses = mirror_ip_addresses(mirror_path)
+    else:
+        if snapshot_path:
+            nb = open_snapshot(snapshot_path)
+        elif not NETBOX_URL or not API_TOKEN:
+            logger.error(
+                "NETBOX_TOKEN or NETBOX_URL missing from environment variables"
+            )
+            sys.exit()
+        else:
+            nb = get_api(NETBOX_URL, API_TOKEN)
+        # Stream all IP addresses from NetBox, pages in parallel, only the key fields
+        ip_addresses = iter_all(nb.ipam.ip_addresses, fields=["address", "vrf"])
 
-    # Iterate through IP addresses and group by address
-    for ip in ip_addresses:
-        ip_counts[str(ip.address)].append(
-            {
-                "id": ip.id,
-                "address": str(ip.address) if ip.address else "None",
-            }
+    # Only compact per-host keys are kept while streaming, not the rows
+    found = False
+    for duplicate in find_duplicates(ip_addresses):
+        if not found:
+            logger.info("Duplicate IP addresses found:")
+            found = True
+        # a host can be both, e.g. /24 twice and /32 once
+        kind = " and ".join(
+            label
+            for label, hit in (
+                ("duplicate", duplicate.exact),
+                ("mask conflict", duplicate.mask_conflict),
+            )
+            if hit
         )
-
-    # Identify duplicates (IPs with more than one occurrence)
-    duplicates = {ip: details for ip, details in ip_counts.items() if len(details) > 1}
-
-    # Print results
-    if duplicates:
-        logger.info("Duplicate IP addresses found:")
-        for ip, instances in duplicates.items():
-            logger.info(f"\nIP Address: {ip}")
-            for instance in instances:
-                logger.info(f"  - ID: {instance['id']}, IP: {instance['address']}")
-    else:
+        logger.info(
+            f"\nIP Address: {duplicate.host} VRF: {duplicate.vrf or 'global'} ({kind})"
+        )
+        for (id, _), address in zip(duplicate.entries, duplicate.addresses):
+            logger.info(f"  - ID: {id}, IP: {address}")
+    if not found:
         logger.info("No duplicate IP addresses found.")
 
 
 if __name__ == "__main__":
-    find_duplicate_ips()
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-m", "--mirror", type=str, help="read a local inventory mirror file"
+    )
+    parser.add_argument(
+        "-s", "--snapshot", type=str, help="read an offline snapshot file"
+    )
+    args = parser.parse_args()
+    find_duplicate_ips(args.mirror, args.snapshot)
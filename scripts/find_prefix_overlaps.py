@@ -0,0 +1,68 @@
+"""
+Script to find duplicate, nested and shadowed prefixes in NetBox.
+Prefixes are compared within each VRF; container parents are expected.
+Pass --mirror to read a local inventory mirror, or --snapshot an offline snapshot.
+"""
+
+import argparse
+from collections import Counter
+import urllib3
+from loguru import logger
+
+urllib3.disable_warnings()
+
+from os import getenv
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils.connection import get_api
+from netbox_utils.inventory_mirror import InventoryMirror
+from netbox_utils.pagination import iter_all
+from netbox_utils.prefix_overlaps import find_prefix_conflicts
+from netbox_utils.snapshot import open_snapshot
+
+# NetBox connection details
+NETBOX_URL = getenv("NETBOX_URL")
+API_TOKEN = getenv("NETBOX_TOKEN")
+
+
+def load_prefixes(mirror_path: str = None, snapshot_path: str = None):
+    """prefix rows from the mirror, a snapshot or the server"""
+    if mirror_path:
+        with InventoryMirror(mirror_path) as mirror:
+            return mirror.prefixes()
+    if snapshot_path:
+        nb = open_snapshot(snapshot_path)
+    elif not NETBOX_URL or not API_TOKEN:
+        logger.error("NETBOX_TOKEN or NETBOX_URL missing from environment variables")
+        sys.exit()
+    else:
+        nb = get_api(NETBOX_URL, API_TOKEN)
+    # pages in parallel, only the fields the sweep needs
+    return iter_all(nb.ipam.prefixes, fields=["prefix", "vrf", "status"])
+
+
+def find_prefix_overlaps(mirror_path: str = None, snapshot_path: str = None):
+    """Print each conflict as it is found, then a summary."""
+    counts = Counter()
+    for conflict in find_prefix_conflicts(load_prefixes(mirror_path, snapshot_path)):
+        counts[conflict.kind] += 1
+        print(conflict, flush=True)
+
+    if counts:
+        logger.info(f"Prefix conflicts found: {dict(counts)}")
+    else:
+        logger.info("No prefix conflicts found.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-m", "--mirror", type=str, help="read a local inventory mirror file"
+    )
+    parser.add_argument(
+        "-s", "--snapshot", type=str, help="read an offline snapshot file"
+    )
+    args = parser.parse_args()
+    find_prefix_overlaps(args.mirror, args.snapshot)
@@ -2,6 +2,7 @@
 Script to retrieve all BGP sessions from NetBox.
 """
 
+import argparse
 import sys
 import os
 from loguru import logger
@@ -10,13 +11,36 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from netbox_utils.netboxlib import connect_netbox
 import urllib3
 from netbox_utils.BgpSession import BgpSession
+from netbox_utils.pagination import iter_all
+from netbox_utils import bgp_graphql
+from netbox_utils.bgp_graphql import bgp_session_key
+from netbox_utils.inventory_mirror import InventoryMirror
 
 urllib3.disable_warnings()
 
+# the only session fields BgpSession is built from
+SESSION_FIELDS = [
+    "name",
+    "device",
+    "site",
+    "status",
+    "remote_as",
+    "remote_address",
+    "local_as",
+    "local_address",
+    "description",
+    "comments",
+]
 
-def get_all_netbox_bgp_sessions(nb) -> dict:
-    """Get all the BGP Sessions from Netbox and stuff them into a dict of BgpSession objects"""
-    bgp_sessions = nb.plugins.bgp.session.all()
+
+def get_all_netbox_bgp_sessions(nb, graphql: bool = False) -> dict:
+    """Get all the BGP Sessions from Netbox and stuff them into a dict of BgpSession objects
+
+    graphql=True reads sessions with their nested objects in paged GraphQL queries
+    """
+    if graphql:
+        return bgp_graphql.get_bgp_sessions(nb)
+    bgp_sessions = iter_all(nb.plugins.bgp.session, fields=SESSION_FIELDS)
     bgp_sess_dict = dict()
     for session in bgp_sessions:
         # logger.debug(f"{session.id}, {session.name}, {session.remote_address}, {session.local_address}")
@@ -48,9 +72,24 @@ def get_all_netbox_bgp_sessions(nb) -> dict:
     return bgp_sess_dict
 
 
+def get_mirrored_bgp_sessions(mirror_path: str) -> dict:
+    """Read BGP Sessions from a local inventory mirror instead of Netbox"""
+    with InventoryMirror(mirror_path) as mirror:
+        return {bgp_session_key(s): s for s in mirror.bgp_sessions()}
+
+
 if __name__ == "__main__":
-    nb = connect_netbox()
-    all_sessions = get_all_netbox_bgp_sessions(nb)
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-m", "--mirror", type=str, help="read a local inventory mirror file"
+    )
+    args = parser.parse_args()
+
+    if args.mirror:
+        all_sessions = get_mirrored_bgp_sessions(args.mirror)
+    else:
+        nb = connect_netbox()
+        all_sessions = get_all_netbox_bgp_sessions(nb)
     logger.info(f"len is {len(all_sessions)}")
 
     # logger.info(f"test case {all_sessions['69.11.245.66']}")
@@ -2,9 +2,14 @@
 Script to get interfaces for a device from NetBox.
 """
 
-import pynetbox
+import argparse
 import os
 from loguru import logger
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils.connection import get_api
+from netbox_utils.response_cache import ResponseCache
 
 # NetBox connection details (from environment variables)
 NETBOX_URL = os.getenv("NETBOX_URL")
@@ -15,11 +20,15 @@ if not NETBOX_URL or not NETBOX_TOKEN:
     raise ValueError("NETBOX_URL and NETBOX_TOKEN must be set in environment variables")
 
 
-def get_device_interfaces():
+def get_device_interfaces(use_cache: bool = False, refresh: bool = False):
     """Get all interfaces for a device and log their details."""
     try:
-        # Initialize pynetbox API connection
-        nb = pynetbox.api(url=NETBOX_URL, token=NETBOX_TOKEN)
+        # Initialize pynetbox API connection; with use_cache, repeat runs are
+        # answered from the on-disk response cache
+        cache = ResponseCache() if use_cache else None
+        nb = get_api(
+            NETBOX_URL, NETBOX_TOKEN, ssl_verify=True, cache=cache, refresh=refresh
+        )
 
         # Get the device by name
         device = nb.dcim.devices.get(name=DEVICE_NAME)
@@ -49,4 +58,14 @@ def get_device_interfaces():
 
 
 if __name__ == "__main__":
-    get_device_interfaces()
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="answer repeat runs from the local response cache (may be minutes old)",
+    )
+    parser.add_argument(
+        "--refresh", action="store_true", help="with --cache, re-download and update it"
+    )
+    args = parser.parse_args()
+    get_device_interfaces(use_cache=args.cache, refresh=args.refresh)
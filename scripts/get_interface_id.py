@@ -3,9 +3,12 @@ Script to get the ID of a specific interface.
 """
 
 import os
-import pynetbox
 import urllib3
 from loguru import logger
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils.connection import get_api
 
 urllib3.disable_warnings()
 
@@ -15,8 +18,7 @@ NETBOX_TOKEN = os.getenv("NETBOX_TOKEN")
 
 def get_interface_id(device_name: str, interface_name: str) -> int | None:
     """Retrieve the ID of a specific interface by device and interface name."""
-    nb = pynetbox.api(NETBOX_URL, token=NETBOX_TOKEN)
-    nb.http_session.verify = False
+    nb = get_api(NETBOX_URL, NETBOX_TOKEN)
     interface = nb.dcim.interfaces.get(device=device_name, name=interface_name)
     return interface.id if interface else None
 
@@ -1,14 +1,16 @@
 import os
-import pynetbox
 import urllib3
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils.connection import get_api
 
 urllib3.disable_warnings()
 
 NETBOX_URL = os.getenv("NETBOX_URL")
 NETBOX_TOKEN = os.getenv("NETBOX_TOKEN")
 
-nb = pynetbox.api(NETBOX_URL, token=NETBOX_TOKEN)
-nb.http_session.verify = False
+nb = get_api(NETBOX_URL, NETBOX_TOKEN)
 
 # Fast filtered queries for large environments
 devices = list(nb.dcim.devices.filter(cf_Maintenance=True))
@@ -1,30 +1,79 @@
+import argparse
 import os
-import pynetbox
+import sys
 import urllib3
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils.connection import get_api
+from netbox_utils.inventory_mirror import InventoryMirror
+from netbox_utils.pagination import iter_all
+from netbox_utils.response_cache import ResponseCache
+from netbox_utils.snapshot import open_snapshot
+
 urllib3.disable_warnings()
 
 NETBOX_URL = os.getenv("NETBOX_URL")
 NETBOX_TOKEN = os.getenv("NETBOX_TOKEN")
 
-nb = pynetbox.api(NETBOX_URL, token=NETBOX_TOKEN)
-nb.http_session.verify = False
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    "-m", "--mirror", type=str, help="read a local inventory mirror file"
+)
+parser.add_argument("-s", "--snapshot", type=str, help="read an offline snapshot file")
+parser.add_argument(
+    "--cache",
+    action="store_true",
+    help="answer repeat runs from the local response cache (may be minutes old)",
+)
+parser.add_argument(
+    "--refresh", action="store_true", help="with --cache, re-download and update it"
+)
+args = parser.parse_args()
 
 
 def get_maintenance(obj):
     return obj.custom_fields.get("Maintenance", False) if obj.custom_fields else False
 
 
+if args.mirror:
+    # Read the local mirror, no requests to NetBox
+    with InventoryMirror(args.mirror) as mirror:
+        for dev in mirror.devices():
+            maintenance = mirror.custom_field(dev, "Maintenance", False)
+            print(f"Device {dev['name']}: Maintenance = {maintenance}")
+
+        for circuit in mirror.circuits():
+            maintenance = mirror.custom_field(circuit, "Maintenance", False)
+            print(f"Circuit {circuit['cid']}: Maintenance = {maintenance}")
+
+        for iface in mirror.interfaces():
+            maintenance = mirror.custom_field(iface, "Maintenance", False)
+            print(
+                f"Interface {iface['device']}/{iface['name']}: Maintenance = {maintenance}"
+            )
+    sys.exit()
+
+if args.snapshot:
+    # same API as a live connection, read from the snapshot file
+    nb = open_snapshot(args.snapshot)
+else:
+    # opt-in: cached maintenance flags can be stale for the endpoint's TTL
+    cache = ResponseCache() if args.cache else None
+    if cache is not None and not args.refresh:
+        ttl = cache.ttl_for("/api/dcim/devices/")
+        print(f"(values may be cached for up to {ttl:.0f}s; pass --refresh)")
+    nb = get_api(NETBOX_URL, NETBOX_TOKEN, cache=cache, refresh=args.refresh)
+
 # Examples:
-devices = nb.dcim.devices.all()
+devices = iter_all(nb.dcim.devices, fields=["name", "custom_fields"])
 for dev in devices:
     print(f"Device {dev.name}: Maintenance = {get_maintenance(dev)}")
 
-circuits = nb.circuits.circuits.all()
+circuits = iter_all(nb.circuits.circuits, fields=["cid", "custom_fields"])
 for circuit in circuits:
     print(f"Circuit {circuit.cid}: Maintenance = {get_maintenance(circuit)}")
 
-interfaces = nb.dcim.interfaces.all()
+interfaces = iter_all(nb.dcim.interfaces, fields=["name", "device", "custom_fields"])
 for iface in interfaces:
     print(
         f"Interface {iface.device.name}/{iface.name}: Maintenance = {get_maintenance(iface)}"
@@ -1,6 +1,9 @@
-import pynetbox
 import sys
 from os import getenv
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils.connection import get_api
 
 # NetBox connection details
 NETBOX_URL = getenv("NETBOX_URL")
@@ -11,7 +14,7 @@ def get_netbox_api():
     if not NETBOX_URL or not API_TOKEN:
         print("NETBOX_TOKEN or NETBOX_URL missing from environment variables")
         sys.exit(1)
-    return pynetbox.api(url=NETBOX_URL, token=API_TOKEN)
+    return get_api(NETBOX_URL, API_TOKEN, ssl_verify=True)
 
 
 def get_device(nb, device_name):
@@ -1,5 +1,9 @@
-import pynetbox
 from os import getenv
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils.connection import get_api
 
 # establish your netbox connection
 NETBOX_URL = getenv("NETBOX_URL")
@@ -8,7 +12,7 @@ NETBOX_TOKEN = getenv("NETBOX_TOKEN")
 if not NETBOX_URL or not NETBOX_TOKEN:
     raise ValueError("NETBOX_URL and NETBOX_TOKEN must be set in environment variables")
 
-nb = pynetbox.api(url=NETBOX_URL, token=NETBOX_TOKEN)
+nb = get_api(NETBOX_URL, NETBOX_TOKEN, ssl_verify=True)
 
 # assuming you have a connection, the following are the raw steps
 rir = nb.ipam.rirs.get(rir="ARIN")
@@ -1,7 +1,10 @@
 from os import getenv
-import pynetbox
 import sys
 import urllib3
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils.connection import get_api
 
 urllib3.disable_warnings()
 
@@ -14,8 +17,7 @@ def nb_change_ip_status(cidr: str, status: str) -> bool:
         print("NETBOX_TOKEN or NETBOX_URL missing from environment variables")
         sys.exit()
 
-    nb = pynetbox.api(url=url, token=token)
-    nb.http_session.verify = False
+    nb = get_api(url, token)
 
     try:
         response = nb.ipam.ip_addresses.get(address=cidr)
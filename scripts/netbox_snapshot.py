@@ -0,0 +1,61 @@
+"""
+Export NetBox data to a compressed offline snapshot, or list what one holds
+Analysis scripts accept --snapshot FILE to read it instead of the server
+"""
+
+import sys
+import argparse
+import urllib3
+from os import getenv
+from loguru import logger
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils.connection import get_api
+from netbox_utils.snapshot import DEFAULT_SNAPSHOT_ENDPOINTS, Snapshot, export_snapshot
+
+urllib3.disable_warnings()
+
+
+if __name__ == "__main__":
+    logger.remove()
+    logger.add("./netbox.log")
+    logger.info("Executing netbox_snapshot.py")
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("snapshot", type=str, help="snapshot file")
+    parser.add_argument(
+        "-e",
+        "--endpoint",
+        action="append",
+        help="export this endpoint, e.g. ipam.prefixes (repeatable, default: common)",
+    )
+    parser.add_argument(
+        "-i",
+        "--info",
+        action="store_true",
+        help="list the snapshot instead of exporting",
+    )
+    args = parser.parse_args()
+
+    if args.info:
+        with Snapshot(args.snapshot) as snapshot:
+            print(f"NetBox {snapshot.meta.get('netbox_version', 'unknown')}")
+            for endpoint in snapshot.endpoints:
+                print(f"{endpoint:<22} {snapshot.count(endpoint)}")
+        sys.exit()
+
+    token = getenv("NETBOX_TOKEN")
+    url = getenv("NETBOX_URL")
+
+    if not token or not url:
+        logger.error("NETBOX_TOKEN or NETBOX_URL missing from environment variables")
+        sys.exit()
+
+    nb = get_api(url, token)
+    counts = export_snapshot(
+        nb, args.snapshot, args.endpoint or DEFAULT_SNAPSHOT_ENDPOINTS
+    )
+    for endpoint, count in counts.items():
+        print(f"{endpoint:<22} {count}")
+    logger.info("Completed")
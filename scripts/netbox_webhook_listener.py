@@ -0,0 +1,76 @@
+"""
+Listen for NetBox webhooks and apply them to the local inventory mirror
+Point a NetBox webhook (all object types, create/update/delete) at this host
+--replay posts recorded webhook bodies (one JSON object per line) to a listener
+"""
+
+import sys
+import argparse
+import json
+import time
+from os import getenv
+from loguru import logger
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils.inventory_mirror import DEFAULT_MIRROR_PATH, InventoryMirror
+from netbox_utils.webhook_receiver import (
+    DEFAULT_PORT,
+    WebhookReceiver,
+    replay_webhooks,
+)
+
+
+def read_payloads(path: str):
+    """yield recorded webhook bodies from a JSON-lines file"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+if __name__ == "__main__":
+    logger.remove()
+    logger.add("./netbox.log")
+    logger.info("Executing netbox_webhook_listener.py")
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-m",
+        "--mirror",
+        type=str,
+        default=DEFAULT_MIRROR_PATH,
+        help="mirror file to keep current",
+    )
+    parser.add_argument("--host", type=str, default="0.0.0.0", help="listen address")
+    parser.add_argument("-p", "--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "-r", "--replay", type=str, help="post recorded bodies from this file"
+    )
+    parser.add_argument(
+        "-u",
+        "--url",
+        type=str,
+        default=f"http://127.0.0.1:{DEFAULT_PORT}/",
+        help="listener to replay to",
+    )
+    args = parser.parse_args()
+
+    # the same secret configured on the NetBox webhook, if any
+    secret = getenv("NETBOX_WEBHOOK_SECRET")
+
+    if args.replay:
+        accepted = replay_webhooks(args.url, read_payloads(args.replay), secret)
+        print(f"replayed {accepted} webhooks to {args.url}")
+        sys.exit()
+
+    with InventoryMirror(args.mirror) as mirror:
+        with WebhookReceiver(mirror=mirror, secret=secret) as receiver:
+            print(f"listening on {receiver.start(args.host, args.port)}")
+            try:
+                while True:
+                    time.sleep(60)
+                    logger.info(f"webhook stats: {receiver.stats}")
+            except KeyboardInterrupt:
+                pass
+    logger.info("Completed")
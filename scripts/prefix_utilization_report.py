@@ -0,0 +1,82 @@
+"""
+Script to report the utilization of every prefix in NetBox, fullest first.
+Prefixes and IP addresses are downloaded once and counted locally.
+Pass --mirror to read a local inventory mirror, or --snapshot an offline snapshot.
+"""
+
+import argparse
+import urllib3
+from loguru import logger
+
+urllib3.disable_warnings()
+
+from os import getenv
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils.connection import get_api
+from netbox_utils.inventory_mirror import InventoryMirror
+from netbox_utils.pagination import iter_all
+from netbox_utils.prefix_utilization import prefix_utilization, write_utilization
+from netbox_utils.snapshot import open_snapshot
+
+# NetBox connection details
+NETBOX_URL = getenv("NETBOX_URL")
+API_TOKEN = getenv("NETBOX_TOKEN")
+
+
+def utilization_report(
+    mirror_path: str = None, snapshot_path: str = None, min_percent: float = 0.0
+):
+    """Count used addresses for every prefix without per-prefix API calls."""
+    if mirror_path:
+        with InventoryMirror(mirror_path) as mirror:
+            return prefix_utilization(
+                mirror.iter_query("ip_addresses"),
+                mirror.iter_query("prefixes"),
+                min_percent,
+            )
+    if snapshot_path:
+        nb = open_snapshot(snapshot_path)
+    elif not NETBOX_URL or not API_TOKEN:
+        logger.error("NETBOX_TOKEN or NETBOX_URL missing from environment variables")
+        sys.exit()
+    else:
+        nb = get_api(NETBOX_URL, API_TOKEN)
+    # pages in parallel, only the fields the counts need
+    return prefix_utilization(
+        iter_all(nb.ipam.ip_addresses, fields=["address", "vrf"]),
+        iter_all(nb.ipam.prefixes, fields=["id", "prefix", "vrf", "status", "is_pool"]),
+        min_percent,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-m", "--mirror", type=str, help="read a local inventory mirror file"
+    )
+    parser.add_argument(
+        "-s", "--snapshot", type=str, help="read an offline snapshot file"
+    )
+    parser.add_argument(
+        "-f", "--format", choices=("csv", "json"), default="csv", help="output format"
+    )
+    parser.add_argument(
+        "-o", "--output", type=str, help="write to a file instead of stdout"
+    )
+    parser.add_argument(
+        "--min-percent",
+        type=float,
+        default=0.0,
+        help="only report prefixes at least this full",
+    )
+    args = parser.parse_args()
+    report = utilization_report(args.mirror, args.snapshot, args.min_percent)
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            write_utilization(report, f, args.format)
+        logger.info(f"Wrote {len(report)} prefixes to {args.output}")
+    else:
+        write_utilization(report, sys.stdout, args.format)
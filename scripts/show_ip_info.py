@@ -0,0 +1,32 @@
+"""
+Script to show information about an address or network and a page of its hosts.
+Large networks (a /8, any IPv6 prefix) are summarized without listing every host;
+use --offset and --limit to page through the usable hosts.
+"""
+
+import argparse
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils.ip_info import DEFAULT_HOST_PAGE, ip_info
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("cidr", type=str, help="address with a prefix length")
+    parser.add_argument(
+        "-o", "--offset", type=int, default=0, help="usable hosts to skip"
+    )
+    parser.add_argument(
+        "-l",
+        "--limit",
+        type=int,
+        default=DEFAULT_HOST_PAGE,
+        help="usable hosts to list (0 for none)",
+    )
+    args = parser.parse_args()
+    try:
+        ip_info(args.cidr, args.offset, args.limit)
+    except ValueError as e:
+        parser.error(str(e))
@@ -2,8 +2,12 @@ import re
 from os import getenv
 from getpass import getpass
 from netmiko import ConnectHandler
-from pynetbox import api
 from datetime import datetime
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils.connection import get_api
 
 # Configuration from environment variables
 NETBOX_URL = getenv("NETBOX_URL")
@@ -41,7 +45,7 @@ SROS_ROUTERS = [
 ]
 
 # Initialize Netbox API
-netbox = api(url=NETBOX_URL, token=NETBOX_TOKEN)
+netbox = get_api(NETBOX_URL, NETBOX_TOKEN, ssl_verify=True)
 
 
 def parse_iosxr_bgp(output):
@@ -0,0 +1,66 @@
+"""
+Download NetBox inventory into a local SQLite mirror
+By default only changes since the last run are pulled; --full rebuilds
+Read-heavy scripts accept --mirror to query the file instead of the server
+"""
+
+import sys
+import argparse
+import urllib3
+from os import getenv
+from loguru import logger
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils.connection import get_api
+from netbox_utils.inventory_mirror import DEFAULT_MIRROR_PATH, TABLES, InventoryMirror
+
+urllib3.disable_warnings()
+
+
+if __name__ == "__main__":
+    logger.remove()
+    logger.add("./netbox.log")
+    logger.info("Executing sync_inventory_mirror.py")
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-m",
+        "--mirror",
+        type=str,
+        default=DEFAULT_MIRROR_PATH,
+        help="mirror file to write",
+    )
+    parser.add_argument(
+        "-t",
+        "--table",
+        action="append",
+        choices=list(TABLES),
+        help="only sync this table (repeatable, default: all)",
+    )
+    parser.add_argument(
+        "-f",
+        "--full",
+        action="store_true",
+        help="rebuild the tables instead of applying changes since the last run",
+    )
+    args = parser.parse_args()
+
+    token = getenv("NETBOX_TOKEN")
+    url = getenv("NETBOX_URL")
+
+    if not token or not url:
+        logger.error("NETBOX_TOKEN or NETBOX_URL missing from environment variables")
+        sys.exit()
+
+    nb = get_api(url, token)
+
+    with InventoryMirror(args.mirror) as mirror:
+        if args.full:
+            results = mirror.sync(nb, args.table)
+        else:
+            results = mirror.refresh(nb, args.table)
+
+    for table, result in results.items():
+        print(f"{table:<14} {result}")
+    logger.info("Completed")
@@ -3,7 +3,6 @@ import argparse
 import sys
 import os
 from netmiko import ConnectHandler
-import pynetbox
 import re
 from typing import Dict, List
 import logging
@@ -11,6 +10,7 @@ import logging
 # Add parent directory to path for credentials module
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from credentials import get_credentials
+from netbox_utils.connection import get_api
 
 # NetBox connection details
 NETBOX_URL = os.getenv("NETBOX_URL")
@@ -103,10 +103,8 @@ def sync_netbox_interfaces(
     """Synchronize router interfaces with NetBox."""
     try:
         # Connect to NetBox
-        nb = pynetbox.api(url=netbox_url, token=netbox_token)
-        nb.http_session.verify = (
-            False  # Disable SSL verification if needed (not recommended for production)
-        )
+        # SSL verification disabled (not recommended for production)
+        nb = get_api(netbox_url, netbox_token)
 
         # Get the device from NetBox
         device = nb.dcim.devices.get(name=device_name)
@@ -1,6 +1,22 @@
+import argparse
 from os import getenv
 import sys
-import pynetbox
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils.connection import get_api
+from netbox_utils.response_cache import ResponseCache
+
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    "--cache",
+    action="store_true",
+    help="answer repeat runs from the local response cache (may be minutes old)",
+)
+parser.add_argument(
+    "--refresh", action="store_true", help="with --cache, re-download and update it"
+)
+args = parser.parse_args()
 
 # Initialize NetBox API client
 token = getenv("NETBOX_TOKEN")
@@ -10,7 +26,9 @@ if not token or not url:
     print("NETBOX_TOKEN or NETBOX_URL missing from environment variables")
     sys.exit()
 
-nb = pynetbox.api(url=url, token=token)
+# with --cache, repeat runs are answered from the on-disk response cache
+cache = ResponseCache() if args.cache else None
+nb = get_api(url, token, ssl_verify=True, cache=cache, refresh=args.refresh)
 
 # Get the device
 device = nb.dcim.devices.get(name="switch1")
@@ -0,0 +1,207 @@
+import asyncio
+import sys
+import os
+
+import httpx
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils.AsyncNetboxClient import AsyncNetboxClient
+
+# --- Fixtures ---
+
+
+class FakeNetbox:
+    """A tiny in-memory stand-in for the NetBox REST API."""
+
+    def __init__(self, max_page_size=1000):
+        self.requests = []
+        # like NetBox MAX_PAGE_SIZE, larger limits are capped
+        self.max_page_size = max_page_size
+        self.objects = {
+            "/api/dcim/sites/": [{"id": 3, "name": "Site-A"}],
+            "/api/dcim/devices/": [{"id": 5, "name": "Dev-A"}],
+            "/api/dcim/device-roles/": [{"id": 7, "name": "Role-A"}],
+            "/api/dcim/device-types/": [{"id": 9, "model": "Type-A"}],
+            "/api/ipam/asns/": [{"id": 11, "asn": 65000}, {"id": 12, "asn": 65001}],
+            "/api/ipam/ip-addresses/": [
+                {"id": 13, "address": "10.0.0.1/31"},
+                {"id": 14, "address": "10.0.0.0/31"},
+            ],
+            "/api/plugins/bgp/session/": [
+                {"id": i, "name": f"session-{i}"} for i in range(25)
+            ],
+        }
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        path = request.url.path
+        if request.method == "POST":
+            return httpx.Response(201, json={"id": 100, "path": path})
+        params = request.url.params
+        rows = self.objects.get(path, [])
+        for key in ("name", "model", "asn"):
+            if key in params:
+                rows = [r for r in rows if str(r.get(key)) == params[key]]
+        if "address" in params:
+            wanted = params.get_list("address")
+            rows = [
+                r
+                for r in rows
+                if r["address"] in wanted or r["address"].split("/")[0] in wanted
+            ]
+        offset = int(params.get("offset", 0))
+        limit = min(int(params.get("limit", 50)), self.max_page_size)
+        return httpx.Response(
+            200,
+            json={"count": len(rows), "results": rows[offset : offset + limit]},
+        )
+
+
+@pytest.fixture
+def fake_netbox():
+    return FakeNetbox()
+
+
+@pytest.fixture
+def client(fake_netbox):
+    return AsyncNetboxClient(
+        "http://mock-netbox",
+        "mock-token",
+        concurrency=4,
+        transport=httpx.MockTransport(fake_netbox.handler),
+    )
+
+
+# --- Tests ---
+
+
+def test_auth_header(client):
+    assert client.http.headers["Authorization"] == "Token mock-token"
+
+
+def test_get_site_id_cached(client, fake_netbox):
+    async def run():
+        return await asyncio.gather(*[client.get_site_id("Site-A") for _ in range(3)])
+
+    assert asyncio.run(run()) == [3, 3, 3]
+    # the concurrent misses share one request
+    assert len(fake_netbox.requests) == 1
+    assert client.resolver.stats["misses"] == 3
+    assert client.resolver.stats["hits"] == 0
+
+    assert asyncio.run(client.get_site_id("Site-A")) == 3
+    assert len(fake_netbox.requests) == 1
+    assert client.resolver.stats["hits"] == 1
+
+
+def test_get_site_id_not_found(client):
+    assert asyncio.run(client.get_site_id("Nope")) is None
+
+
+def test_concurrent_identical_gets_share_one_request(fake_netbox):
+    async def slow_handler(request):
+        await asyncio.sleep(0.01)
+        return fake_netbox.handler(request)
+
+    client = AsyncNetboxClient(
+        "http://mock-netbox",
+        "mock-token",
+        transport=httpx.MockTransport(slow_handler),
+    )
+
+    async def run():
+        ids = await asyncio.gather(*[client.get_device_id("Dev-A") for _ in range(5)])
+        sites = await asyncio.gather(
+            *[client._request("GET", "/dcim/sites/") for _ in range(3)]
+        )
+        return ids, sites
+
+    ids, sites = asyncio.run(run())
+    assert ids == [5] * 5
+    # each caller gets its own decoded copy
+    assert sites[0] == sites[1] and sites[0] is not sites[1]
+    assert len(fake_netbox.requests) == 2
+
+
+def test_paginate_in_order(client, fake_netbox):
+    async def run():
+        return [s["id"] async for s in client.paginate("/plugins/bgp/session/", 10)]
+
+    assert asyncio.run(run()) == list(range(25))
+    offsets = [int(r.url.params["offset"]) for r in fake_netbox.requests]
+    assert sorted(offsets) == [0, 10, 20]
+
+
+def test_paginate_follows_capped_page_size():
+    fake_netbox = FakeNetbox(max_page_size=3)
+    client = AsyncNetboxClient(
+        "http://mock-netbox",
+        "mock-token",
+        transport=httpx.MockTransport(fake_netbox.handler),
+    )
+
+    async def run():
+        return [s["id"] async for s in client.paginate("/plugins/bgp/session/", 5)]
+
+    assert asyncio.run(run()) == list(range(25))
+    offsets = [int(r.url.params["offset"]) for r in fake_netbox.requests]
+    assert sorted(offsets) == list(range(0, 25, 3))
+
+
+def test_add_bgp_session(client, fake_netbox):
+    result = asyncio.run(
+        client.add_bgp_session(
+            "Site-A", 65001, "10.0.0.1/31", 65000, "10.0.0.0/31", "Dev-A", "N", "Active"
+        )
+    )
+    assert result["path"] == "/api/plugins/bgp/session/"
+    post = fake_netbox.requests[-1]
+    assert post.method == "POST"
+    body = httpx.Response(200, content=post.content).json()
+    assert body["local_as"] == 11
+    assert body["remote_as"] == 12
+    assert body["local_address"] == 14
+    assert body["remote_address"] == 13
+    assert body["device"] == 5
+    assert body["site"] == 3
+    assert body["status"] == "active"
+
+
+def test_add_device(client):
+    result = asyncio.run(client.add_device("Site-A", "New", "Role-A", "Type-A"))
+    assert result["id"] == 100
+
+
+def test_check_cidrs_exist_many(client):
+    found = asyncio.run(client.check_cidrs_exist_many(["10.0.0.1/31", "10.0.0.9/31"]))
+    assert found == {"10.0.0.1/31"}
+
+
+def test_get_cidr_from_ip(client):
+    assert asyncio.run(client.get_cidr_from_ip("10.0.0.1")) == "10.0.0.1/31"
+    assert asyncio.run(client.get_cidr_from_ip("10.0.0.9")) is None
+
+
+def test_get_cidrs_from_ips(client, fake_netbox):
+    found = asyncio.run(client.get_cidrs_from_ips(["10.0.0.1", "10.0.0.0", "10.0.0.9"]))
+    assert found == {
+        "10.0.0.1": ["10.0.0.1/31"],
+        "10.0.0.0": ["10.0.0.0/31"],
+        "10.0.0.9": [],
+    }
+    # one request for all three
+    assert len(fake_netbox.requests) == 1
+
+
+def test_add_ips_to_netbox(client, fake_netbox):
+    cidrs = ["10.0.0.1/31", "10.0.0.5/31", "10.0.0.5/31"]
+    added = asyncio.run(client.add_ips_to_netbox(cidrs, "Desc", "Active"))
+    assert len(added) == 1
+    posts = [r for r in fake_netbox.requests if r.method == "POST"]
+    assert len(posts) == 1
+    assert len(fake_netbox.requests) == 2
+
+
+def test_add_ip_to_netbox_exists(client):
+    assert asyncio.run(client.add_ip_to_netbox("10.0.0.1/31", "Desc", "Active")) is None
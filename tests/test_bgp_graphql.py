@@ -0,0 +1,107 @@
+import sys
+import os
+from unittest.mock import MagicMock
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils import bgp_graphql
+from netbox_utils.BgpSession import BgpSession
+
+
+def make_row(i):
+    return {
+        "id": str(i),
+        "name": f"peer-{i}",
+        "description": "",
+        "comments": None,
+        "status": "active",
+        "site": {"name": "CHCGIL"},
+        "device": {"name": "rtr1", "primary_ip4": {"address": "10.0.0.1/32"}},
+        "local_address": {"address": f"192.0.2.{i}/31"},
+        "remote_address": {"address": f"198.51.100.{i}/31"},
+        "local_as": {"asn": 4181},
+        "remote_as": {"asn": 65000 + i},
+    }
+
+
+def make_response(rows=None, errors=None):
+    response = MagicMock()
+    payload = {"data": {"bgp_session_list": rows}}
+    if errors:
+        payload["errors"] = errors
+    response.json.return_value = payload
+    return response
+
+
+@pytest.fixture
+def mock_nb():
+    nb = MagicMock()
+    nb.base_url = "https://netbox.example.com/api"
+    nb.token = "abc123"
+    return nb
+
+
+def test_graphql_url(mock_nb):
+    assert bgp_graphql.graphql_url(mock_nb) == "https://netbox.example.com/graphql/"
+
+
+def test_session_from_graphql():
+    session = bgp_graphql.session_from_graphql(make_row(3))
+    assert session == BgpSession(
+        id=3,
+        name="peer-3",
+        description="",
+        comments="",
+        status="active",
+        site="CHCGIL",
+        device="rtr1",
+        device_ip="10.0.0.1/32",
+        local_addr="192.0.2.3/31",
+        remote_addr="198.51.100.3/31",
+        local_as=4181,
+        remote_as=65003,
+    )
+
+
+def test_session_from_graphql_missing_nested():
+    row = make_row(1)
+    row.update(device={"name": "rtr2", "primary_ip4": None}, local_as=None, site=None)
+    session = bgp_graphql.session_from_graphql(row)
+    assert session.device_ip is None
+    assert session.local_as == 0
+    assert session.site == ""
+
+
+def test_iter_bgp_sessions_pages(mock_nb):
+    # ids with gaps, as after deletes; each page resumes after the last id
+    mock_nb.http_session.post.side_effect = [
+        make_response([make_row(3), make_row(7)]),
+        make_response([make_row(12)]),
+    ]
+    sessions = list(bgp_graphql.iter_bgp_sessions(mock_nb, page_size=2))
+
+    assert [s.id for s in sessions] == [3, 7, 12]
+    assert mock_nb.http_session.post.call_count == 2
+    first, last = mock_nb.http_session.post.call_args_list
+    assert first.kwargs["json"]["variables"] == {"after": "0", "limit": 2}
+    args, kwargs = last
+    assert args == ("https://netbox.example.com/graphql/",)
+    assert kwargs["json"]["variables"] == {"after": "7", "limit": 2}
+    query = kwargs["json"]["query"]
+    assert "ordering: {id: ASC}" in query and "offset" not in query
+    assert kwargs["headers"]["Authorization"] == "Token abc123"
+
+
+def test_get_bgp_sessions_keys(mock_nb):
+    mock_nb.http_session.post.return_value = make_response([make_row(5)])
+    sessions = bgp_graphql.get_bgp_sessions(mock_nb)
+    assert list(sessions) == ["198.51.100.5_192.0.2.5"]
+
+
+def test_graphql_errors_raise(mock_nb):
+    mock_nb.http_session.post.return_value = make_response(
+        errors=[{"message": "Cannot query field"}]
+    )
+    with pytest.raises(Exception, match="Cannot query field"):
+        list(bgp_graphql.iter_bgp_sessions(mock_nb))
@@ -0,0 +1,166 @@
+import gc
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils import cache_events, netboxlib
+from netbox_utils.cache_events import CacheEvent, CacheEventBus
+from netbox_utils.NetboxClient import NetboxClient
+from netbox_utils.resolver_cache import MISSING, ResolverCache
+
+
+@pytest.fixture
+def netbox_client():
+    with patch("pynetbox.api"):
+        yield NetboxClient(url="http://mock-netbox", token="mock-token")
+
+
+def record(id, **fields):
+    rec = MagicMock()
+    rec.id = id
+    rec.keys.return_value = ["id", *fields]
+    rec.__getitem__.side_effect = {"id": id, **fields}.__getitem__
+    return rec
+
+
+def test_bus_delivers_and_unsubscribes():
+    bus = CacheEventBus()
+    seen = []
+    bus.subscribe(seen.append)
+    bus.publish(CacheEvent("created", "device", "rtr1", 1))
+    bus.unsubscribe(seen.append)
+    bus.publish(CacheEvent("created", "device", "rtr2", 2))
+    assert [e.key for e in seen] == ["rtr1"]
+
+
+def test_bus_holds_bound_methods_weakly():
+    bus = CacheEventBus()
+    resolver = ResolverCache()
+    bus.subscribe(resolver.apply)
+    del resolver
+    gc.collect()
+    bus.publish(CacheEvent("created", "device", "rtr1", 1))
+    assert bus._handlers == []
+
+
+def test_bus_survives_failing_handler():
+    bus = CacheEventBus()
+    seen = []
+    bus.subscribe(MagicMock(side_effect=RuntimeError("boom")))
+    bus.subscribe(seen.append)
+    bus.publish(CacheEvent("deleted", "device", "rtr1"))
+    assert len(seen) == 1
+
+
+def test_resolver_apply():
+    resolver = ResolverCache()
+    resolver.apply(CacheEvent("created", "device", "rtr1", 10))
+    assert resolver.get("device", "rtr1") == 10
+
+    resolver.set("interface", ("rtr1", "eth0"), 5)
+    resolver.apply(CacheEvent("deleted", "device", "rtr1", 10))
+    resolver.apply(CacheEvent("deleted", "interface", None))
+    assert resolver.get("device", "rtr1") is MISSING
+    assert resolver.get("interface", ("rtr1", "eth0")) is MISSING
+
+
+def test_resolver_apply_stores_only_resolved_kinds():
+    resolver = ResolverCache()
+    resolver.apply(CacheEvent("created", "prefix", "10.0.0.0/24", 3))
+    resolver.apply(CacheEvent("updated", "contact", "noc", 4))
+    assert len(resolver) == 0
+
+    resolver.set("prefix", "10.0.0.0/24", 3)
+    resolver.apply(CacheEvent("invalidated", "prefix", "10.0.0.0/24"))
+    assert resolver.get("prefix", "10.0.0.0/24") is MISSING
+
+
+def test_bulk_create_keeps_resolver_working_set(netbox_client):
+    netbox_client.resolver.set("site", "HQ", 1)
+    # a cached miss for an address the bulk write creates
+    netbox_client.resolver.set("ip_address", "10.0.0.5/20", None)
+    nb = MagicMock()
+    nb.ipam.ip_addresses.filter.return_value = []
+    nb.ipam.ip_addresses.create.side_effect = lambda rows: [
+        {"id": i, **row} for i, row in enumerate(rows)
+    ]
+    seen = []
+    cache_events.bus.subscribe(seen.append)
+    try:
+        result = netboxlib.bulk_add_ipv4_subnet(nb, "10.0.0.0/20")
+    finally:
+        cache_events.bus.unsubscribe(seen.append)
+
+    assert result["created"] == 4096
+    assert [(e.action, e.kind, e.key) for e in seen] == [
+        ("invalidated", "ip_address", None)
+    ]
+    assert netbox_client.resolver.stats["evictions"] == 0
+    assert netbox_client.resolver.get("site", "HQ") == 1
+    assert netbox_client.resolver.get("ip_address", "10.0.0.5/20") is MISSING
+
+
+def test_publish_created_reads_record_and_dict():
+    seen = []
+    cache_events.bus.subscribe(seen.append)
+    try:
+        cache_events.publish_created("vlan", (10, None), {"id": 3, "vid": 10})
+        cache_events.publish_created("device", "rtr1", record(4, name="rtr1"))
+    finally:
+        cache_events.bus.unsubscribe(seen.append)
+    assert [(e.kind, e.id) for e in seen] == [("vlan", 3), ("device", 4)]
+    assert seen[0].data == {"id": 3, "vid": 10}
+    assert seen[1].data == {"id": 4, "name": "rtr1"}
+
+
+def test_created_device_lookup_is_free(netbox_client):
+    netbox_client.get_device_type_id = MagicMock(return_value=1)
+    netbox_client.get_role_id = MagicMock(return_value=2)
+    netbox_client.get_site_id = MagicMock(return_value=3)
+    netbox_client.nb.dcim.devices.create.return_value = record(42, name="rtr1")
+
+    netbox_client.add_device("site", "rtr1", "core", "model")
+
+    assert netbox_client.get_device_id("rtr1") == 42
+    netbox_client.nb.dcim.devices.get.assert_not_called()
+
+
+def test_created_interface_lookup_is_free(netbox_client):
+    netbox_client.resolver.set("device", "rtr1", 42)
+    netbox_client.nb.dcim.interfaces.create.return_value = record(7, name="eth0")
+
+    netbox_client.add_interface_to_device("eth0", "rtr1", "1000base-t", "")
+    netbox_client.nb.ipam.ip_addresses.create.return_value = record(9)
+    netbox_client.add_ip_to_interface("rtr1", "eth0", "10.0.0.1/31", "active", "")
+
+    assert netbox_client.nb.ipam.ip_addresses.create.call_args.kwargs["interface"] == 7
+    netbox_client.nb.dcim.interfaces.get.assert_not_called()
+    assert netbox_client.get_ipaddress_id("10.0.0.1/31") == 9
+
+
+def test_netboxlib_delete_invalidates_client(netbox_client):
+    netbox_client.resolver.set("device", "rtr1", 42)
+    netbox_client.resolver.set("interface", ("rtr1", "eth0"), 7)
+    nb = MagicMock()
+    nb.dcim.devices.get.return_value = record(42)
+
+    assert netboxlib.delete_netbox_device(nb, "rtr1") is True
+    assert netbox_client.resolver.get("device", "rtr1") is MISSING
+    assert netbox_client.resolver.get("interface", ("rtr1", "eth0")) is MISSING
+
+
+def test_netboxlib_update_publishes():
+    seen = []
+    cache_events.bus.subscribe(seen.append)
+    nb = MagicMock()
+    nb.ipam.ip_addresses.get.return_value = record(5, address="10.0.0.1/24")
+    try:
+        assert netboxlib.change_ip_status(nb, "10.0.0.1/24", "Reserved") is True
+    finally:
+        cache_events.bus.unsubscribe(seen.append)
+    assert [(e.action, e.kind, e.key, e.id) for e in seen] == [
+        ("updated", "ip_address", "10.0.0.1/24", 5)
+    ]
@@ -0,0 +1,45 @@
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils import connection
+
+
+def test_build_session_adapter_settings():
+    session = connection.build_session(pool_size=8, timeout=(1, 2), retries=5)
+    adapter = session.get_adapter("https://netbox.example.com")
+
+    assert isinstance(adapter, connection.TimeoutHTTPAdapter)
+    assert adapter.timeout == (1, 2)
+    assert adapter._pool_maxsize == 8
+    assert adapter.max_retries.total == 5
+    assert set(adapter.max_retries.status_forcelist) == {429, 502, 503}
+    assert session.verify is False
+    assert "gzip" in session.headers["Accept-Encoding"]
+
+
+def test_timeout_adapter_applies_default_timeout():
+    adapter = connection.TimeoutHTTPAdapter(timeout=(3, 4))
+    with patch("requests.adapters.HTTPAdapter.send") as mock_send:
+        adapter.send(MagicMock())
+        assert mock_send.call_args.kwargs["timeout"] == (3, 4)
+
+        adapter.send(MagicMock(), timeout=10)
+        assert mock_send.call_args.kwargs["timeout"] == 10
+
+
+def test_get_session_is_shared():
+    assert connection.get_session() is connection.get_session()
+    assert connection.get_session(ssl_verify=True) is not connection.get_session()
+    assert connection.get_session(ssl_verify=True).verify is True
+
+
+def test_get_api_uses_shared_session():
+    with patch("pynetbox.api") as mock_api:
+        nb1 = connection.get_api("http://netbox", "token")
+        nb2 = connection.get_api("http://other", "token")
+
+    mock_api.assert_called_with("http://other", token="token")
+    assert nb1.http_session is connection.get_session()
+    assert nb1.http_session is nb2.http_session
@@ -0,0 +1,92 @@
+import sys
+import os
+import random
+import tracemalloc
+from types import SimpleNamespace
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils.duplicate_ips import find_duplicate_ips
+
+
+def ip(i, address, vrf=None):
+    return {"id": i, "address": address, "vrf": {"name": vrf} if vrf else None}
+
+
+def test_exact_and_mask_duplicates_per_vrf():
+    records = [
+        ip(1, "10.0.0.1/24"),
+        ip(2, "10.0.0.1/32"),
+        ip(3, "10.0.0.2/24"),
+        ip(4, "10.0.0.2/24"),
+        ip(5, "10.0.0.2/24", vrf="red"),
+        ip(6, "10.0.0.3/24"),
+        ip(7, "2001:db8::1/64"),
+        ip(8, "2001:db8::1/128"),
+        # the same integer as 0.0.0.1 must not collide across families
+        ip(9, "::1/128"),
+        ip(10, "0.0.0.1/32"),
+    ]
+    found = list(find_duplicate_ips(records))
+    assert [(d.vrf, d.host) for d in found] == [
+        (None, "10.0.0.1"),
+        (None, "10.0.0.2"),
+        (None, "2001:db8::1"),
+    ]
+    mask, exact, v6 = found
+    assert mask.mask_conflict and not mask.exact
+    assert mask.addresses == ["10.0.0.1/24", "10.0.0.1/32"]
+    assert exact.exact and not exact.mask_conflict
+    assert [id for id, _ in exact.entries] == [3, 4]
+    assert v6.mask_conflict
+    assert "mask" in str(mask)
+
+
+def test_accepts_records_and_mirror_rows():
+    records = [
+        SimpleNamespace(id=1, address="192.0.2.1/24", vrf=SimpleNamespace(name="blue")),
+        {"id": 2, "address": "192.0.2.1/24", "vrf": "blue", "host": "192.0.2.1"},
+    ]
+    (duplicate,) = find_duplicate_ips(records)
+    assert duplicate.vrf == "blue"
+    assert duplicate.entries == ((1, 24), (2, 24))
+
+
+def test_matches_brute_force_across_vrfs():
+    rng = random.Random(7)
+    vrfs = [None, "red", "blue", "green"]
+    hosts = ["10.0.0.1", "10.0.0.2", "::1", "2001:db8::1", "2001:db8:1::1"]
+    records = [
+        ip(i, f"{rng.choice(hosts)}/{rng.choice([24, 32, 64])}", rng.choice(vrfs))
+        for i in range(300)
+    ]
+    expected = {}
+    for record in records:
+        host, _, length = record["address"].partition("/")
+        vrf = record["vrf"]["name"] if record["vrf"] else None
+        expected.setdefault((vrf, host), []).append((record["id"], int(length)))
+    found = list(find_duplicate_ips(records))
+    assert {(d.vrf, d.host): list(d.entries) for d in found} == {
+        key: entries for key, entries in expected.items() if len(entries) > 1
+    }
+    # global first, then VRFs by name
+    order = [d.vrf or "" for d in found]
+    assert order == sorted(order)
+
+
+def test_memory_does_not_keep_rows():
+    def stream(n):
+        for i in range(n):
+            yield {
+                "id": i,
+                "address": f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}/24",
+                "vrf": None,
+                "description": "x" * 200,
+            }
+
+    tracemalloc.start()
+    assert list(find_duplicate_ips(stream(50_000))) == []
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # four 64-bit words per address plus the sort; a dict entry per host,
+    # with its int key and value, alone costs more than 100 bytes
+    assert peak / 50_000 < 100
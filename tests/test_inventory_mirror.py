@@ -0,0 +1,285 @@
+import sys
+import os
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from urllib.parse import urlparse
+
+import pynetbox
+import pytest
+import requests
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils.inventory_mirror import InventoryMirror, TABLES
+
+
+@pytest.fixture
+def mirror():
+    with InventoryMirror(":memory:") as m:
+        yield m
+
+
+def device(i, name, manufacturer="cisco", ip=None, maintenance=False):
+    return {
+        "id": i,
+        "name": name,
+        "role": {"name": "core"},
+        "site": {"name": "CHCGIL"},
+        "device_type": {"manufacturer": {"slug": manufacturer}},
+        "status": {"value": "active", "label": "Active"},
+        "primary_ip4": {"address": ip} if ip else None,
+        "primary_ip6": None,
+        "custom_fields": {"Maintenance": maintenance},
+        "last_updated": "2024-01-01T00:00:00Z",
+    }
+
+
+def ip(i, address, vrf=None):
+    return {"id": i, "address": address, "vrf": {"name": vrf} if vrf else None}
+
+
+def test_load_and_query_devices(mirror):
+    assert mirror.load("devices", [device(1, "rtr1"), device(2, "sw1", "juniper")]) == 2
+
+    cisco = mirror.devices(manufacturer="cisco")
+    assert [d["name"] for d in cisco] == ["rtr1"]
+    assert cisco[0]["role"] == "core"
+    assert mirror.custom_field(cisco[0], "Maintenance") is False
+    assert mirror.synced_at("devices") is not None
+    assert mirror.synced_at("vlans") is None
+
+
+def test_load_replaces_table(mirror):
+    mirror.load("devices", [device(1, "rtr1"), device(2, "rtr2")])
+    mirror.load("devices", [device(3, "rtr3")])
+    assert [d["id"] for d in mirror.devices()] == [3]
+
+
+def test_query_rejects_unknown_columns(mirror):
+    with pytest.raises(ValueError):
+        mirror.query("devices", bogus=1)
+    with pytest.raises(ValueError):
+        mirror.query("nope")
+
+
+def test_ip_addresses_and_duplicates(mirror):
+    mirror.load(
+        "ip_addresses",
+        [
+            ip(1, "10.0.0.1/24"),
+            ip(2, "10.0.0.1/24", vrf="blue"),
+            ip(3, "10.0.0.2/24"),
+        ],
+    )
+    assert mirror.ip_addresses(host="10.0.0.2")[0]["id"] == 3
+    assert mirror.ip_addresses(vrf="blue")[0]["id"] == 2
+    duplicates = mirror.duplicate_ips()
+    assert list(duplicates) == ["10.0.0.1/24"]
+    assert [row["id"] for row in duplicates["10.0.0.1/24"]] == [1, 2]
+
+
+def test_bgp_sessions_join_device_ip(mirror):
+    mirror.load("devices", [device(1, "rtr1", ip="10.1.1.1/32")])
+    mirror.load(
+        "bgp_sessions",
+        [
+            {
+                "id": 7,
+                "name": "peer",
+                "device": {"name": "rtr1"},
+                "status": {"value": "active"},
+                "local_address": {"address": "192.0.2.0/31"},
+                "remote_address": {"address": "192.0.2.1/31"},
+                "local_as": {"asn": 4181},
+                "remote_as": {"asn": 65001},
+            }
+        ],
+    )
+    (session,) = mirror.bgp_sessions()
+    assert session.device_ip == "10.1.1.1/32"
+    assert session.remote_as == 65001
+    assert session.remote_addr == "192.0.2.1/31"
+
+
+def test_sync_uses_projected_paging(mirror):
+    nb = MagicMock()
+    # pynetbox Records convert with dict(); plain dicts stand in for them
+    records = [device(1, "rtr1"), device(2, "rtr2")]
+
+    with patch(
+        "netbox_utils.inventory_mirror.iter_all", return_value=iter(records)
+    ) as iter_all:
+        counts = mirror.sync(nb, ["devices"])
+
+    assert counts == {"devices": 2}
+    args, kwargs = iter_all.call_args
+    assert args == (nb.dcim.devices,)
+    assert "last_updated" in kwargs["fields"]
+    assert set(TABLES["devices"].fields) <= set(kwargs["fields"])
+
+
+class Change:
+    def __init__(self, id, action, object_id):
+        self.id = id
+        self.action = {"value": action}
+        self.changed_object_id = object_id
+
+
+def fake_iter_all(changes, devices):
+    """route iter_all calls to the change log or the devices list"""
+
+    def iter_all(endpoint, fields=None, brief=False, **filters):
+        if endpoint == "changelog":
+            assert filters["changed_object_type"] == "dcim.device"
+            return iter(changes)
+        if "id" in filters:
+            return iter(d for d in devices if d["id"] in filters["id"])
+        if "last_updated__gte" in filters:
+            since = filters["last_updated__gte"]
+            return iter(d for d in devices if d["last_updated"] >= since)
+        if brief:
+            return iter(MagicMock(id=d["id"]) for d in devices)
+        return iter(devices)
+
+    return iter_all
+
+
+def refresh(mirror, changes, devices, changelog="changelog", latest_id=10, **kw):
+    with (
+        patch.object(InventoryMirror, "_changelog", return_value=changelog),
+        patch.object(InventoryMirror, "_latest_change_id", return_value=latest_id),
+        patch(
+            "netbox_utils.inventory_mirror.iter_all",
+            side_effect=fake_iter_all(changes, devices),
+        ),
+    ):
+        return mirror.refresh(MagicMock(), ["devices"], **kw)["devices"]
+
+
+def test_refresh_full_when_never_synced(mirror):
+    result = refresh(mirror, [], [device(1, "rtr1")])
+    assert result == {"mode": "full", "rows": 1}
+
+
+def test_refresh_applies_changelog(mirror):
+    refresh(mirror, [], [device(1, "rtr1"), device(2, "rtr2"), device(3, "rtr3")])
+
+    renamed = device(2, "rtr2-new")
+    created = device(4, "rtr4")
+    changes = [
+        Change(14, "delete", 3),
+        Change(11, "update", 2),
+        Change(12, "create", 4),
+        Change(13, "update", 3),
+    ]
+    result = refresh(
+        mirror, changes, [device(1, "rtr1"), renamed, created], latest_id=14
+    )
+
+    assert result == {"mode": "changelog", "upserted": 2, "deleted": 1}
+    assert [d["name"] for d in mirror.devices()] == ["rtr1", "rtr2-new", "rtr4"]
+    assert mirror._state("devices")["changelog_id"] == 14
+
+
+def test_refresh_falls_back_to_last_updated(mirror):
+    old = device(1, "rtr1")
+    gone = device(2, "rtr2")
+    refresh(mirror, [], [old, gone], changelog=None, latest_id=None)
+
+    changed = dict(device(1, "rtr1-new"), last_updated="2024-02-01T00:00:00Z")
+    result = refresh(mirror, [], [changed], changelog=None, latest_id=None)
+
+    assert result == {"mode": "last_updated", "upserted": 1, "deleted": 1}
+    assert [d["name"] for d in mirror.devices()] == ["rtr1-new"]
+    assert mirror._state("devices")["watermark"] == "2024-02-01T00:00:00Z"
+
+
+def test_refresh_resyncs_aged_out_watermark(mirror):
+    refresh(mirror, [], [device(1, "rtr1")])
+    result = refresh(mirror, [], [device(5, "rtr5")], max_age=-1)
+    assert result == {"mode": "full", "rows": 1}
+    assert [d["id"] for d in mirror.devices()] == [5]
+
+
+class FakeNetbox(requests.adapters.BaseAdapter):
+    """answers pynetbox requests; listed paths return 404"""
+
+    def __init__(self, missing=()):
+        super().__init__()
+        self.missing = missing
+        self.paths = []
+
+    def send(self, request, **kwargs):
+        path = urlparse(request.url).path
+        self.paths.append(path)
+        response = requests.Response()
+        response.request, response.url = request, request.url
+        response.headers["API-Version"] = "4.0"
+        if any(path.startswith(m) for m in self.missing):
+            response.status_code, body = 404, {"detail": "Not found."}
+        elif path.endswith("/status/"):
+            response.status_code, body = 200, {"netbox-version": "4.0.0"}
+        else:
+            results = [{"id": 42}] if "object-changes" in path else []
+            response.status_code = 200
+            body = {"count": len(results), "next": None, "results": results}
+        response._content = json.dumps(body).encode()
+        return response
+
+    def close(self):
+        pass
+
+
+def fake_api(adapter):
+    nb = pynetbox.api("http://netbox.test", token="x")
+    nb.http_session = requests.Session()
+    nb.http_session.mount("http://", adapter)
+    return nb
+
+
+def test_changelog_probe_falls_back_to_extras():
+    adapter = FakeNetbox(missing=["/api/core/object-changes/"])
+    nb = fake_api(adapter)
+    changelog = InventoryMirror._changelog(nb)
+    assert changelog.url.endswith("/api/extras/object-changes")
+    assert InventoryMirror._latest_change_id(changelog) == 42
+    assert "/api/core/object-changes/" in adapter.paths
+
+
+def test_changelog_without_core_app():
+    # older pynetbox releases have no nb.core attribute at all
+    nb = fake_api(FakeNetbox())
+    old = SimpleNamespace(extras=nb.extras)
+    assert InventoryMirror._changelog(old).url.endswith("/api/extras/object-changes")
+    assert InventoryMirror._changelog(SimpleNamespace()) is None
+
+
+def test_sync_without_changelog_uses_timestamps(mirror):
+    adapter = FakeNetbox(missing=["/api/core/", "/api/extras/object-changes/"])
+    nb = fake_api(adapter)
+    assert InventoryMirror._changelog(nb) is None
+    assert mirror.sync(nb, ["devices"]) == {"devices": 0}
+    assert mirror._state("devices")["changelog_id"] is None
+
+
+def test_prefixes_keep_is_pool(mirror):
+    mirror.load(
+        "prefixes",
+        [
+            {"id": 1, "prefix": "10.0.0.0/30", "is_pool": True},
+            {"id": 2, "prefix": "10.0.0.4/30", "is_pool": False},
+        ],
+    )
+    assert [p["is_pool"] for p in mirror.prefixes()] == [1, 0]
+
+
+def test_new_columns_added_to_old_mirrors(tmp_path):
+    path = str(tmp_path / "old.db")
+    with InventoryMirror(path) as m:
+        m.load("prefixes", [{"id": 1, "prefix": "10.0.0.0/30"}])
+        m.conn.execute("ALTER TABLE prefixes DROP COLUMN is_pool")
+        m.conn.commit()
+    with InventoryMirror(path) as m:
+        assert "is_pool" in m.prefixes()[0]
+        # rows stored without the column are replaced by the next refresh
+        assert m.synced_at("prefixes") is None
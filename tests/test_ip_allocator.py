@@ -0,0 +1,178 @@
+import sys
+import os
+from ipaddress import ip_interface, ip_network
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from pynetbox import RequestError
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils import cache_events
+from netbox_utils.ip_allocator import AddressBitmap, PrefixAllocator
+
+
+class FakeEndpoint:
+    """an in-memory ip_addresses or prefixes endpoint"""
+
+    def __init__(self, key, values=(), pool=False):
+        self.key = key
+        self.records = []
+        self.next_id = 100
+        self.pool = pool
+        self.before_create = None
+        for value in values:
+            self._add(value)
+
+    def _add(self, value, id=None):
+        record = SimpleNamespace(id=id or self.next_id, **{self.key: value})
+        self.next_id += 1
+        self.records.append(record)
+        return record
+
+    def _slot(self, value):
+        return str(value).split("/")[0] if self.key == "address" else str(value)
+
+    def get(self, prefix, vrf_id):
+        return SimpleNamespace(prefix=prefix, is_pool=self.pool)
+
+    def filter(self, vrf_id=None, parent=None, within=None, **wanted):
+        found = self.records
+        if parent:
+            net = ip_network(parent)
+            found = [r for r in found if ip_interface(r.address).ip in net]
+        if within:
+            net = ip_network(within)
+            found = [
+                r
+                for r in found
+                if ip_network(r.prefix).subnet_of(net) and ip_network(r.prefix) != net
+            ]
+        if self.key in wanted:
+            values = {self._slot(v) for v in wanted[self.key]}
+            found = [r for r in found if self._slot(getattr(r, self.key)) in values]
+        return list(found)
+
+    def create(self, rows):
+        if self.before_create:
+            hook, self.before_create = self.before_create, None
+            hook()
+        return [self._add(row[self.key]) for row in rows]
+
+    def delete(self, records):
+        ids = {r.id for r in records}
+        self.records = [r for r in self.records if r.id not in ids]
+
+
+def fake_nb(addresses=(), prefixes=(), pool=False):
+    nb = MagicMock()
+    nb.ipam.ip_addresses = FakeEndpoint("address", addresses)
+    nb.ipam.prefixes = FakeEndpoint("prefix", prefixes, pool)
+    return nb
+
+
+@pytest.fixture(autouse=True)
+def local_iter_all():
+    def iter_all(endpoint, fields=None, **filters):
+        return endpoint.filter(**filters)
+
+    with patch("netbox_utils.ip_allocator.iter_all", iter_all):
+        yield
+
+
+def test_bitmap_words_and_alignment():
+    bitmap = AddressBitmap(200)
+    bitmap.mark([0, 1, 3, 64])
+    bitmap.mark_range(66, 140)
+    assert bitmap.free == 200 - 4 - 75
+    assert bitmap.find(3) == [2, 4, 5]
+    # whole words are skipped
+    assert bitmap.find(62)[-2:] == [63, 65]
+    # nothing past the end is offered
+    free = bitmap.find(1000)
+    assert len(free) == bitmap.free and free[-1] == 199
+
+
+def test_free_addresses_skip_used_network_and_broadcast():
+    nb = fake_nb(["10.0.0.1/29", "10.0.0.2/24"], ["10.0.0.0/29"])
+    allocator = PrefixAllocator(nb, "10.0.0.0/29")
+    allocator.refresh()
+    assert allocator.free_addresses(10) == [
+        "10.0.0.3/29",
+        "10.0.0.4/29",
+        "10.0.0.5/29",
+        "10.0.0.6/29",
+    ]
+    pool = PrefixAllocator(fake_nb(prefixes=["10.0.0.0/30"], pool=True), "10.0.0.0/30")
+    pool.refresh()
+    assert pool.free_addresses(1) == ["10.0.0.0/30"]
+
+
+def test_free_prefixes_are_aligned_and_clear():
+    nb = fake_nb(["10.0.0.5/24"], ["10.0.0.0/24", "10.0.0.0/30", "10.0.0.16/28"])
+    allocator = PrefixAllocator(nb, "10.0.0.0/24", max_bits=64)
+    allocator.refresh()
+    assert allocator.free_prefixes(3, 31) == [
+        "10.0.0.6/31",
+        "10.0.0.8/31",
+        "10.0.0.10/31",
+    ]
+    # the search continues into the next bitmap window
+    assert allocator.free_prefixes(2, 27) == ["10.0.0.32/27", "10.0.0.64/27"]
+    with pytest.raises(ValueError):
+        allocator.free_prefixes(1, 24)
+
+
+def test_v6_blocks_are_one_bit_each():
+    nb = fake_nb(["2001:db8::1/64", "2001:db8:0:2::1/64"], ["2001:db8::/32"])
+    allocator = PrefixAllocator(nb, "2001:db8::/32")
+    allocator.refresh()
+    assert allocator.free_prefixes(2, 64) == ["2001:db8:0:1::/64", "2001:db8:0:3::/64"]
+    assert allocator.free_addresses(2) == ["2001:db8::/32", "2001:db8::2/32"]
+
+
+def test_allocate_retries_slots_lost_to_another_allocator():
+    nb = fake_nb(["10.0.0.1/24"], ["10.0.0.0/24"])
+    addresses = nb.ipam.ip_addresses
+    # another allocator takes 10.0.0.2 between our read and our create; its
+    # id is higher than ours, as when a lower id commits later
+    addresses.before_create = lambda: addresses._add("10.0.0.2/24", id=10_000)
+    allocator = PrefixAllocator(nb, "10.0.0.0/24", backoff=0)
+    created = allocator.allocate_addresses(2, status="active")
+    assert [r.address for r in created] == ["10.0.0.3/24", "10.0.0.4/24"]
+    hosts = sorted(r.address for r in addresses.records)
+    assert hosts == ["10.0.0.1/24", "10.0.0.2/24", "10.0.0.3/24", "10.0.0.4/24"]
+    # the other allocator's record is left alone
+    assert [r.id for r in addresses.records if r.address == "10.0.0.2/24"] == [10_000]
+
+
+def test_allocate_retries_rejected_batches():
+    nb = fake_nb(prefixes=["10.0.0.0/29"])
+    prefixes = nb.ipam.prefixes
+
+    def reject():
+        prefixes._add("10.0.0.0/31")
+        raise RequestError(MagicMock(status_code=400))
+
+    prefixes.before_create = reject
+    created = PrefixAllocator(nb, "10.0.0.0/29", backoff=0).allocate_prefixes(2, 31)
+    assert [r.prefix for r in created] == ["10.0.0.2/31", "10.0.0.4/31"]
+    with pytest.raises(Exception, match="free"):
+        PrefixAllocator(nb, "10.0.0.0/29").allocate_prefixes(2, 31)
+
+
+def test_bulk_allocation_publishes_one_invalidation():
+    nb = fake_nb(prefixes=["10.0.0.0/23"])
+    seen = []
+    cache_events.bus.subscribe(seen.append)
+    try:
+        PrefixAllocator(nb, "10.0.0.0/23").allocate_addresses(2)
+        created = PrefixAllocator(nb, "10.0.0.0/23").allocate_addresses(300)
+    finally:
+        cache_events.bus.unsubscribe(seen.append)
+    assert len(created) == 300
+    assert [(e.action, e.key) for e in seen] == [
+        ("created", "10.0.0.1/23"),
+        ("created", "10.0.0.2/23"),
+        ("invalidated", None),
+    ]
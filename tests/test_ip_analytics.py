@@ -0,0 +1,173 @@
+import sys
+import os
+import ipaddress
+import random
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils.ip_analytics import IpamArrays, pack_addresses, unpack_addresses
+from netbox_utils.prefix_index import PrefixIndex
+
+
+def ip(i, address, vrf=None):
+    return {"id": i, "address": address, "vrf": {"name": vrf} if vrf else None}
+
+
+def prefix(i, network, vrf=None, status="active"):
+    return {"id": i, "prefix": network, "vrf": vrf, "status": {"value": status}}
+
+
+def test_pack_round_trip():
+    v6 = ["::", "2001:db8::1", "ffff:ffff:ffff:ffff:ffff:ffff:ffff:ffff"]
+    packed = pack_addresses(v6, 6)
+    assert np.argsort(packed).tolist() == [0, 1, 2]
+    assert unpack_addresses(packed, 6) == v6
+    assert unpack_addresses(pack_addresses(["10.0.0.1"], 4), 4) == ["10.0.0.1"]
+
+
+def test_duplicates_per_vrf_and_family():
+    arrays = IpamArrays.from_records(
+        [
+            ip(1, "10.0.0.1/24"),
+            ip(2, "10.0.0.1/32"),
+            ip(3, "10.0.0.1/24", vrf="red"),
+            ip(4, "10.0.0.2/24"),
+            ip(5, "2001:db8::1/64"),
+            ip(6, "2001:db8::1/128"),
+            ip(7, "2001:db8::1/64", vrf="red"),
+        ]
+    )
+    assert arrays[4].duplicates() == [(None, "10.0.0.1", [1, 2])]
+    assert arrays[6].duplicates() == [(None, "2001:db8::1", [5, 6])]
+
+
+def random_ipam(rng, version, lengths):
+    bits = 32 if version == 4 else 128
+    prefixes, addresses = [], []
+    for i in range(200):
+        network = ipaddress.ip_network(
+            (rng.getrandbits(8) << (bits - 8), rng.choice(lengths)), strict=False
+        )
+        prefixes.append(prefix(i, str(network), rng.choice([None, "a"])))
+    for i in range(1000):
+        network = ipaddress.ip_network(rng.choice(prefixes)["prefix"])
+        host = network.network_address + rng.getrandbits(8)
+        addresses.append(ip(i, f"{host}/32", rng.choice([None, "a"])))
+    return addresses, prefixes
+
+
+def test_containing_matches_prefix_index():
+    rng = random.Random(7)
+    for version, lengths in ((4, (4, 8, 12, 16, 24)), (6, (4, 8, 32, 64, 120))):
+        addresses, prefixes = random_ipam(rng, version, lengths)
+        index = PrefixIndex.from_prefixes(prefixes)
+        arrays = IpamArrays.from_records(addresses, prefixes)[version]
+        found = arrays.containing()
+        for record, row in zip(addresses, found):
+            vrf = record["vrf"]["name"] if record["vrf"] else None
+            entry = index.lookup(record["address"], vrf=vrf)
+            if entry is None:
+                assert row == -1
+            else:
+                assert arrays.lengths[row] == entry.length
+                assert prefixes[arrays.prefix_ids[row]]["vrf"] == vrf
+
+
+def test_utilization_counts_distinct_hosts():
+    arrays = IpamArrays.from_records(
+        [
+            ip(1, "10.0.0.1/24"),
+            ip(2, "10.0.0.1/24"),
+            ip(3, "10.0.0.2/24"),
+            ip(4, "10.0.0.3/24", vrf="red"),
+            ip(5, "10.0.1.0/31"),
+            ip(6, "2001:db8::1/64"),
+        ],
+        [
+            prefix(1, "10.0.0.0/24"),
+            prefix(2, "10.0.1.0/31"),
+            prefix(3, "2001:db8::/126"),
+        ],
+    )
+    used, size, percent = arrays[4].utilization()
+    assert used.tolist() == [2, 1]
+    assert size.tolist() == [254, 2]
+    assert percent.tolist() == [2 / 254 * 100, 50.0]
+    used, size, percent = arrays[6].utilization()
+    assert used.tolist() == [1] and size.tolist() == [4] and percent.tolist() == [25.0]
+
+
+def test_gaps_v4_and_v6():
+    arrays = IpamArrays.from_records(
+        prefixes=[
+            prefix(1, "10.0.0.0/24", status="container"),
+            prefix(2, "10.0.0.0/26"),
+            prefix(3, "10.0.0.0/27"),
+            prefix(4, "10.0.0.128/25"),
+            prefix(5, "10.0.0.64/26", vrf="red"),
+            prefix(6, "2001:db8::/126", status="container"),
+            prefix(7, "2001:db8::1/128"),
+            prefix(8, "::/0", status="container"),
+            prefix(9, "ffff::/16"),
+        ]
+    )
+    assert arrays[4].gaps(0) == [("10.0.0.64", "10.0.0.127")]
+    assert arrays[4].gaps(1) == [("10.0.0.32", "10.0.0.63")]
+    assert arrays[4].gaps(3) == [("10.0.0.128", "10.0.0.255")]
+    assert arrays[6].gaps(0) == [
+        ("2001:db8::", "2001:db8::"),
+        ("2001:db8::2", "2001:db8::3"),
+    ]
+    # nothing follows a child that ends at the last address
+    assert arrays[6].gaps(2) == [
+        ("::", "2001:db7:ffff:ffff:ffff:ffff:ffff:ffff"),
+        ("2001:db8::4", "fffe:ffff:ffff:ffff:ffff:ffff:ffff:ffff"),
+    ]
+
+
+def test_parents_skip_copies_and_other_vrfs():
+    arrays = IpamArrays.from_records(
+        prefixes=[
+            prefix(1, "10.0.0.0/16"),
+            prefix(2, "10.0.0.0/24"),
+            prefix(3, "10.0.0.0/24"),
+            prefix(4, "10.0.0.0/25", vrf="red"),
+            prefix(5, "10.0.0.0/25"),
+        ]
+    )[4]
+    assert arrays.parents().tolist() == [-1, 0, 0, -1, 2]
+
+
+def test_container_utilization_matches_brute_force():
+    rng = random.Random(11)
+    for _ in range(30):
+        prefixes = []
+        for i in range(40):
+            length = rng.choice((24, 26, 28, 30, 32))
+            network = ipaddress.ip_network(
+                (0x0A000000 + rng.getrandbits(8), length), strict=False
+            )
+            status = rng.choice(["container", "active"])
+            prefixes.append(prefix(i, str(network), rng.choice([None, "a"]), status))
+            if rng.random() < 0.2:
+                # an exact copy, container or not, next to the original
+                other = "active" if status == "container" else "container"
+                prefixes.append(
+                    prefix(100 + i, str(network), prefixes[-1]["vrf"], other)
+                )
+        arrays = IpamArrays.from_records(prefixes=prefixes)[4]
+        used, _, _ = arrays.utilization()
+        networks = [ipaddress.ip_network(p["prefix"]) for p in prefixes]
+        for row, (record, net) in enumerate(zip(prefixes, networks)):
+            if record["status"]["value"] != "container":
+                continue
+            inside = set()
+            for other, child in zip(prefixes, networks):
+                if (
+                    other["vrf"] == record["vrf"]
+                    and child != net
+                    and child.subnet_of(net)
+                ):
+                    inside.update(range(int(child[0]), int(child[-1]) + 1))
+            assert used[row] == len(inside), record
@@ -1,11 +1,12 @@
 import pytest
 import sys
 import os
+import ipaddress
 import logging
 from loguru import logger
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from netbox_utils.ip_info import ip_info
+from netbox_utils.ip_info import get_ip_info, ip_info
 
 
 class PropagateHandler(logging.Handler):
@@ -44,3 +45,51 @@ def test_ip_info_ipv6(caplog):
     ip_info("2001:db8::1/128")
     assert "IPv6    2001:db8::1" in caplog.text
     assert "number of addresses: 1" in caplog.text
+
+
+@pytest.mark.parametrize(
+    "cidr",
+    [
+        "10.0.0.0/29",
+        "10.0.0.0/30",
+        "10.0.0.0/31",
+        "10.0.0.1/32",
+        "2001:db8::/125",
+        "2001:db8::/127",
+        "2001:db8::1/128",
+    ],
+)
+def test_hosts_match_ipaddress(cidr):
+    info = get_ip_info(cidr)
+    expected = list(ipaddress.ip_network(cidr).hosts())
+    assert list(info.hosts()) == expected
+    assert info.num_hosts == len(expected)
+    assert list(info.hosts(offset=1, limit=2)) == expected[1:3]
+
+
+def test_negative_offset_or_limit_rejected(caplog):
+    caplog.set_level(logging.INFO)
+    info = get_ip_info("10.0.0.0/30")
+    # -1 would otherwise start at the network address
+    with pytest.raises(ValueError):
+        info.hosts(offset=-1)
+    with pytest.raises(ValueError):
+        info.hosts(limit=-1)
+    with pytest.raises(ValueError):
+        ip_info("10.0.0.0/30", offset=-1)
+    assert "CIDR" not in caplog.text
+
+
+def test_large_networks_are_paged(caplog):
+    caplog.set_level(logging.INFO)
+    info = ip_info("10.0.0.0/8", offset=1000, limit=2)
+    assert info.num_hosts == 2**24 - 2
+    assert "usable host IPs 1001-1002 of 16777214" in caplog.text
+    assert "10.0.3.233" in caplog.text and "10.0.3.235" not in caplog.text
+
+    info = ip_info("2001:db8::/32", limit=1)
+    assert info.last_host == ipaddress.ip_address(
+        "2001:db8:ffff:ffff:ffff:ffff:ffff:ffff"
+    )
+    assert info.broadcast is None
+    assert f"number of addresses: {2**96}" in caplog.text
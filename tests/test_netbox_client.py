@@ -1,6 +1,7 @@
 import pytest
 import sys
 import os
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -40,7 +41,9 @@ def test_get_pynetbox_version(netbox_client):
 
 def test_check_if_cidr_exists_found(netbox_client):
     # Mock finding an IP
-    netbox_client.nb.ipam.ip_addresses.get.return_value = MagicMock()
+    mock_ip = MagicMock()
+    mock_ip.address = "192.168.1.1/24"
+    netbox_client.nb.ipam.ip_addresses.filter.return_value = [mock_ip]
 
     exists = netbox_client.check_if_cidr_exists("192.168.1.1/24")
     assert exists is True
@@ -48,23 +51,28 @@ def test_check_if_cidr_exists_found(netbox_client):
 
 def test_check_if_cidr_exists_not_found(netbox_client):
     # Mock NOT finding an IP
-    netbox_client.nb.ipam.ip_addresses.get.return_value = None
+    netbox_client.nb.ipam.ip_addresses.filter.return_value = []
 
     exists = netbox_client.check_if_cidr_exists("192.168.1.1/24")
     assert exists is False
 
 
 def test_get_cidr_from_ip_found(netbox_client):
-    # Mock logic: only return true when the specific loop iteration hits /24
-    def side_effect(address):
-        if address == "192.168.1.1/24":
-            return MagicMock()
-        return None
-
-    netbox_client.nb.ipam.ip_addresses.get.side_effect = side_effect
+    # a single host-address query returns the record for any mask length
+    mock_ip = MagicMock()
+    mock_ip.address = "192.168.1.1/24"
+    netbox_client.nb.ipam.ip_addresses.filter.return_value = [mock_ip]
 
     cidr = netbox_client.get_cidr_from_ip("192.168.1.1")
     assert cidr == "192.168.1.1/24"
+    netbox_client.nb.ipam.ip_addresses.filter.assert_called_once_with(
+        address=["192.168.1.1"]
+    )
+
+
+def test_get_cidr_from_ip_not_found(netbox_client):
+    netbox_client.nb.ipam.ip_addresses.filter.return_value = []
+    assert netbox_client.get_cidr_from_ip("192.168.1.1") is None
 
 
 def test_get_site_id(netbox_client):
@@ -177,6 +185,28 @@ def test_add_ip_to_netbox_exists(netbox_client):
     assert netbox_client.add_ip_to_netbox("1.1.1.1/32", "Desc", "Active") is None
 
 
+def test_add_ip_to_netbox_uses_existing_set(netbox_client):
+    netbox_client.check_if_cidr_exists = MagicMock()
+
+    assert (
+        netbox_client.add_ip_to_netbox("1.1.1.1/32", "Desc", "Active", {"1.1.1.1/32"})
+        is None
+    )
+    netbox_client.check_if_cidr_exists.assert_not_called()
+
+
+def test_add_ips_to_netbox(netbox_client):
+    netbox_client.check_cidrs_exist_many = MagicMock(return_value={"1.1.1.1/32"})
+    netbox_client.nb.ipam.ip_addresses.create.return_value = MagicMock()
+
+    added = netbox_client.add_ips_to_netbox(
+        ["1.1.1.1/32", "1.1.1.2/32", "1.1.1.2/32"], "Desc", "Active"
+    )
+    assert len(added) == 1
+    netbox_client.check_cidrs_exist_many.assert_called_once()
+    netbox_client.nb.ipam.ip_addresses.create.assert_called_once()
+
+
 def test_get_circuit_id(netbox_client):
     netbox_client.get_device_id = MagicMock(return_value=100)
 
@@ -255,3 +285,54 @@ def test_add_ip_to_interface(netbox_client):
         is True
     )
     netbox_client.nb.ipam.ip_addresses.create.assert_called()
+
+
+def test_get_site_id_is_cached(netbox_client):
+    mock_site = MagicMock()
+    mock_site.id = 123
+    netbox_client.nb.dcim.sites.get.return_value = mock_site
+
+    assert netbox_client.get_site_id("Test-Site") == 123
+    assert netbox_client.get_site_id("Test-Site") == 123
+    netbox_client.nb.dcim.sites.get.assert_called_once_with(name="Test-Site")
+    assert netbox_client.resolver.stats["hits"] == 1
+
+
+def test_prefetch_seeds_reference_lookups(netbox_client):
+    nb = netbox_client.nb
+    nb.dcim.sites.filter.return_value = [SimpleNamespace(id=1, name="Site-A")]
+    nb.dcim.device_roles.filter.return_value = [SimpleNamespace(id=2, name="core")]
+    nb.dcim.device_types.filter.return_value = [SimpleNamespace(id=3, model="MX204")]
+    nb.dcim.manufacturers.filter.return_value = [SimpleNamespace(id=4, name="juniper")]
+    nb.ipam.rirs.filter.return_value = [SimpleNamespace(id=5, name="ARIN")]
+    nb.ipam.asns.filter.return_value = [SimpleNamespace(id=6, asn=65000)]
+
+    counts = netbox_client.prefetch("provisioning")
+    assert set(counts.values()) == {1}
+    nb.dcim.sites.filter.assert_called_once_with(
+        limit=1000, offset=0, fields="id,url,name"
+    )
+
+    assert netbox_client.get_site_id("Site-A") == 1
+    assert netbox_client.get_role_id("core") == 2
+    assert netbox_client.get_device_type_id("MX204") == 3
+    assert netbox_client.get_manufacturer_id("juniper") == 4
+    assert netbox_client.get_rir_id("ARIN") == 5
+    assert netbox_client.get_as_id(65000) == 6
+    for endpoint in (nb.dcim.sites, nb.dcim.device_types, nb.ipam.asns):
+        endpoint.get.assert_not_called()
+
+
+def test_get_as_id_negative_cached(netbox_client):
+    netbox_client.nb.ipam.asns.get.return_value = None
+
+    assert netbox_client.get_as_id(65999) is None
+    assert netbox_client.get_as_id(65999) is None
+    netbox_client.nb.ipam.asns.get.assert_called_once()
+
+
+def test_get_site_id_exception_not_cached(netbox_client):
+    netbox_client.nb.dcim.sites.get.side_effect = Exception("API Error")
+    assert netbox_client.get_site_id("Test-Site") is None
+    assert netbox_client.get_site_id("Test-Site") is None
+    assert netbox_client.nb.dcim.sites.get.call_count == 2
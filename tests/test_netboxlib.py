@@ -23,52 +23,183 @@ def test_get_netbox_device_count(mock_nb):
 
 
 def test_check_if_cidr_exists(mock_nb):
-    mock_nb.ipam.ip_addresses.get.return_value = MagicMock()
+    mock_ip = MagicMock()
+    mock_ip.address = "1.1.1.1/32"
+    mock_nb.ipam.ip_addresses.filter.return_value = [mock_ip]
     assert netboxlib.check_if_cidr_exists(mock_nb, "1.1.1.1/32") is True
 
-    mock_nb.ipam.ip_addresses.get.return_value = None
+    mock_nb.ipam.ip_addresses.filter.return_value = []
     assert netboxlib.check_if_cidr_exists(mock_nb, "2.2.2.2/32") is False
 
 
-def test_check_if_ip_exists(mock_nb):
-    # Mocking get to return something only for specific call
+def test_check_cidrs_exist_many(mock_nb):
+    found = MagicMock()
+    found.address = "10.0.0.1/24"
+    mock_nb.ipam.ip_addresses.filter.return_value = [found]
+
+    cidrs = ["10.0.0.1/24", "10.0.0.2/24", "not-a-cidr"]
+    assert netboxlib.check_cidrs_exist_many(mock_nb, cidrs) == {"10.0.0.1/24"}
+    mock_nb.ipam.ip_addresses.filter.assert_called_once_with(
+        address=["10.0.0.1/24", "10.0.0.2/24"]
+    )
+
+
+def test_check_cidrs_exist_many_chunks_requests(mock_nb):
+    mock_nb.ipam.ip_addresses.filter.return_value = []
+    cidrs = [f"10.0.{i // 256}.{i % 256}/16" for i in range(4096)]
+
+    assert netboxlib.check_cidrs_exist_many(mock_nb, cidrs) == set()
+    calls = mock_nb.ipam.ip_addresses.filter.call_args_list
+    assert len(calls) < 100
+    assert sum(len(c.kwargs["address"]) for c in calls) == 4096
+
+
+def make_ip_record(address):
+    record = MagicMock()
+    record.address = address
+    return record
+
+
+def filter_by_host(records):
+    """Mimic netbox matching a mask-less address filter against the host part."""
+
     def side_effect(address):
-        if address == "1.1.1.1/32":
-            return MagicMock()
-        return None
+        return [r for r in records if r.address.split("/")[0] in address]
+
+    return side_effect
 
-    mock_nb.ipam.ip_addresses.get.side_effect = side_effect
+
+def test_check_if_ip_exists(mock_nb):
+    mock_nb.ipam.ip_addresses.filter.side_effect = filter_by_host(
+        [make_ip_record("1.1.1.1/32")]
+    )
 
     assert netboxlib.check_if_ip_exists(mock_nb, "1.1.1.1") is True
     assert netboxlib.check_if_ip_exists(mock_nb, "2.2.2.2") is False
+    # one request per lookup instead of one per mask length
+    assert mock_nb.ipam.ip_addresses.filter.call_count == 2
 
 
 def test_get_cidr_from_ip(mock_nb):
-    def side_effect(address):
-        if address == "1.1.1.1/32":
-            return MagicMock()
-        return None
-
-    mock_nb.ipam.ip_addresses.get.side_effect = side_effect
+    mock_nb.ipam.ip_addresses.filter.side_effect = filter_by_host(
+        [make_ip_record("1.1.1.1/24"), make_ip_record("1.1.1.1/32")]
+    )
 
     assert netboxlib.get_cidr_from_ip(mock_nb, "1.1.1.1") == "1.1.1.1/32"
     assert netboxlib.get_cidr_from_ip(mock_nb, "2.2.2.2") is None
 
 
+def test_get_cidrs_from_ips_ipv6(mock_nb):
+    mock_nb.ipam.ip_addresses.filter.return_value = [make_ip_record("2001:db8::1/64")]
+
+    result = netboxlib.get_cidrs_from_ips(mock_nb, ["2001:0db8::0001", "2001:db8::2"])
+    assert result == {"2001:0db8::0001": ["2001:0db8::0001/64"], "2001:db8::2": []}
+    mock_nb.ipam.ip_addresses.filter.assert_called_once_with(
+        address=["2001:db8::1", "2001:db8::2"]
+    )
+
+
+def test_get_cidrs_from_ips_chunks_requests(mock_nb):
+    mock_nb.ipam.ip_addresses.filter.return_value = []
+    ips = [f"10.0.{i // 256}.{i % 256}" for i in range(2000)]
+
+    result = netboxlib.get_cidrs_from_ips(mock_nb, ips)
+    assert len(result) == 2000
+    calls = mock_nb.ipam.ip_addresses.filter.call_args_list
+    assert 1 < len(calls) < 20
+    assert sum(len(c.kwargs["address"]) for c in calls) == 2000
+
+
+def test_batch_filter_values():
+    chunks = netboxlib.batch_filter_values(["a" * 10] * 10, "address", 60)
+    assert [len(c) for c in chunks] == [3, 3, 3, 1]
+    assert netboxlib.batch_filter_values([], "address") == []
+
+
 def test_get_all_ip_prefixes(mock_nb):
     netboxlib.get_all_ip_prefixes(mock_nb)
     mock_nb.ipam.prefixes.all.assert_called_once()
 
 
+def test_get_all_ip_prefixes_projected(mock_nb):
+    mock_nb.ipam.prefixes.filter.return_value = []
+    assert list(netboxlib.get_all_ip_prefixes(mock_nb, fields=["prefix"])) == []
+    mock_nb.ipam.prefixes.filter.assert_called_once_with(
+        limit=1000, offset=0, fields="id,url,prefix"
+    )
+    mock_nb.ipam.prefixes.all.assert_not_called()
+
+
 def test_add_ip_prefix(mock_nb):
     # First case: prefix exists
-    mock_nb.ipam.prefixes.all.return_value = ["1.1.1.0/24"]
+    mock_nb.ipam.prefixes.filter.return_value = [MagicMock()]
     assert netboxlib.add_ip_prefix(mock_nb, "1.1.1.0/24") is False
+    mock_nb.ipam.prefixes.filter.assert_called_with(prefix="1.1.1.0/24", vrf_id="null")
 
     # Second case: prefix does not exist
-    mock_nb.ipam.prefixes.all.return_value = []
-    assert netboxlib.add_ip_prefix(mock_nb, "2.2.2.0/24") is True
-    mock_nb.ipam.prefixes.create.assert_called_with("2.2.2.0/24")
+    mock_nb.ipam.prefixes.filter.return_value = []
+    assert netboxlib.add_ip_prefix(mock_nb, {"prefix": "2.2.2.0/24"}) is True
+    mock_nb.ipam.prefixes.create.assert_called_with({"prefix": "2.2.2.0/24"})
+    mock_nb.ipam.prefixes.all.assert_not_called()
+
+    # a prefix string is sent as a create payload, normalized
+    assert netboxlib.add_ip_prefix(mock_nb, "3.3.3.1/24") is True
+    mock_nb.ipam.prefixes.create.assert_called_with({"prefix": "3.3.3.0/24"})
+
+    # the same prefix in a VRF is looked up in that VRF
+    netboxlib.add_ip_prefix(mock_nb, {"prefix": "2.2.2.0/24", "vrf": 7})
+    mock_nb.ipam.prefixes.filter.assert_called_with(prefix="2.2.2.0/24", vrf_id=7)
+
+
+def make_prefix_record(prefix, vrf_id=None):
+    record = MagicMock()
+    record.prefix = prefix
+    record.vrf = None if vrf_id is None else MagicMock(id=vrf_id)
+    return record
+
+
+def test_add_ip_prefix_with_index(mock_nb):
+    mock_nb.ipam.prefixes.filter.return_value = [
+        make_prefix_record("10.0.0.0/8"),
+        make_prefix_record("172.16.0.0/12", vrf_id=7),
+    ]
+    index = netboxlib.get_prefix_index(mock_nb)
+    mock_nb.ipam.prefixes.filter.assert_called_once_with(
+        limit=1000, offset=0, fields="id,url,prefix,vrf"
+    )
+
+    assert netboxlib.add_ip_prefix(mock_nb, "10.0.0.0/8", index) is False
+    assert netboxlib.add_ip_prefix(mock_nb, "10.1.0.0/16", index) is True
+    assert netboxlib.add_ip_prefix(mock_nb, "10.1.0.0/16", index) is False
+    # a prefix that exists only in another VRF is still created
+    assert netboxlib.add_ip_prefix(mock_nb, "172.16.0.0/12", index) is True
+    vrf_prefix = {"prefix": "172.16.0.0/12", "vrf": {"id": 7}}
+    assert netboxlib.add_ip_prefix(mock_nb, vrf_prefix, index) is False
+    assert netboxlib.add_ip_prefix(mock_nb, {**vrf_prefix, "vrf": 8}, index) is True
+    assert mock_nb.ipam.prefixes.filter.call_count == 1
+    with pytest.raises(ValueError):
+        netboxlib.add_ip_prefix(mock_nb, {**vrf_prefix, "vrf": {"name": "red"}}, index)
+
+
+def test_add_ip_prefixes(mock_nb):
+    mock_nb.ipam.prefixes.filter.return_value = [
+        make_prefix_record("10.0.0.0/24"),
+        make_prefix_record("10.0.9.0/24", vrf_id=3),
+    ]
+    mock_nb.ipam.prefixes.create.side_effect = lambda batch: list(batch)
+
+    prefixes = [f"10.0.{i}.0/24" for i in range(5)] + ["10.0.1.0/24"]
+    prefixes += ["10.0.9.0/24", {"prefix": "10.0.9.0/24", "vrf": 3}]
+    created = netboxlib.add_ip_prefixes(mock_nb, prefixes, batch_size=2)
+
+    assert [row["prefix"] for row in created] == [
+        "10.0.1.0/24",
+        "10.0.2.0/24",
+        "10.0.3.0/24",
+        "10.0.4.0/24",
+        "10.0.9.0/24",
+    ]
+    assert mock_nb.ipam.prefixes.create.call_count == 3
 
 
 def test_check_if_device_name_exists(mock_nb):
@@ -133,15 +264,26 @@ def test_get_bgp_community_desc(mock_nb):
 
 def test_add_ipv4_ip(mock_nb):
     # Case: Exists
-    mock_nb.ipam.ip_addresses.get.return_value = MagicMock()
+    mock_ip = MagicMock()
+    mock_ip.address = "1.1.1.1/32"
+    mock_nb.ipam.ip_addresses.filter.return_value = [mock_ip]
     assert netboxlib.add_ipv4_ip(mock_nb, "1.1.1.1/32") == "IP Exists"
 
     # Case: New IP
-    mock_nb.ipam.ip_addresses.get.return_value = None
+    mock_nb.ipam.ip_addresses.filter.return_value = []
     mock_nb.ipam.ip_addresses.create.return_value = "New-IP-Obj"
     assert netboxlib.add_ipv4_ip(mock_nb, "1.1.1.2/32") == "New-IP-Obj"
 
 
+def test_add_ipv4_ip_with_existing_set(mock_nb):
+    mock_nb.ipam.ip_addresses.create.return_value = "New-IP-Obj"
+    existing = {"1.1.1.1/32"}
+
+    assert netboxlib.add_ipv4_ip(mock_nb, "1.1.1.1/32", existing) == "IP Exists"
+    assert netboxlib.add_ipv4_ip(mock_nb, "1.1.1.2/32", existing) == "New-IP-Obj"
+    mock_nb.ipam.ip_addresses.filter.assert_not_called()
+
+
 def test_delete_netbox_device(mock_nb):
     # Found
     mock_dev = MagicMock()
@@ -215,11 +357,13 @@ def test_add_bgp_community(mock_nb):
 
 def test_add_ipv6_ip(mock_nb):
     # Exists
-    mock_nb.ipam.ip_addresses.get.return_value = MagicMock()
+    mock_ip = MagicMock()
+    mock_ip.address = "2001:db8::1/64"
+    mock_nb.ipam.ip_addresses.filter.return_value = [mock_ip]
     assert netboxlib.add_ipv6_ip(mock_nb, "2001:db8::1/64") == "IP Exists"
 
     # New
-    mock_nb.ipam.ip_addresses.get.return_value = None
+    mock_nb.ipam.ip_addresses.filter.return_value = []
     mock_nb.ipam.ip_addresses.create.return_value = "New-IPv6"
     assert netboxlib.add_ipv6_ip(mock_nb, "2001:db8::2/64") == "New-IPv6"
 
@@ -258,3 +402,48 @@ def test_get_ip_device_info(mock_nb):
 
     # Run function
     assert netboxlib.get_ip_device_info(mock_nb, "1.1.1.1") is True
+
+
+def test_build_ipv4_subnet_rows():
+    rows = netboxlib.build_ipv4_subnet_rows("10.0.0.0/30")
+    assert rows == [
+        {"address": "10.0.0.0/30", "description": "Subnet", "status": "reserved"},
+        {"address": "10.0.0.3/30", "description": "Broadcast", "status": "reserved"},
+        {"address": "10.0.0.1/30", "description": ""},
+        {"address": "10.0.0.2/30", "description": ""},
+    ]
+    assert len(netboxlib.build_ipv4_subnet_rows("10.0.0.0/31")) == 2
+    assert len(netboxlib.build_ipv4_subnet_rows("10.0.0.0/22")) == 1024
+
+
+def test_bulk_add_ipv4_subnet(mock_nb):
+    existing = MagicMock()
+    existing.address = "10.0.0.1/32"
+    mock_nb.ipam.ip_addresses.filter.return_value = [existing]
+    progress = MagicMock()
+
+    result = netboxlib.bulk_add_ipv4_subnet(
+        mock_nb, "10.0.0.0/24", batch_size=100, progress=progress
+    )
+
+    mock_nb.ipam.ip_addresses.filter.assert_called_once_with(parent="10.0.0.0/24")
+    assert result == {"created": 255, "skipped": 1, "failed": []}
+    batches = [c.args[0] for c in mock_nb.ipam.ip_addresses.create.call_args_list]
+    assert [len(b) for b in batches] == [100, 100, 55]
+    assert batches[0][0]["status"] == "reserved"
+    assert progress.call_count == 3
+
+
+def test_bulk_add_ipv4_subnet_reports_failed_rows(mock_nb):
+    mock_nb.ipam.ip_addresses.filter.return_value = []
+
+    def create(data):
+        if isinstance(data, list) or data["address"] == "10.0.0.2/30":
+            raise netboxlib.pynetbox.RequestError(MagicMock())
+        return data
+
+    mock_nb.ipam.ip_addresses.create.side_effect = create
+
+    result = netboxlib.bulk_add_ipv4_subnet(mock_nb, "10.0.0.0/30")
+    assert result["created"] == 3
+    assert [row["address"] for row in result["failed"]] == ["10.0.0.2/30"]
@@ -0,0 +1,107 @@
+import sys
+import os
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+from pynetbox import RequestError
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils.pagination import iter_all, projection_params
+
+
+class FakeRecordSet(list):
+    """A page of results that reports the total count like a pynetbox RecordSet."""
+
+    def __init__(self, records, count):
+        super().__init__(records)
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+
+class FakeEndpoint:
+    url = "https://netbox.example.com/api/ipam/ip-addresses/"
+
+    def __init__(self, total, max_page_size=1000, reject=()):
+        self.total = total
+        self.reject = reject
+        self.max_page_size = max_page_size
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def filter(self, limit, offset, **filters):
+        with self.lock:
+            self.calls.append((offset, limit, filters))
+        if any(param in filters for param in self.reject):
+            req = MagicMock(status_code=400)
+            req.json.return_value = {"detail": "unknown parameter"}
+            raise RequestError(req)
+        limit = min(limit, self.max_page_size)
+        records = list(range(offset, min(offset + limit, self.total)))
+        return FakeRecordSet(records, self.total)
+
+
+def test_iter_all_in_order():
+    endpoint = FakeEndpoint(total=2500)
+    records = list(iter_all(endpoint, workers=4, page_size=100, status="active"))
+
+    assert records == list(range(2500))
+    assert len(endpoint.calls) == 25
+    assert all(call[2] == {"status": "active"} for call in endpoint.calls)
+
+
+def test_iter_all_single_page():
+    endpoint = FakeEndpoint(total=10)
+    assert list(iter_all(endpoint, page_size=100)) == list(range(10))
+    assert len(endpoint.calls) == 1
+
+
+def test_iter_all_empty():
+    endpoint = FakeEndpoint(total=0)
+    assert list(iter_all(endpoint)) == []
+
+
+def test_iter_all_respects_server_page_cap():
+    endpoint = FakeEndpoint(total=950, max_page_size=200)
+    assert list(iter_all(endpoint, page_size=1000)) == list(range(950))
+    assert sorted(call[0] for call in endpoint.calls) == [0, 200, 400, 600, 800]
+
+
+def test_iter_all_is_lazy():
+    endpoint = FakeEndpoint(total=100000)
+    records = iter_all(endpoint, workers=2, page_size=100)
+    assert next(records) == 0
+    records.close()
+    # only the first page and the prefetch window were requested
+    assert len(endpoint.calls) <= 1 + 2 * 2
+
+
+def test_projection_params():
+    assert projection_params() == {}
+    assert projection_params(["address", "id"]) == {"fields": "id,url,address"}
+    assert projection_params(brief=True) == {"brief": 1}
+
+
+def test_iter_all_projects_every_page():
+    endpoint = FakeEndpoint(total=300)
+    records = list(iter_all(endpoint, page_size=100, fields=["address"]))
+
+    assert records == list(range(300))
+    assert all(call[2] == {"fields": "id,url,address"} for call in endpoint.calls)
+
+
+def test_iter_all_falls_back_without_projection():
+    endpoint = FakeEndpoint(total=300, reject=("brief",))
+    records = list(iter_all(endpoint, page_size=100, brief=True, status="active"))
+
+    assert records == list(range(300))
+    assert endpoint.calls[0][2] == {"status": "active", "brief": 1}
+    assert all(call[2] == {"status": "active"} for call in endpoint.calls[1:])
+
+
+def test_iter_all_reraises_without_projection():
+    endpoint = FakeEndpoint(total=300, reject=("status",))
+    with pytest.raises(RequestError):
+        list(iter_all(endpoint, status="active"))
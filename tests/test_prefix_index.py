@@ -0,0 +1,101 @@
+import ipaddress
+import random
+import sys
+import os
+from unittest.mock import MagicMock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils.prefix_index import PrefixIndex, build_prefix_index, parse_address
+
+
+def prefix(i, cidr, vrf=None):
+    return {"id": i, "prefix": cidr, "vrf": {"name": vrf} if vrf else None}
+
+
+def index():
+    return PrefixIndex.from_prefixes(
+        [
+            prefix(1, "10.0.0.0/8"),
+            prefix(2, "10.1.0.0/16"),
+            prefix(3, "10.1.2.0/24"),
+            prefix(4, "10.1.2.0/24", "red"),
+            prefix(5, "192.168.0.0/16"),
+            prefix(6, "2001:db8::/32"),
+            prefix(7, "2001:db8:1::/48"),
+        ]
+    )
+
+
+def test_parse_address():
+    assert parse_address("10.0.0.1/24") == (4, 0x0A000001)
+    assert parse_address("::1") == (6, 1)
+
+
+def test_longest_match():
+    idx = index()
+    assert len(idx) == 7
+    assert idx.lookup("10.1.2.3", vrf=None).id == 3
+    assert idx.lookup("10.1.2.3", vrf="red").id == 4
+    assert idx.lookup("10.1.9.9").id == 2
+    assert idx.lookup("10.200.0.1").prefix == "10.0.0.0/8"
+    assert idx.lookup("172.16.0.1") is None
+    assert idx.lookup("2001:db8:1::5").id == 7
+    assert idx.lookup("10.1.2.3", vrf="blue") is None
+
+
+def test_covering_and_covered():
+    idx = index()
+    assert [e.id for e in idx.covering("10.1.2.128/25", vrf=None)] == [1, 2, 3]
+    assert sorted(e.id for e in idx.covered("10.0.0.0/8")) == [1, 2, 3, 4]
+    assert [e.id for e in idx.covered("10.1.0.0/16", vrf=None)] == [2, 3]
+    assert idx.covered("172.16.0.0/12") == []
+
+
+def test_insert_and_delete():
+    idx = index()
+    idx.insert("10.1.2.64/26", id=8)
+    assert idx.lookup("10.1.2.70", vrf=None).id == 8
+    assert idx.delete("10.1.0.0/16").id == 2
+    assert idx.delete("10.1.0.0/16") is None
+    assert idx.lookup("10.1.9.9").id == 1
+    assert idx.lookup("10.1.2.70", vrf=None).id == 8
+    assert idx.delete("10.1.2.64/26").id == 8
+    assert idx.lookup("10.1.2.70", vrf=None).id == 3
+    assert len(idx) == 6
+
+
+def test_lookup_many_matches_brute_force():
+    rng = random.Random(7)
+    networks = {
+        ipaddress.ip_network((rng.getrandbits(32), rng.randint(8, 30)), strict=False)
+        for _ in range(300)
+    }
+    idx = PrefixIndex.from_prefixes(
+        prefix(i, str(net)) for i, net in enumerate(networks)
+    )
+    addresses = [rng.getrandbits(32) for _ in range(500)]
+
+    def check():
+        for address, entry in zip(addresses, idx.lookup_many(addresses, version=4)):
+            host = ipaddress.ip_address(address)
+            containing = [n for n in networks if host in n]
+            if not containing:
+                assert entry is None
+            else:
+                best = max(containing, key=lambda n: n.prefixlen)
+                assert entry.prefix == str(best)
+
+    check()
+    for net in rng.sample(sorted(networks), 150):
+        assert idx.delete(str(net)) is not None
+        networks.discard(net)
+    assert len(idx) == len(networks)
+    check()
+
+
+def test_build_prefix_index_uses_projection():
+    nb = MagicMock()
+    nb.ipam.prefixes.filter.return_value = [prefix(1, "10.0.0.0/8")]
+    idx = build_prefix_index(nb)
+    assert idx.lookup("10.9.9.9").id == 1
+    assert nb.ipam.prefixes.filter.call_args.kwargs["fields"] == "id,url,prefix,vrf"
@@ -0,0 +1,80 @@
+import ipaddress
+import random
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils.prefix_overlaps import (
+    DUPLICATE,
+    NESTED,
+    SHADOWED,
+    find_prefix_conflicts,
+)
+
+
+def prefix(i, cidr, vrf=None, status="active"):
+    return {
+        "id": i,
+        "prefix": cidr,
+        "vrf": {"name": vrf} if vrf else None,
+        "status": {"value": status},
+    }
+
+
+def test_duplicates_nested_and_shadowed():
+    prefixes = [
+        prefix(1, "10.0.0.0/8", status="container"),
+        prefix(2, "10.1.0.0/16"),
+        prefix(3, "10.1.0.0/17"),
+        prefix(4, "10.1.128.0/17"),
+        prefix(5, "10.2.0.0/16"),
+        prefix(6, "10.2.0.0/16"),
+        prefix(7, "10.2.0.0/16", vrf="red"),
+        prefix(8, "2001:db8::/32"),
+        prefix(9, "2001:db8::/48", status="reserved"),
+    ]
+    found = {(c.kind, c.id, c.other_id) for c in find_prefix_conflicts(prefixes)}
+    assert found == {
+        (NESTED, 3, 2),
+        (NESTED, 4, 2),
+        (SHADOWED, 2, None),
+        (DUPLICATE, 6, 5),
+        (NESTED, 9, 8),
+    }
+
+
+def test_mirror_rows_and_gaps():
+    rows = [
+        {"id": 1, "prefix": "192.168.0.0/24", "vrf": "blue", "status": "active"},
+        {"id": 2, "prefix": "192.168.0.0/26", "vrf": "blue", "status": "active"},
+        {"id": 3, "prefix": "192.168.0.128/25", "vrf": "blue", "status": "active"},
+    ]
+    conflicts = list(find_prefix_conflicts(rows))
+    assert {c.kind for c in conflicts} == {NESTED}
+    assert all(c.vrf == "blue" for c in conflicts)
+    assert "192.168.0.0/26" in str(conflicts[0])
+
+
+def test_matches_pairwise_check():
+    rng = random.Random(3)
+    prefixes = [
+        prefix(
+            i,
+            str(
+                ipaddress.ip_network(
+                    (rng.getrandbits(12) << 20, rng.randint(8, 16)), strict=False
+                )
+            ),
+        )
+        for i in range(200)
+    ]
+    conflicts = list(find_prefix_conflicts(prefixes))
+    flagged = {c.id for c in conflicts if c.kind in (NESTED, DUPLICATE)}
+    networks = [(p["id"], ipaddress.ip_network(p["prefix"])) for p in prefixes]
+    pairwise = {
+        i
+        for i, net in networks
+        for j, other in networks
+        if i != j and net.subnet_of(other) and (net != other or j < i)
+    }
+    assert flagged == pairwise
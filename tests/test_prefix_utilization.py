@@ -0,0 +1,93 @@
+import sys
+import os
+import csv
+import io
+import json
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils.inventory_mirror import InventoryMirror
+from netbox_utils.prefix_utilization import prefix_utilization, write_utilization
+
+
+def ip(address, vrf=None):
+    return {"address": address, "vrf": {"name": vrf} if vrf else None}
+
+
+def prefix(i, network, vrf=None, status="active", is_pool=False):
+    return {
+        "id": i,
+        "prefix": network,
+        "vrf": {"name": vrf} if vrf else None,
+        "status": {"value": status},
+        "is_pool": is_pool,
+    }
+
+
+ADDRESSES = [
+    ip("10.0.0.1/26"),
+    ip("10.0.0.2/26"),
+    ip("10.0.0.2/32"),
+    ip("10.0.0.3/26", vrf="red"),
+    ip("10.0.1.0/31"),
+    ip("10.0.1.1/31"),
+    ip("10.0.2.0/30"),
+    ip("2001:db8::1/64"),
+]
+PREFIXES = [
+    prefix(1, "10.0.0.0/24", status="container"),
+    prefix(2, "10.0.0.0/26"),
+    # a copy of a child does not count twice
+    prefix(3, "10.0.0.0/26"),
+    prefix(4, "10.0.0.64/26", vrf="red"),
+    prefix(5, "10.0.1.0/31"),
+    prefix(6, "10.0.2.0/30", is_pool=True),
+    prefix(7, "2001:db8::/126"),
+]
+
+
+def by_id(report):
+    return {row.id: row for row in report}
+
+
+def test_containers_hosts_pools_and_vrfs():
+    rows = by_id(prefix_utilization(ADDRESSES, PREFIXES))
+    assert (rows[1].used, rows[1].size, rows[1].percent) == (64, 256, 25.0)
+    assert (rows[2].used, rows[2].size) == (2, 62)
+    # red addresses only count in the red prefix
+    assert (rows[4].used, rows[4].size) == (0, 62)
+    assert (rows[5].used, rows[5].size, rows[5].percent) == (2, 2, 100.0)
+    assert (rows[6].used, rows[6].size, rows[6].percent) == (1, 4, 25.0)
+    assert (rows[7].used, rows[7].size, rows[7].percent) == (1, 4, 25.0)
+    assert rows[7].prefix == "2001:db8::/126" and rows[1].container
+
+
+def test_sorted_fullest_first_and_threshold():
+    report = prefix_utilization(ADDRESSES, PREFIXES, min_percent=20)
+    assert [row.id for row in report] == [5, 1, 6, 7]
+
+
+def test_mirror_rows():
+    with InventoryMirror(":memory:") as mirror:
+        mirror.load("ip_addresses", [{"id": 1, "address": "192.0.2.1/30"}])
+        mirror.load(
+            "prefixes",
+            [
+                {"id": 9, "prefix": "192.0.2.0/30", "is_pool": True},
+                {"id": 10, "prefix": "192.0.2.4/30", "vrf": {"name": "blue"}},
+            ],
+        )
+        rows = by_id(prefix_utilization(mirror.ip_addresses(), mirror.prefixes()))
+    # a pool keeps its network and broadcast addresses, as in a live run
+    assert (rows[9].used, rows[9].size) == (1, 4)
+    assert (rows[10].vrf, rows[10].size) == ("blue", 2)
+
+
+def test_write_csv_and_json():
+    report = prefix_utilization(ADDRESSES, PREFIXES)[:2]
+    out = io.StringIO()
+    write_utilization(report, out, "csv")
+    rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+    assert rows[0]["prefix"] == "10.0.1.0/31" and rows[0]["percent"] == "100.0"
+    out = io.StringIO()
+    write_utilization(report, out, "json")
+    assert json.loads(out.getvalue())[1]["id"] == 1
@@ -0,0 +1,96 @@
+import sys
+import os
+from unittest.mock import MagicMock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils.resolver_cache import ResolverCache, MISSING
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_resolve_calls_loader_once():
+    cache = ResolverCache()
+    loader = MagicMock(return_value=42)
+
+    assert cache.resolve("site", "Site-A", loader) == 42
+    assert cache.resolve("site", "Site-A", loader) == 42
+    loader.assert_called_once()
+    assert cache.stats["hits"] == 1
+    assert cache.stats["misses"] == 1
+
+
+def test_ttl_expiry():
+    clock = FakeClock()
+    cache = ResolverCache(ttl=10, clock=clock)
+    cache.set("site", "Site-A", 1)
+
+    clock.now = 9
+    assert cache.get("site", "Site-A") == 1
+    clock.now = 10
+    assert cache.get("site", "Site-A") is MISSING
+
+
+def test_negative_caching():
+    clock = FakeClock()
+    cache = ResolverCache(ttl=100, negative_ttl=5, clock=clock)
+    loader = MagicMock(return_value=None)
+
+    assert cache.resolve("device", "missing", loader) is None
+    assert cache.resolve("device", "missing", loader) is None
+    loader.assert_called_once()
+    assert cache.stats["negative_hits"] == 1
+
+    clock.now = 5
+    cache.resolve("device", "missing", loader)
+    assert loader.call_count == 2
+
+
+def test_negative_caching_disabled():
+    cache = ResolverCache(negative_ttl=0)
+    loader = MagicMock(return_value=None)
+    cache.resolve("device", "missing", loader)
+    cache.resolve("device", "missing", loader)
+    assert loader.call_count == 2
+
+
+def test_lru_eviction():
+    cache = ResolverCache(maxsize=2)
+    cache.set("site", "a", 1)
+    cache.set("site", "b", 2)
+    # touch "a" so "b" becomes least recently used
+    cache.get("site", "a")
+    cache.set("site", "c", 3)
+
+    assert cache.get("site", "b") is MISSING
+    assert cache.get("site", "a") == 1
+    assert cache.get("site", "c") == 3
+    assert cache.stats["evictions"] == 1
+
+
+def test_invalidate():
+    cache = ResolverCache()
+    cache.set("site", "a", 1)
+    cache.set("site", "b", 2)
+    cache.set("role", "a", 3)
+
+    assert cache.invalidate("site", "a") == 1
+    assert cache.get("site", "a") is MISSING
+    assert cache.invalidate("site") == 1
+    assert len(cache) == 1
+    assert cache.invalidate() == 1
+    assert len(cache) == 0
+
+
+def test_set_with_explicit_ttl():
+    clock = FakeClock()
+    cache = ResolverCache(ttl=10, clock=clock)
+    cache.set("site", "Site-A", 1, ttl=100)
+
+    clock.now = 50
+    assert cache.get("site", "Site-A") == 1
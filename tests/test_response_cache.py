@@ -0,0 +1,144 @@
+import sys
+import os
+from unittest.mock import patch
+
+import requests
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils import connection
+from netbox_utils.response_cache import ResponseCache, normalize_url
+
+URL = "https://netbox.example.com/api/dcim/devices/"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_cache(**kwargs):
+    clock = FakeClock()
+    return ResponseCache(":memory:", clock=clock, **kwargs), clock
+
+
+def test_normalize_url_sorts_params():
+    assert normalize_url(URL + "?name=b&limit=5") == normalize_url(
+        URL + "?limit=5&name=b"
+    )
+
+
+def test_key_depends_on_credentials():
+    assert ResponseCache.key("GET", URL, "Token a") != ResponseCache.key(
+        "GET", URL, "Token b"
+    )
+
+
+def test_ttl_for_longest_prefix():
+    cache, _ = make_cache(
+        default_ttl=5, ttls={"/api/dcim/": 60, "/api/dcim/interfaces/": 10}
+    )
+    assert cache.ttl_for(URL) == 60
+    assert cache.ttl_for("https://nb/api/dcim/interfaces/?device_id=1") == 10
+    assert cache.ttl_for("https://nb/api/ipam/prefixes/") == 5
+
+
+def test_get_set_and_expiry():
+    cache, clock = make_cache(ttls={"/api/dcim/": 60})
+    cache.set("k", URL, 200, {"Content-Type": "application/json"}, b'{"count": 0}')
+
+    assert cache.get("k") == (
+        200,
+        {"Content-Type": "application/json"},
+        b'{"count": 0}',
+    )
+    clock.now += 61
+    assert cache.get("k") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_zero_ttl_is_not_stored():
+    cache, _ = make_cache(ttls={"/api/status/": 0})
+    cache.set("k", "https://nb/api/status/", 200, {}, b"{}")
+    assert len(cache) == 0
+
+
+def test_lru_eviction_by_size():
+    cache, clock = make_cache(max_bytes=250)
+    body = os.urandom(90)  # incompressible, about 100 bytes stored
+    for key in ("a", "b"):
+        cache.set(key, URL, 200, {}, body)
+        clock.now += 1
+    cache.get("a")  # a is now more recent than b
+    clock.now += 1
+    cache.set("c", URL, 200, {}, body)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_invalidate_prefix():
+    cache, _ = make_cache()
+    cache.set("a", URL + "?name=x", 200, {}, b"{}")
+    cache.set("b", "https://netbox.example.com/api/ipam/prefixes/", 200, {}, b"{}")
+    assert cache.invalidate(URL) == 1
+    assert len(cache) == 1
+
+
+def fake_response(request, body=b'{"results": []}', status=200):
+    response = requests.Response()
+    response.status_code = status
+    response._content = body
+    response.headers["Content-Type"] = "application/json"
+    response.headers["Content-Encoding"] = "gzip"
+    response.url = request.url
+    response.request = request
+    return response
+
+
+def test_session_serves_repeat_gets_from_cache():
+    cache, _ = make_cache()
+    session = connection.build_session(cache=cache)
+
+    with patch(
+        "requests.adapters.HTTPAdapter.send",
+        side_effect=lambda request, **kw: fake_response(request),
+    ) as mock_send:
+        first = session.get(URL, params={"name": "rtr1"})
+        second = session.get(URL, params={"name": "rtr1"})
+
+    assert mock_send.call_count == 1
+    assert second.json() == first.json() == {"results": []}
+    assert "Content-Encoding" not in second.headers
+
+
+def test_session_refresh_and_writes():
+    cache, _ = make_cache()
+    session = connection.build_session(cache=cache, refresh=True)
+
+    with patch(
+        "requests.adapters.HTTPAdapter.send",
+        side_effect=lambda request, **kw: fake_response(request),
+    ) as mock_send:
+        session.get(URL)
+        session.get(URL)
+        assert mock_send.call_count == 2
+        assert len(cache) == 1
+
+        # a write to an object drops the cached list responses of its endpoint
+        session.patch(URL + "12/", json={"name": "rtr2"})
+        assert len(cache) == 0
+
+
+def test_errors_are_not_cached():
+    cache, _ = make_cache()
+    session = connection.build_session(cache=cache)
+    with patch(
+        "requests.adapters.HTTPAdapter.send",
+        side_effect=lambda request, **kw: fake_response(request, status=404),
+    ):
+        session.get(URL)
+    assert len(cache) == 0
@@ -0,0 +1,110 @@
+import asyncio
+import sys
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+import requests
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils import connection
+from netbox_utils.resolver_cache import ResolverCache
+from netbox_utils.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def slow(value, calls, delay=0.05):
+    def fn():
+        calls.append(threading.current_thread().name)
+        time.sleep(delay)
+        return value
+
+    return fn
+
+
+def test_concurrent_calls_share_one_result():
+    flights = SingleFlight()
+    calls = []
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: flights.do("k", slow(42, calls)), range(8)))
+    assert results == [42] * 8
+    assert len(calls) == 1
+    assert flights.shared == 7
+    # finished calls are not cached
+    assert flights.do("k", lambda: 43) == 43
+
+
+def test_errors_reach_every_waiter():
+    flights = SingleFlight()
+    started = threading.Event()
+
+    def fail():
+        started.set()
+        time.sleep(0.05)
+        raise ValueError("boom")
+
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(flights.do, "k", fail)
+        started.wait()
+        follower = pool.submit(flights.do, "k", lambda: "unused")
+        for future in (leader, follower):
+            with pytest.raises(ValueError):
+                future.result()
+
+
+def test_async_calls_share_one_task():
+    flights = AsyncSingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "rtr1"
+
+    async def run():
+        return await asyncio.gather(*[flights.do("k", fetch) for _ in range(5)])
+
+    assert asyncio.run(run()) == ["rtr1"] * 5
+    assert len(calls) == 1
+    assert flights.shared == 4
+
+
+def test_resolver_loader_runs_once():
+    cache = ResolverCache()
+    calls = []
+    with ThreadPoolExecutor(6) as pool:
+        results = list(
+            pool.map(
+                lambda _: cache.resolve("device", "rtr1", slow(5, calls)), range(6)
+            )
+        )
+    assert results == [5] * 6
+    assert len(calls) == 1
+    assert cache.get("device", "rtr1") == 5
+
+
+def test_session_coalesces_identical_gets():
+    calls = []
+
+    def send(adapter, request, **kwargs):
+        calls.append(request.url)
+        time.sleep(0.05)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'{"id": 1}'
+        response.request = request
+        return response
+
+    session = connection.build_session()
+    url = "http://netbox.example.com/api/dcim/devices/?name=rtr1"
+    with patch("requests.adapters.HTTPAdapter.send", send):
+        with ThreadPoolExecutor(4) as pool:
+            responses = list(pool.map(lambda _: session.get(url), range(4)))
+        assert [r.json() for r in responses] == [{"id": 1}] * 4
+        assert len(calls) == 1
+        # writes are never shared
+        with ThreadPoolExecutor(2) as pool:
+            list(pool.map(lambda _: session.post(url, json={}), range(2)))
+        assert len(calls) == 3
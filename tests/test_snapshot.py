@@ -0,0 +1,127 @@
+import sys
+import os
+from unittest.mock import MagicMock
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils import snapshot as snapshot_module
+from netbox_utils.pagination import iter_all
+from netbox_utils.snapshot import (
+    Snapshot,
+    SnapshotWriter,
+    export_snapshot,
+    open_snapshot,
+)
+
+
+def device(i, site="CHCGIL"):
+    return {
+        "id": i,
+        "name": f"rtr{i}",
+        "site": {"id": 1, "name": site, "slug": site.lower()},
+        "status": {"value": "active", "label": "Active"},
+        "custom_fields": {"Maintenance": i % 2 == 0},
+        "tags": [{"name": "core"}],
+    }
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    path = str(tmp_path / "netbox.snap")
+    with SnapshotWriter(path, {"netbox_version": "4.1.3"}, frame_size=4) as writer:
+        writer.write("dcim.devices", (device(i) for i in range(1, 11)))
+        writer.write(
+            "ipam.ip_addresses",
+            [
+                {"id": 1, "address": "10.0.0.1/24", "vrf": None},
+                {"id": 2, "address": "10.0.0.1/32", "vrf": {"id": 3, "name": "red"}},
+            ],
+        )
+        writer.write("plugins.bgp.session", [{"id": 1, "name": "s1"}])
+    return path
+
+
+def test_index_and_frames(snapshot_path):
+    with Snapshot(snapshot_path) as snapshot:
+        assert snapshot.meta["netbox_version"] == "4.1.3"
+        assert snapshot.count("dcim.devices") == 10
+        assert len(snapshot.endpoints["dcim.devices"]["frames"]) == 3
+        assert [r["id"] for r in snapshot.rows("dcim.devices", skip=5)] == [
+            6,
+            7,
+            8,
+            9,
+            10,
+        ]
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "other.db"
+    path.write_bytes(b"not a snapshot at all, just some bytes")
+    with pytest.raises(ValueError):
+        Snapshot(str(path))
+
+
+def test_api_reads_like_pynetbox(snapshot_path):
+    nb = open_snapshot(snapshot_path)
+    assert nb.version == "4.1"
+    assert nb.status()["netbox-version"] == "4.1.3"
+
+    dev = nb.dcim.devices.get(name="rtr2")
+    assert dev.id == 2
+    assert dev.site.name == "CHCGIL"
+    assert str(dev.status) == "Active"
+    assert dev.custom_fields.get("Maintenance") is True
+    assert dev.tags[0].name == "core"
+    assert dict(dev)["site"]["slug"] == "chcgil"
+
+    assert len(nb.dcim.devices.filter(site="chcgil")) == 10
+    assert nb.dcim.devices.count(site_id=1) == 10
+    assert nb.ipam.ip_addresses.get(address="10.0.0.1/32").id == 2
+    assert len(nb.ipam.ip_addresses.filter(address="10.0.0.1")) == 2
+    assert nb.plugins.bgp.session.get(1).name == "s1"
+    with pytest.raises(ValueError):
+        nb.dcim.devices.get(site="chcgil")
+    with pytest.raises(ValueError):
+        nb.dcim.devices.count(serial="x")
+    with pytest.raises(AttributeError):
+        nb.circuits.circuits
+
+
+def test_iter_all_pages_through_snapshot(snapshot_path):
+    nb = open_snapshot(snapshot_path)
+    records = list(iter_all(nb.dcim.devices, page_size=3, fields=["name"]))
+    assert [r.name for r in records] == [f"rtr{i}" for i in range(1, 11)]
+
+
+def test_filtered_pages_scan_once(snapshot_path, monkeypatch):
+    nb = open_snapshot(snapshot_path)
+    calls = []
+    decompress = snapshot_module.zlib.decompress
+    monkeypatch.setattr(
+        snapshot_module.zlib,
+        "decompress",
+        lambda data: calls.append(1) or decompress(data),
+    )
+    records = list(iter_all(nb.dcim.devices, page_size=3, site="chcgil"))
+    assert [r.id for r in records] == list(range(1, 11))
+    # one scan of the 3 frames, then each of the 4 pages reads 1 or 2 frames
+    assert len(calls) == 3 + 6
+    calls.clear()
+    assert nb.dcim.devices.count(site=["CHCGIL"]) == 10
+    page = nb.dcim.devices.filter(site_id=1, limit=2, offset=8)
+    assert [r.id for r in page] == [9, 10]
+    assert len(calls) == 3 + 1
+
+
+def test_export_streams_endpoints(tmp_path):
+    nb = MagicMock()
+    nb.status.return_value = {"netbox-version": "4.2.0"}
+    nb.dcim.sites.filter.return_value = [{"id": 1, "name": "CHCGIL"}]
+    path = str(tmp_path / "export.snap")
+
+    counts = export_snapshot(nb, path, endpoints=["dcim.sites"])
+    assert counts == {"dcim.sites": 1}
+    site = open_snapshot(path).dcim.sites.get(name="CHCGIL")
+    assert site.id == 1
@@ -0,0 +1,127 @@
+import sys
+import os
+
+import pytest
+import requests
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from netbox_utils.cache_events import CacheEventBus
+from netbox_utils.inventory_mirror import InventoryMirror
+from netbox_utils.resolver_cache import MISSING, ResolverCache
+from netbox_utils.webhook_receiver import (
+    SIGNATURE_HEADER,
+    WebhookReceiver,
+    object_type_of,
+    replay_webhooks,
+)
+
+
+@pytest.fixture
+def bus():
+    return CacheEventBus()
+
+
+@pytest.fixture
+def resolver(bus):
+    resolver = ResolverCache()
+    bus.subscribe(resolver.apply)
+    return resolver
+
+
+@pytest.fixture
+def mirror():
+    with InventoryMirror(":memory:") as m:
+        yield m
+
+
+def webhook(event, object_type, data, prechange=None):
+    return {
+        "event": event,
+        "object_type": object_type,
+        "data": data,
+        "snapshots": {"prechange": prechange, "postchange": data},
+    }
+
+
+def device(i, name):
+    return {"id": i, "name": name, "status": {"value": "active"}}
+
+
+def test_object_type_of_old_payloads():
+    assert object_type_of({"object_type": "dcim.device"}) == "dcim.device"
+    assert object_type_of({"model": "ipaddress"}) == "ipam.ipaddress"
+    assert object_type_of({"model": "unknown"}) is None
+
+
+def test_flush_applies_to_resolver_and_mirror(bus, resolver, mirror):
+    receiver = WebhookReceiver(mirror=mirror, bus=bus)
+    receiver.submit(webhook("created", "dcim.device", device(1, "rtr1")))
+    receiver.submit(
+        webhook("created", "ipam.ipaddress", {"id": 7, "address": "10.0.0.1/32"})
+    )
+    assert receiver.flush() == 2
+    assert resolver.get("device", "rtr1") == 1
+    assert resolver.get("ip_address", "10.0.0.1/32") == 7
+    assert [row["name"] for row in mirror.devices()] == ["rtr1"]
+    assert [row["address"] for row in mirror.ip_addresses()] == ["10.0.0.1/32"]
+    # webhooks do not move the changelog watermark sync/refresh rely on
+    assert mirror.synced_at("devices") is None
+
+
+def test_coalesces_and_invalidates_renames(bus, resolver, mirror):
+    receiver = WebhookReceiver(mirror=mirror, bus=bus)
+    seen = []
+    bus.subscribe(seen.append)
+    resolver.set("device", "rtr1", 1)
+    receiver.submit(webhook("created", "dcim.device", device(1, "rtr1")))
+    receiver.submit(
+        webhook("updated", "dcim.device", device(1, "rtr1a"), device(1, "rtr1"))
+    )
+    receiver.submit(
+        webhook("updated", "dcim.device", device(1, "rtr1b"), device(1, "rtr1a"))
+    )
+    receiver.flush()
+    assert receiver.stats["applied"] == 1
+    assert [(e.action, e.key) for e in seen] == [
+        ("invalidated", "rtr1"),
+        ("invalidated", "rtr1a"),
+        ("updated", "rtr1b"),
+    ]
+    assert resolver.get("device", "rtr1") is MISSING
+    assert resolver.get("device", "rtr1b") == 1
+    assert [row["name"] for row in mirror.devices()] == ["rtr1b"]
+
+
+def test_delete_removes_entries(bus, resolver, mirror):
+    receiver = WebhookReceiver(mirror=mirror, bus=bus)
+    receiver.submit(webhook("created", "dcim.device", device(1, "rtr1")))
+    receiver.flush()
+    receiver.submit(webhook("deleted", "dcim.device", device(1, "rtr1")))
+    receiver.flush()
+    assert resolver.get("device", "rtr1") is MISSING
+    assert mirror.devices() == []
+
+
+def test_bulk_batches_only_invalidate(bus, resolver, mirror):
+    receiver = WebhookReceiver(mirror=mirror, bus=bus, bulk_threshold=2)
+    resolver.set("device", "rtr1", 1)
+    for i, name in enumerate(["rtr1", "rtr2", "rtr3"], start=1):
+        receiver.submit(webhook("updated", "dcim.device", device(i, name)))
+    receiver.flush()
+    assert resolver.get("device", "rtr1") is MISSING
+    assert resolver.get("device", "rtr2") is MISSING
+    # the mirror still takes every row
+    assert mirror.count("devices") == 3
+
+
+def test_http_endpoint_checks_signature(bus, resolver):
+    with WebhookReceiver(bus=bus, secret="s3cret", flush_interval=60) as receiver:
+        url = receiver.start("127.0.0.1", 0)
+        payloads = [webhook("created", "dcim.site", {"id": 3, "name": "HQ"})]
+        assert replay_webhooks(url, payloads, secret="s3cret") == 1
+        response = requests.post(url, data=b"{}", headers={SIGNATURE_HEADER: "forged"})
+        assert response.status_code == 403
+        assert replay_webhooks(url, payloads) == 0
+    # stop() flushes what was still queued
+    assert resolver.get("site", "HQ") == 3
+    assert receiver.stats["rejected"] == 2